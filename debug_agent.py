@@ -1,40 +1,382 @@
+"""
+Debug and load-test client for the Fleetillo support agent.
 
+With no --rate, sends one request and prints the streamed response lines:
+
+    python debug_agent.py [--query "How many pending bookings are there?"]
+
+With --rate, runs an open-loop load test: sessions start on a Poisson (or
+uniform) schedule regardless of how fast earlier ones finish, each replaying a
+conversation drawn from the evaluation dataset CSV. Every stage reports time to
+first chunk, gaps between chunks and completion time as HDR-style percentile
+distributions. Latencies are measured from each session's scheduled start, so
+a saturated client or server shows up as latency rather than a lower rate.
+
+    python debug_agent.py --rate 2 5 10 --duration 60
+    python debug_agent.py --local --local-workers 4 --rate 20 50 --duration 30
+
+--local starts the agent's HTTP server against the seeded PostgREST and
+scripted LLM stand-ins (gradient-agents/fleetillo-support-agent/benchmarks/local_stack.py).
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import math
 import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
+
 import requests
-import json
 from dotenv import load_dotenv
 
-load_dotenv("gradient-agents/fleetillo-support-agent/.env")
+AGENT_DIR = "gradient-agents/fleetillo-support-agent"
+
+load_dotenv(f"{AGENT_DIR}/.env")
+
+DEFAULT_URL = "https://agents.do-ai.run/e7b58fd7-d32f-4d4c-bee0-adf3a7d0d8db/fleetillo-support/run"
+DEFAULT_MIX = f"{AGENT_DIR}/evaluations/test_dataset.csv"
+
+
+class Histogram:
+    """
+    Latency histogram with fixed relative precision, in the style of HdrHistogram.
+
+    Values (recorded in microseconds) below `sub_bucket_count` are exact; larger
+    ones keep their top log2(sub_bucket_count) bits, so every value is stored to
+    within 1 / 10**significant_figures of itself at any magnitude.
+    """
+
+    def __init__(self, significant_figures: int = 3):
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_figures))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.counts: Counter = Counter()
+        self.total = 0
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.max = 0
+
+    def record(self, value_us: float) -> None:
+        value = max(0, int(value_us))
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        self.counts[(shift, value >> shift)] += 1
+        self.total += 1
+        self.sum += value
+        self.sum_sq += value * value
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts.update(other.counts)
+        self.total += other.total
+        self.sum += other.sum
+        self.sum_sq += other.sum_sq
+        self.max = max(self.max, other.max)
+
+    def _buckets(self) -> List[Tuple[int, int]]:
+        """(highest equivalent value, count) in ascending order."""
+        return sorted((((top + 1) << shift) - 1, count) for (shift, top), count in self.counts.items())
+
+    def value_at(self, percentile: float) -> float:
+        if not self.total:
+            return 0.0
+        wanted = max(1, math.ceil(percentile / 100.0 * self.total))
+        seen = 0
+        for value, count in self._buckets():
+            seen += count
+            if seen >= wanted:
+                return min(value, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+
+    @property
+    def stddev(self) -> float:
+        if not self.total:
+            return 0.0
+        return math.sqrt(max(0.0, self.sum_sq / self.total - self.mean ** 2))
+
+    def percentile_distribution(self, scale: float = 1000.0, ticks_per_half: int = 5) -> str:
+        """Text in HdrHistogram's .hgrm layout (values divided by `scale`, i.e. ms by default)."""
+        lines = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", ""]
+        if self.total:
+            buckets = self._buckets()
+            seen, index = 0, 0
+            for percentile in _percentile_ticks(self.total, ticks_per_half):
+                wanted = max(1, math.ceil(percentile * self.total))
+                while seen < wanted and index < len(buckets):
+                    seen += buckets[index][1]
+                    index += 1
+                value = min(buckets[max(0, index - 1)][0], self.max)
+                inverse = f"{1 / (1 - percentile):14.2f}" if percentile < 1 else ""
+                lines.append(f"{value / scale:12.3f} {percentile:14.12f} {seen:10d} {inverse}".rstrip())
+        lines.append(f"#[Mean    = {self.mean / scale:12.3f}, StdDeviation   = {self.stddev / scale:12.3f}]")
+        lines.append(f"#[Max     = {self.max / scale:12.3f}, Total count    = {self.total:12d}]")
+        lines.append(f"#[Buckets = {len(self.counts):12d}, SubBuckets     = {self.sub_bucket_count:12d}]")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, scale: float = 1000.0) -> Dict[str, float]:
+        return {
+            "count": self.total,
+            "mean": round(self.mean / scale, 3),
+            **{f"p{p:g}": round(self.value_at(p) / scale, 3) for p in (50, 90, 95, 99, 99.9)},
+            "max": round(self.max / scale, 3),
+        }
+
+
+def _percentile_ticks(total: int, ticks_per_half: int) -> Iterator[float]:
+    """0, then `ticks_per_half` steps in each successive halving of the remaining distance to 100%."""
+    yield 0.0
+    half, start = 0.5, 0.0
+    while 1 - start > 1.0 / total:
+        for tick in range(1, ticks_per_half + 1):
+            yield start + half * tick / ticks_per_half
+        start, half = start + half, half / 2
+    yield 1.0
+
 
-url = "https://agents.do-ai.run/e7b58fd7-d32f-4d4c-bee0-adf3a7d0d8db/fleetillo-support/run"
-token = os.environ.get("DIGITALOCEAN_API_TOKEN")
+def load_mix(path: str, payload_format: str) -> Tuple[List[Dict], List[float]]:
+    """Request bodies from a dataset CSV (`query` holds the JSON body) and optional `weight` column."""
+    bodies, weights = [], []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            body = json.loads(row["query"])
+            if payload_format == "input" and "input" not in body:
+                body = {"input": body}
+            elif payload_format == "messages" and "input" in body:
+                body = body["input"]
+            bodies.append(body)
+            weights.append(float(row.get("weight") or 1.0))
+    return bodies, weights
 
-if not token:
-    print("Error: DIGITALOCEAN_API_TOKEN not found")
-    exit(1)
 
-headers = {
-    "Authorization": f"Bearer {token}",
-    "Content-Type": "application/json"
-}
+def arrivals(rate: float, duration: float, process: str, rng: random.Random) -> List[float]:
+    """Scheduled start offsets in seconds for one stage."""
+    offsets, t = [], 0.0
+    while True:
+        t += rng.expovariate(rate) if process == "poisson" else 1.0 / rate
+        if t >= duration:
+            return offsets
+        offsets.append(t)
 
-payload = {
-    "input": {
-        "messages": [
-            {"role": "user", "content": "How many pending bookings are there?"}
-        ]
+
+class StageStats:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.ttft = Histogram()
+        self.gaps = Histogram()
+        self.total = Histogram()
+        self.scheduled = 0
+        self.completed = 0
+        self.errors: Counter = Counter()
+        self.dropped = 0
+        self.max_lag_ms = 0.0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+
+async def session(client, url: str, headers: Dict, body: Dict, scheduled: float, stats: StageStats) -> None:
+    """One streamed request; latencies are taken from `scheduled`, the intended start time."""
+    stats.max_lag_ms = max(stats.max_lag_ms, (time.perf_counter() - scheduled) * 1000)
+    stats.in_flight += 1
+    stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+    previous = None
+    try:
+        async with client.stream("POST", url, headers=headers, json=body) as response:
+            if response.status_code != 200:
+                await response.aread()
+                stats.errors[f"HTTP {response.status_code}"] += 1
+                return
+            async for chunk in response.aiter_bytes():
+                if not chunk.strip():
+                    continue
+                now = time.perf_counter()
+                if previous is None:
+                    stats.ttft.record((now - scheduled) * 1e6)
+                else:
+                    stats.gaps.record((now - previous) * 1e6)
+                previous = now
+        if previous is None:
+            stats.errors["empty response"] += 1
+            return
+        stats.total.record((time.perf_counter() - scheduled) * 1e6)
+        stats.completed += 1
+    except Exception as e:
+        stats.errors[type(e).__name__] += 1
+    finally:
+        stats.in_flight -= 1
+
+
+async def run_stage(client, url: str, headers: Dict, mix: Tuple[List[Dict], List[float]],
+                    rate: float, args, rng: random.Random) -> StageStats:
+    stats = StageStats(rate)
+    bodies, weights = mix
+    tasks = []
+    start = time.perf_counter() + 0.05
+    offsets = arrivals(rate, args.duration, args.arrival, rng)
+    stats.scheduled = len(offsets)
+    next_report = 1.0
+    for offset in offsets:
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if offset >= next_report:
+            print(f"  t={offset:5.0f}s sent={len(tasks) + stats.dropped} done={stats.completed} "
+                  f"in_flight={stats.in_flight} errors={sum(stats.errors.values())}", end="\r", flush=True)
+            next_report = offset + 1.0
+        if stats.in_flight >= args.max_sessions:
+            # Open loop: never wait for capacity; count what the client could not send
+            stats.dropped += 1
+            continue
+        body = rng.choices(bodies, weights)[0]
+        tasks.append(asyncio.create_task(session(client, url, headers, body, start + offset, stats)))
+    if tasks:
+        await asyncio.wait(tasks, timeout=args.drain_timeout)
+    print(" " * 80, end="\r")
+    return stats
+
+
+def report(stats: StageStats, args) -> Dict:
+    errors = sum(stats.errors.values())
+    print(f"\n=== {stats.rate:g} req/s for {args.duration:g}s: {stats.scheduled} scheduled, "
+          f"{stats.completed} completed, {errors} errors, {stats.dropped} dropped, "
+          f"peak {stats.peak_in_flight} in flight, max send lag {stats.max_lag_ms:.0f} ms")
+    if stats.errors:
+        print(f"    errors: {dict(stats.errors)}")
+    print(f"{'':>12} {'p50':>9} {'p90':>9} {'p99':>9} {'p99.9':>9} {'max':>9}  (ms)")
+    for name, histogram in (("ttft", stats.ttft), ("chunk gap", stats.gaps), ("completion", stats.total)):
+        s = histogram.summary()
+        print(f"{name:>12} {s['p50']:>9.1f} {s['p90']:>9.1f} {s['p99']:>9.1f} {s['p99.9']:>9.1f} {s['max']:>9.1f}")
+    if args.histograms:
+        print(f"\nCompletion time distribution (ms):\n{stats.total.percentile_distribution()}")
+    if args.hgrm_prefix:
+        for name, histogram in (("ttft", stats.ttft), ("gaps", stats.gaps), ("completion", stats.total)):
+            path = f"{args.hgrm_prefix}-{stats.rate:g}rps-{name}.hgrm"
+            with open(path, "w") as f:
+                f.write(histogram.percentile_distribution())
+    return {
+        "rate": stats.rate,
+        "scheduled": stats.scheduled,
+        "completed": stats.completed,
+        "dropped": stats.dropped,
+        "errors": dict(stats.errors),
+        "peak_in_flight": stats.peak_in_flight,
+        "max_send_lag_ms": round(stats.max_lag_ms, 1),
+        "throughput_rps": round(stats.completed / args.duration, 2),
+        "ttft_ms": stats.ttft.summary(),
+        "chunk_gap_ms": stats.gaps.summary(),
+        "completion_ms": stats.total.summary(),
+    }
+
+
+async def load_test(url: str, headers: Dict, args) -> List[Dict]:
+    import httpx
+
+    mix = load_mix(args.mix, args.payload_format)
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.max_sessions, max_keepalive_connections=args.max_sessions)
+    results = []
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        for rate in args.rate:
+            stats = await run_stage(client, url, headers, mix, rate, args, rng)
+            results.append(report(stats, args))
+    return results
+
+
+def start_local_stack(args) -> Tuple[subprocess.Popen, str]:
+    command = [sys.executable, f"{AGENT_DIR}/benchmarks/local_stack.py",
+               "--workers", str(args.local_workers), "--ttft-ms", str(args.local_ttft_ms)]
+    stack = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    deadline = time.time() + 120
+    for line in stack.stdout:
+        if line.startswith("READY "):
+            return stack, line.split()[1]
+        if time.time() > deadline:
+            break
+    stack.terminate()
+    raise RuntimeError("Local stack did not start")
+
+
+def send_one(url: str, headers: Dict, query: str) -> None:
+    payload = {
+        "input": {
+            "messages": [
+                {"role": "user", "content": query}
+            ]
+        }
     }
-}
-
-try:
-    print(f"Sending request to {url}...")
-    response = requests.post(url, headers=headers, json=payload, stream=True)
-    
-    print("Response status:", response.status_code)
-    print("Response content:")
-    for line in response.iter_lines():
-        if line:
-            print(line.decode('utf-8'))
-            
-except Exception as e:
-    print(f"Request failed: {e}")
+
+    try:
+        print(f"Sending request to {url}...")
+        response = requests.post(url, headers=headers, json=payload, stream=True)
+
+        print("Response status:", response.status_code)
+        print("Response content:")
+        for line in response.iter_lines():
+            if line:
+                print(line.decode('utf-8'))
+
+    except Exception as e:
+        print(f"Request failed: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Debug or load-test the Fleetillo support agent")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default=DEFAULT_URL, help="Agent /run URL")
+    target.add_argument("--local", action="store_true", help="Start and target the local stand-in stack")
+    parser.add_argument("--query", default="How many pending bookings are there?", help="Single-request mode query")
+    parser.add_argument("--rate", type=float, nargs="+", help="Arrival rates (req/s), one stage each; enables load mode")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per stage")
+    parser.add_argument("--arrival", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Dataset CSV of request bodies (optional weight column)")
+    parser.add_argument("--payload-format", choices=["input", "messages"], default="input",
+                        help="Deployment ({'input': ...}) or evaluation ({'messages': ...}) body format")
+    parser.add_argument("--max-sessions", type=int, default=1000, help="Concurrent sessions before arrivals are dropped")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--drain-timeout", type=float, default=120.0, help="Wait for in-flight sessions after a stage")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--histograms", action="store_true", help="Print full completion time distributions")
+    parser.add_argument("--hgrm-prefix", help="Write .hgrm files (HdrHistogram plotter format) with this prefix")
+    parser.add_argument("--json", help="Write stage results to this file")
+    parser.add_argument("--local-workers", type=int, default=1, help="Agent worker processes for --local")
+    parser.add_argument("--local-ttft-ms", type=float, default=300.0, help="Stand-in model time to first token")
+    args = parser.parse_args()
+
+    stack = None
+    headers = {"Content-Type": "application/json"}
+    if args.local:
+        stack, url = start_local_stack(args)
+    else:
+        url = args.url
+        token = os.environ.get("DIGITALOCEAN_API_TOKEN")
+        if not token:
+            print("Error: DIGITALOCEAN_API_TOKEN not found")
+            exit(1)
+        headers["Authorization"] = f"Bearer {token}"
+
+    try:
+        if not args.rate:
+            send_one(url, headers, args.query)
+            return
+        print(f"Load test against {url}: stages {args.rate} req/s, {args.duration:g}s each, "
+              f"{args.arrival} arrivals, mix {args.mix}")
+        results = asyncio.run(load_test(url, headers, args))
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"url": url, "settings": vars(args), "stages": results}, f, indent=2)
+            print(f"\nWrote {args.json}")
+    finally:
+        if stack:
+            stack.terminate()
+            stack.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Cold-start benchmark: module import time and first-request latency in fresh processes.
+
+Each run starts a new interpreter with `-X importtime`, imports `main`, records
+which heavy packages were loaded by the import alone, then sends a first and a
+second request through `main()` against the fake PostgREST server and scripted
+LLM. With --prewarm the child runs `main.prewarm()` before the first request,
+as the server does on startup. Prints medians plus the slowest imports by
+cumulative time, and saves JSON results that can be compared with an earlier run.
+
+Run with: python benchmarks/bench_cold_start.py [--runs 5] [--prewarm] [--top 15]
+          [--compare benchmarks/results/<file>.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AGENT_DIR)
+
+from benchmarks.bench_e2e import SCENARIOS, llm_rules
+from benchmarks.fakes import point_agent_at
+from benchmarks.fakes.llm import FakeLLM
+from benchmarks.fakes.postgrest import FakePostgREST
+from benchmarks.fakes.seed import generate
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Packages that should only load once a request needs them
+HEAVY_MODULES = ["gradient", "supabase", "postgrest", "numpy", "jwt", "tools.database"]
+
+# Runs in the fresh interpreter; prints one JSON line
+CHILD = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+import_ms = (time.perf_counter() - started) * 1000
+loaded = [m for m in {heavy!r} if m in sys.modules]
+prewarm_ms = None
+if {prewarm!r}:
+    started = time.perf_counter()
+    main.prewarm()
+    prewarm_ms = (time.perf_counter() - started) * 1000
+
+async def call(query):
+    started = time.perf_counter()
+    ttft = None
+    async for chunk in main.main({{"messages": [{{"role": "user", "content": query}}]}}, {{}}):
+        if ttft is None:
+            ttft = (time.perf_counter() - started) * 1000
+    return ttft, (time.perf_counter() - started) * 1000
+
+async def both():
+    return await call({query!r}), await call({query!r})
+
+(first_ttft, first_ms), (second_ttft, second_ms) = asyncio.run(both())
+print(json.dumps({{"import_ms": import_ms, "loaded_at_import": loaded, "prewarm_ms": prewarm_ms,
+                  "first_ttft_ms": first_ttft, "first_ms": first_ms,
+                  "second_ttft_ms": second_ttft, "second_ms": second_ms}}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Rows of `-X importtime` output as {module, self_ms, cumulative_ms, depth}."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return rows
+
+
+def main_imports(rows: List[Dict]) -> List[Dict]:
+    """The modules `main` imports directly; importtime lists a module's children just before it."""
+    index = next(i for i, r in enumerate(rows) if r["module"] == "main" and r["depth"] == 0)
+    direct = []
+    for row in reversed(rows[:index]):
+        if row["depth"] == 0:
+            break
+        if row["depth"] == 1:
+            direct.append(row)
+    return direct
+
+
+def run_child(query: str, prewarm: bool) -> (Dict, List[Dict]):
+    code = CHILD.format(heavy=HEAVY_MODULES, prewarm=prewarm, query=query)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=AGENT_DIR,
+                          capture_output=True, text=True, timeout=120)
+    lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        tail = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")][-10:]
+        raise RuntimeError("child failed:\n" + "\n".join(tail))
+    return json.loads(lines[-1]), parse_importtime(proc.stderr)
+
+
+def median(samples: List[Dict], key: str):
+    values = [s[key] for s in samples if s.get(key) is not None]
+    return round(statistics.median(values), 1) if values else None
+
+
+def compare(current: Dict, previous_path: str) -> None:
+    with open(previous_path) as f:
+        previous = json.load(f)["summary"]
+    print(f"\nChange vs {previous_path}:")
+    for key, value in current.items():
+        before = previous.get(key)
+        if not isinstance(value, (int, float)) or not before:
+            continue
+        print(f"{key:<16} {before:>9.1f} -> {value:>9.1f}  {(value - before) / before * 100:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to start")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="customer_contact")
+    parser.add_argument("--prewarm", action="store_true", help="Run main.prewarm() before the first request")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Fake model time to first token")
+    parser.add_argument("--db-latency-ms", type=float, default=20.0, help="Added latency per PostgREST request")
+    parser.add_argument("--out", help="Results file (default benchmarks/results/cold-start-<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    db = FakePostgREST(generate(rows=1000), latency_ms=args.db_latency_ms).start()
+    llm = FakeLLM(llm_rules(SCENARIOS), ttft_ms=args.ttft_ms).start()
+    # Children inherit the environment, so they reach the same stand-ins
+    point_agent_at(db.url, llm.url)
+    os.environ["AGENT_PREWARM"] = "false"
+
+    samples, imports = [], []
+    try:
+        print(f"{'run':>4} {'import':>9} {'prewarm':>9} {'1st ttft':>9} {'1st total':>10} {'2nd total':>10}  loaded at import")
+        for run in range(args.runs):
+            sample, rows = run_child(SCENARIOS[args.scenario]["query"], args.prewarm)
+            samples.append(sample)
+            imports.append(rows)
+            print(f"{run + 1:>4} {sample['import_ms']:>9.1f} {sample['prewarm_ms'] or 0:>9.1f} "
+                  f"{sample['first_ttft_ms']:>9.1f} {sample['first_ms']:>10.1f} {sample['second_ms']:>10.1f}  "
+                  f"{', '.join(sample['loaded_at_import']) or '-'}")
+    finally:
+        db.stop()
+        llm.stop()
+
+    summary = {key: median(samples, key) for key in
+               ("import_ms", "prewarm_ms", "first_ttft_ms", "first_ms", "second_ttft_ms", "second_ms")}
+    summary["first_request_penalty_ms"] = round(summary["first_ms"] - summary["second_ms"], 1)
+    summary["loaded_at_import"] = sorted({m for s in samples for m in s["loaded_at_import"]})
+    print("\nMedian: " + ", ".join(f"{k} {v}" for k, v in summary.items() if v is not None))
+
+    direct = sorted(main_imports(imports[0]), key=lambda r: r["cumulative_ms"], reverse=True)[:args.top]
+    print(f"\n{'imported by main':<40} {'cumulative ms':>14} {'self ms':>9}")
+    for row in direct:
+        print(f"{row['module']:<40} {row['cumulative_ms']:>14.1f} {row['self_ms']:>9.1f}")
+
+    out = args.out or os.path.join(RESULTS_DIR, f"cold-start-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"settings": vars(args), "summary": summary, "runs": samples, "top_imports": direct}, f, indent=2)
+    print(f"\nWrote {out}")
+    if args.compare:
+        compare(summary, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+DatabaseTool micro-benchmarks across dataset sizes.
+
+For each scale, seeds a fake PostgREST server (or uses an existing PostgREST
+loaded from `benchmarks/fakes/seed.py --out`) and times every DatabaseTool
+method: the cold first call, uncached repeats (worker caches cleared, shared
+indexes warm) and a cached call. Results are saved as JSON and compared with a
+previous run when one is given.
+
+Run with: python benchmarks/bench_database.py [--scales 100 10000 100000] [--repeat 5]
+          [--only get_bookings_summary find_booking] [--compare benchmarks/results/<file>.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import point_agent_at
+from benchmarks.fakes.postgrest import FakePostgREST
+from benchmarks.fakes.seed import generate
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# (label, method, kwargs) - arguments refer to rows every seeded dataset contains
+CASES = [
+    ("get_booking_counts_by_status", "get_booking_counts_by_status", {}),
+    ("get_vehicle_status", "get_vehicle_status", {"vehicle_query": "Unit 101"}),
+    ("search_customers", "search_customers", {"query": "Perkins"}),
+    ("search_customers_miss", "search_customers", {"query": "mcburgers"}),
+    ("get_vehicle_count", "get_vehicle_count", {}),
+    ("get_customer_count", "get_customer_count", {}),
+    ("list_customers", "list_customers", {"status": "active"}),
+    ("list_active_routes", "list_active_routes", {}),
+    ("list_vehicles", "list_vehicles", {"status": "available"}),
+    ("find_nearest_vehicles", "find_nearest_vehicles", {"location_query": "Perkins"}),
+    ("get_booking_density", "get_booking_density", {}),
+    ("get_route_progress", "get_route_progress", {"route_query": "Unit 101"}),
+    ("get_route_stops", "get_route_stops", {"route_query": "Unit 101"}),
+    ("find_schedule_conflicts", "find_schedule_conflicts", {}),
+    ("check_vehicle_availability", "check_vehicle_availability",
+     {"vehicle_query": "Unit 101", "day": "tomorrow", "start_time": "10:00", "end_time": "12:00"}),
+    ("get_upcoming_schedule", "get_upcoming_schedule", {"client_query": "Perkins"}),
+    ("get_bookings_summary", "get_bookings_summary", {"start_date": "today", "sample_size": 5}),
+    ("get_maintenance_due", "get_maintenance_due", {"within_days": 30}),
+    ("get_vehicle_utilization", "get_vehicle_utilization", {}),
+    ("get_customer_overview", "get_customer_overview", {"customer_query": "Perkins"}),
+    ("lookup_service", "lookup_service", {"service_query": "repair"}),
+    ("find_booking_number", "find_booking", {"query": f"BK-{date.today():%Y%m%d}-001"}),
+    ("find_booking_text", "find_booking", {"query": "gate code"}),
+]
+
+
+def reset_worker_state() -> None:
+    """Forget everything the worker has cached or indexed, as in a fresh process."""
+    import tools.database as database
+    from tools.cache import TTLCache
+    from tools.geo import VEHICLE_INDEX, VEHICLES
+    from tools.maintenance import MAINTENANCE_INDEX
+    from tools.services import SERVICE_CATALOG
+
+    clear_caches(database, TTLCache)
+    VEHICLES.__init__()
+    for index in (VEHICLE_INDEX, MAINTENANCE_INDEX):
+        index.__init__(VEHICLES)
+    SERVICE_CATALOG.__init__()
+
+
+def clear_caches(module, cache_type) -> None:
+    for value in vars(module).values():
+        if isinstance(value, cache_type):
+            value.clear()
+
+
+def timed(fn) -> (float, object):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def failure(result) -> Optional[str]:
+    if isinstance(result, dict):
+        return result.get("error")
+    if isinstance(result, list) and result and isinstance(result[0], dict):
+        return result[0].get("error")
+    return None
+
+
+def bench_scale(scale: int, cases, repeat: int, max_seconds: float, url: Optional[str], latency_ms: float) -> List[Dict]:
+    import tools.database as database
+    from tools.cache import TTLCache
+    from tools.database import DatabaseTool
+
+    server = None
+    if url is None:
+        tables = generate(rows=scale)
+        server = FakePostgREST(tables, latency_ms=latency_ms).start()
+        url = server.url
+        print(f"\n== {scale} rows ({', '.join(f'{k}={len(v)}' for k, v in tables.items())})")
+    else:
+        print(f"\n== {url} (labelled {scale} rows)")
+    point_agent_at(url)
+
+    rows = []
+    try:
+        tool = DatabaseTool()
+        tool.MAX_QUERIES_PER_MINUTE = 10 ** 9
+        reset_worker_state()
+        for label, method, kwargs in cases:
+            call = lambda: getattr(tool, method)(**kwargs)
+            requests_before = sum(server.requests.values()) if server else 0
+            cold_ms, result = timed(call)
+            error = failure(result)
+            uncached = []
+            if not error and cold_ms < max_seconds * 1000:
+                for _ in range(repeat):
+                    clear_caches(database, TTLCache)
+                    uncached.append(timed(call)[0])
+            cached_ms = timed(call)[0] if not error else None
+            calls = 2 + len(uncached)
+            row = {
+                "scale": scale,
+                "case": label,
+                "cold_ms": round(cold_ms, 2),
+                "p50_ms": round(statistics.median(uncached), 2) if uncached else None,
+                "p95_ms": round(sorted(uncached)[max(0, int(len(uncached) * 0.95) - 1)], 2) if uncached else None,
+                "cached_ms": round(cached_ms, 2) if cached_ms is not None else None,
+                "requests_per_call": round((sum(server.requests.values()) - requests_before) / calls, 2) if server else None,
+                "result_kb": round(len(json.dumps(result, default=str)) / 1024, 1),
+                "error": error,
+            }
+            rows.append(row)
+            print(
+                f"{label:<30} {row['cold_ms']:>9.1f} {_fmt(row['p50_ms'])} {_fmt(row['p95_ms'])} "
+                f"{_fmt(row['cached_ms'])} {_fmt(row['requests_per_call'], 6)} {row['result_kb']:>8.1f}"
+                + (f"  ERROR: {error[:80]}" if error else "")
+            )
+    finally:
+        if server:
+            server.stop()
+    return rows
+
+
+def _fmt(value, width: int = 9) -> str:
+    return f"{'-':>{width}}" if value is None else f"{value:>{width}.1f}"
+
+
+def compare(current: List[Dict], previous_path: str) -> None:
+    with open(previous_path) as f:
+        previous = {(r["scale"], r["case"]): r for r in json.load(f)["results"]}
+    print(f"\nChange in uncached p50 vs {previous_path}:")
+    for row in current:
+        before = previous.get((row["scale"], row["case"]))
+        if not before or not before.get("p50_ms") or row["p50_ms"] is None:
+            continue
+        change = (row["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100
+        print(f"{row['scale']:>8} {row['case']:<30} {before['p50_ms']:>9.1f} -> {row['p50_ms']:>9.1f}  {change:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5, help="Uncached repeats per case")
+    parser.add_argument("--only", nargs="+", help="Run only these cases")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="Skip repeats when the cold call is slower")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="Added latency per fake PostgREST request")
+    parser.add_argument("--url", help="Use an existing PostgREST/Supabase URL instead of the fake (one scale)")
+    parser.add_argument("--out", help="Results file (default benchmarks/results/database-<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    cases = [c for c in CASES if not args.only or c[0] in args.only]
+    print(f"{'case':<30} {'cold ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'cached':>9} {'reqs':>6} {'KB':>8}")
+    results = []
+    for scale in (args.scales[:1] if args.url else args.scales):
+        results.extend(bench_scale(scale, cases, args.repeat, args.max_seconds, args.url, args.db_latency_ms))
+
+    out = args.out or os.path.join(RESULTS_DIR, f"database-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"settings": vars(args), "results": results}, f, indent=2)
+    print(f"\nWrote {out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Offline end-to-end benchmark of the agent entrypoint.
+
+Starts a fake PostgREST server with seeded data and a scripted streaming LLM,
+points the agent at both through its environment variables, then drives the
+`main()` generator for each scenario at the requested concurrency levels and
+reports time to first chunk, total latency percentiles and throughput.
+
+Run with: python benchmarks/bench_e2e.py [--concurrency 1 8 32] [--requests 64]
+          [--ttft-ms 300] [--tokens-per-sec 60] [--db-latency-ms 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import point_agent_at
+from benchmarks.fakes.llm import FakeLLM
+from benchmarks.fakes.postgrest import FakePostgREST
+from benchmarks.fakes.seed import generate
+
+# Each scenario is one user question plus how the scripted model handles it
+SCENARIOS = {
+    "greeting": {
+        "query": "Hi, what can you help me with?",
+        "answer": "I can look up bookings, routes, customers, vehicles and services for you.",
+    },
+    "customer_contact": {
+        "query": "Contact info for Perkins?",
+        "tool": "search_customers",
+        "arguments": {"query": "Perkins"},
+        "answer": "Perkins can be reached at perkins@mail.com or 888-222-3333.",
+    },
+    "booking_counts": {
+        "query": "How many pending bookings are there?",
+        "tool": "get_booking_counts_by_status",
+        "arguments": {},
+        "answer": "There are several pending bookings right now, along with confirmed and scheduled ones.",
+    },
+    "available_vehicles": {
+        "query": "Show available vehicles",
+        "tool": "list_vehicles",
+        "arguments": {"status": "available"},
+        "answer": "Here are the vehicles that are currently available for dispatch.",
+    },
+    "busy_week": {
+        "query": "How busy is next week?",
+        "tool": "get_bookings_summary",
+        "arguments": {"start_date": "today"},
+        "answer": "Next week has a steady load, with the busiest day midweek.",
+    },
+    "customer_overview": {
+        "query": "Tell me about Perkins",
+        "tool": "get_customer_overview",
+        "arguments": {"customer_query": "Perkins"},
+        "answer": "Perkins is an active customer in Houston with upcoming bookings.",
+    },
+}
+
+
+def llm_rules(scenarios: Dict[str, Dict]) -> List[Dict]:
+    return [
+        {"match": f"^{re.escape(s['query'])}$", **{k: s[k] for k in ("tool", "arguments", "answer") if k in s}}
+        for s in scenarios.values()
+    ]
+
+
+async def run_one(agent, query: str) -> Dict:
+    body = {"messages": [{"role": "user", "content": query}]}
+    start = time.perf_counter()
+    first = None
+    text = []
+    try:
+        async for chunk in agent(body, {}):
+            if first is None:
+                first = time.perf_counter()
+            text.append(chunk)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    end = time.perf_counter()
+    return {
+        "ttft_ms": ((first or end) - start) * 1000,
+        "total_ms": (end - start) * 1000,
+        "error": error,
+        "response": "".join(text),
+    }
+
+
+async def run_scenario(agent, query: str, concurrency: int, requests: int) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            return await run_one(agent, query)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(limited() for _ in range(requests)))
+    wall = time.perf_counter() - start
+    ok = [r for r in results if not r["error"]]
+    ttft = np.array([r["ttft_ms"] for r in ok]) if ok else np.array([np.nan])
+    total = np.array([r["total_ms"] for r in ok]) if ok else np.array([np.nan])
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": len(results) - len(ok),
+        "first_error": next((r["error"] for r in results if r["error"]), None),
+        "sample_response": ok[0]["response"][:120] if ok else None,
+        "ttft_p50_ms": float(np.percentile(ttft, 50)),
+        "ttft_p95_ms": float(np.percentile(ttft, 95)),
+        "total_p50_ms": float(np.percentile(total, 50)),
+        "total_p95_ms": float(np.percentile(total, 95)),
+        "total_p99_ms": float(np.percentile(total, 99)),
+        "throughput_rps": requests / wall if wall else 0.0,
+    }
+
+
+async def run(args) -> List[Dict]:
+    import main as agent_module
+
+    agent = agent_module.main
+    rows = []
+    for name in args.scenarios:
+        query = SCENARIOS[name]["query"]
+        if args.warmup:
+            await run_one(agent, query)
+        for concurrency in args.concurrency:
+            result = await run_scenario(agent, query, concurrency, max(args.requests, concurrency))
+            rows.append({"scenario": name, **result})
+            print(
+                f"{name:<20} {concurrency:>5} {result['requests']:>6} {result['errors']:>4} "
+                f"{result['ttft_p50_ms']:>9.1f} {result['ttft_p95_ms']:>9.1f} "
+                f"{result['total_p50_ms']:>9.1f} {result['total_p95_ms']:>9.1f} {result['total_p99_ms']:>9.1f} "
+                f"{result['throughput_rps']:>8.1f}"
+            )
+            if result["first_error"]:
+                print(f"  first error: {result['first_error']}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=32, help="Requests per scenario and concurrency level")
+    parser.add_argument("--rows", type=int, default=3000, help="Approximate total rows in the seeded dataset")
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Fake model time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=60.0, help="Fake model streaming rate")
+    parser.add_argument("--db-latency-ms", type=float, default=20.0, help="Added latency per PostgREST request")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    print(f"Seeding about {args.rows} rows...")
+    tables = generate(rows=args.rows)
+    with FakePostgREST(tables, latency_ms=args.db_latency_ms) as db, \
+            FakeLLM(llm_rules(SCENARIOS), ttft_ms=args.ttft_ms, tokens_per_sec=args.tokens_per_sec) as llm:
+        point_agent_at(db.url, llm.url)
+        print(f"{'scenario':<20} {'conc':>5} {'reqs':>6} {'err':>4} "
+              f"{'ttft p50':>9} {'ttft p95':>9} {'tot p50':>9} {'tot p95':>9} {'tot p99':>9} {'req/s':>8}")
+        rows = asyncio.run(run(args))
+        print(f"\nPostgREST requests: {dict(db.requests)}")
+        print(f"LLM requests: {dict(llm.requests)}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": vars(args), "results": rows}, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
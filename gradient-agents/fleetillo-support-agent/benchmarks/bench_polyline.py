@@ -0,0 +1,83 @@
+"""
+Route geometry micro-benchmark.
+
+Compares the vectorized polyline decoder against a straightforward pure-Python
+decoder and times position projection, on synthetic routes with thousands of points.
+
+Run with: python benchmarks/bench_polyline.py [--points 1000 5000 20000] [--repeat 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.polyline import RoutePath, decode_polyline, encode_polyline
+
+
+def decode_polyline_python(encoded: str, precision: int = 5):
+    """Reference decoder: one Python loop iteration per character."""
+    coords, index, lat, lng = [], 0, 0, 0
+    factor = 10 ** precision
+    while index < len(encoded):
+        for axis in range(2):
+            shift, result = 0, 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1F) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            delta = ~(result >> 1) if result & 1 else result >> 1
+            if axis == 0:
+                lat += delta
+            else:
+                lng += delta
+        coords.append((lat / factor, lng / factor))
+    return coords
+
+
+def synthetic_route(n_points: int, seed: int = 0) -> np.ndarray:
+    """A random walk of ~50-100 m steps, roughly like a street-level route."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.0006, size=(n_points, 2))
+    return np.cumsum(steps, axis=0) + np.array([30.27, -97.74])
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'points':>8} {'chars':>8} {'numpy ms':>10} {'python ms':>10} {'speedup':>8} {'project ms':>11}")
+    for n in args.points:
+        points = synthetic_route(n)
+        encoded = encode_polyline(points)
+        assert np.allclose(decode_polyline(encoded), decode_polyline_python(encoded))
+
+        numpy_ms = best_of(lambda: decode_polyline(encoded), args.repeat)
+        python_ms = best_of(lambda: decode_polyline_python(encoded), max(1, args.repeat // 5))
+        path = RoutePath(decode_polyline(encoded))
+        probe = points[n // 2] + 0.0005
+        project_ms = best_of(lambda: path.project(probe[0], probe[1]), args.repeat)
+        print(f"{n:>8} {len(encoded):>8} {numpy_ms:>10.3f} {python_ms:>10.3f} "
+              f"{python_ms / numpy_ms:>7.1f}x {project_ms:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""Local stand-ins for Supabase/PostgREST and the Gradient inference endpoint."""
+
+import os
+from typing import Optional
+
+import jwt
+
+_SECRET = "offline-benchmark-secret-0123456789abcdef"
+
+
+def point_agent_at(db_url: str, llm_url: Optional[str] = None) -> None:
+    """Point DatabaseTool (and optionally the Gradient client) at local stand-ins via the environment."""
+    os.environ.update({
+        "SUPABASE_URL": db_url,
+        "SUPABASE_ANON_KEY": jwt.encode({"role": "anon"}, _SECRET, algorithm="HS256"),
+        "SUPABASE_JWT_SECRET": _SECRET,
+        "SUPABASE_SCHEMA": "fleetillo",
+    })
+    if llm_url:
+        os.environ.update({
+            "GRADIENT_INFERENCE_ENDPOINT": llm_url,
+            "GRADIENT_MODEL_ACCESS_KEY": "offline-benchmark",
+        })
@@ -0,0 +1,141 @@
+"""
+A scripted, OpenAI-compatible streaming chat completions server for offline benchmarks.
+
+Point the Gradient SDK at it with GRADIENT_INFERENCE_ENDPOINT. Each request is
+matched against a list of rules on the latest user message:
+
+    {"match": r"contact|phone", "tool": "search_customers",
+     "arguments": {"query": "Perkins"}, "answer": "Perkins: perkins@mail.com"}
+
+When tools are offered and the conversation has no tool result yet, a matching
+rule with a `tool` streams that tool call; otherwise its `answer` is streamed as
+content. Time to first token and token rate are configurable so the agent's own
+overhead can be separated from model latency.
+"""
+
+import json
+import re
+import socket
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+DEFAULT_ANSWER = "I can help with bookings, routes, customers, vehicles and services."
+
+
+class FakeLLM:
+    """Threaded HTTP server implementing streamed `/v1/chat/completions`; use as a context manager."""
+
+    def __init__(
+        self,
+        rules: List[Dict],
+        ttft_ms: float = 300.0,
+        tokens_per_sec: float = 60.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.rules = [dict(rule, pattern=re.compile(rule["match"], re.IGNORECASE)) for rule in rules]
+        self.ttft_ms = ttft_ms
+        self.tokens_per_sec = tokens_per_sec
+        self.requests: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeLLM":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeLLM":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _count(self, kind: str) -> None:
+        with self._lock:
+            self.requests[kind] += 1
+
+    def plan(self, body: Dict) -> Dict:
+        """Decide what to stream for a request: {"tool": ..., "arguments": ...} or {"answer": ...}."""
+        messages = body.get("messages") or []
+        user_text = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        rule = next((r for r in self.rules if r["pattern"].search(user_text)), None)
+        answered_tool = bool(messages) and messages[-1].get("role") == "tool"
+        if rule and rule.get("tool") and body.get("tools") and not answered_tool:
+            return {"tool": rule["tool"], "arguments": rule.get("arguments") or {}}
+        return {"answer": (rule or {}).get("answer") or DEFAULT_ANSWER}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body are separate writes; don't let Nagle hold the second one
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                plan = server.plan(body)
+                server._count("tool_call" if "tool" in plan else "answer")
+                model = body.get("model", "fake")
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                time.sleep(server.ttft_ms / 1000.0)
+
+                if "tool" in plan:
+                    arguments = json.dumps(plan["arguments"])
+                    half = len(arguments) // 2
+                    self._event(model, {"role": "assistant", "tool_calls": [{
+                        "index": 0, "id": f"call_{plan['tool']}", "type": "function",
+                        "function": {"name": plan["tool"], "arguments": arguments[:half]},
+                    }]})
+                    self._event(model, {"tool_calls": [{"index": 0, "function": {"arguments": arguments[half:]}}]})
+                    finish = "tool_calls"
+                else:
+                    delay = 1.0 / server.tokens_per_sec if server.tokens_per_sec > 0 else 0.0
+                    for i, token in enumerate(re.findall(r"\S+\s*", plan["answer"])):
+                        if i and delay:
+                            time.sleep(delay)
+                        self._event(model, {"role": "assistant", "content": token} if i == 0 else {"content": token})
+                    finish = "stop"
+                self._event(model, {}, finish)
+                self._write(b"data: [DONE]\n\n")
+                self._write(b"")
+
+            def _event(self, model: str, delta: Dict, finish: Optional[str] = None) -> None:
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                }
+                self._write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+            def _write(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
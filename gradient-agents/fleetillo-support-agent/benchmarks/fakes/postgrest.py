@@ -0,0 +1,407 @@
+"""
+A small in-process PostgREST stand-in for offline benchmarks.
+
+Serves `/rest/v1/<table>` from in-memory rows with the subset of PostgREST that
+the agent's DatabaseTool uses: column projection, embedded resources (including
+`!inner` and filters/order/limit on embeds), the usual filter operators, `or=`,
+`order`, `limit`/`offset`, `Prefer: count=exact`, HEAD requests and `count()`
+aggregates. Embeds are resolved by naming convention: a `<singular>_id` column on
+the parent means many-to-one, one on the child means one-to-many.
+
+Not a full implementation: it exists so latency of the agent can be measured
+without a network round trip to Supabase.
+"""
+
+import json
+import re
+import socket
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+Row = Dict[str, object]
+Predicate = Callable[[Row], bool]
+
+_OPERATORS = {"eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "in", "is", "cs", "ov",
+              "fts", "plfts", "phfts", "wfts"}
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "or", "and", "on_conflict", "columns"}
+
+
+class PostgrestError(Exception):
+    def __init__(self, message: str, code: str = "PGRST100", status: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
+def split_top(text: str, sep: str = ",") -> List[str]:
+    """Split on `sep` outside parentheses and double quotes."""
+    parts, depth, quoted, escaped, current = [], 0, False, False, []
+    for char in text:
+        if escaped:
+            escaped = False
+        elif quoted and char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == sep and depth == 0 and not quoted:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    if current or parts:
+        parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+def singular(table: str) -> str:
+    return table[:-1] if table.endswith("s") else table
+
+
+# -- filters -----------------------------------------------------------------
+
+def _like(pattern: str, flags: int = 0) -> "re.Pattern":
+    escaped = re.escape(pattern).replace("%", ".*").replace(r"\*", ".*").replace("_", ".")
+    return re.compile(f"^{escaped}$", flags | re.DOTALL)
+
+
+def _coerce(sample, value: str):
+    if isinstance(sample, bool):
+        return value.lower() == "true"
+    if isinstance(sample, (int, float)):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def compile_condition(column: str, expression: str) -> Predicate:
+    """Build a predicate for `column=<[not.]op.value>`."""
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, value = expression.partition(".")
+    config = None
+    match = re.match(r"^(\w+)\((\w+)\)$", op)
+    if match:
+        op, config = match.groups()
+    if op not in _OPERATORS:
+        raise PostgrestError(f'"failed to parse filter ({op}.{value})"', code="PGRST100")
+
+    if op in ("like", "ilike"):
+        pattern = _like(_unquote(value), re.IGNORECASE if op == "ilike" else 0)
+        test = lambda v: v is not None and bool(pattern.match(str(v)))
+    elif op == "in":
+        options = [_unquote(v) for v in split_top(value.strip("()"))]
+        test = lambda v: v is not None and (str(v).lower() if isinstance(v, bool) else str(v)) in options
+    elif op == "is":
+        wanted = {"null": None, "true": True, "false": False}.get(value.lower(), value)
+        test = lambda v: v is wanted if wanted is None or isinstance(wanted, bool) else v == wanted
+    elif op in ("cs", "ov"):
+        items = {_unquote(v) for v in split_top(value.strip("{}"))}
+        if op == "cs":
+            test = lambda v: v is not None and items <= {str(x) for x in v}
+        else:
+            test = lambda v: v is not None and bool(items & {str(x) for x in v})
+    elif op in ("fts", "plfts", "phfts", "wfts"):
+        terms = [t for t in re.findall(r"\w+", value.lower()) if t not in ("and", "or")]
+        test = lambda v: v is not None and all(t in set(re.findall(r"\w+", str(v).lower())) for t in terms)
+    else:
+        def test(v, op=op):
+            if v is None:
+                return False
+            target = _coerce(v, _unquote(value))
+            try:
+                if op == "eq":
+                    return v == target or str(v) == str(target)
+                if op == "neq":
+                    return not (v == target or str(v) == str(target))
+                return {"gt": v > target, "gte": v >= target, "lt": v < target, "lte": v <= target}[op]
+            except TypeError:
+                return False
+
+    if negate:
+        return lambda row: not test(row.get(column))
+    return lambda row: test(row.get(column))
+
+
+def compile_logic(expression: str, conjunction: bool) -> Predicate:
+    """Build a predicate for `or=(a.eq.1,and(b.gt.2,c.lt.3))`."""
+    parts = []
+    for item in split_top(expression.strip()[1:-1] if expression.startswith("(") else expression):
+        negate = item.startswith("not.")
+        body = item[4:] if negate else item
+        if body.startswith(("or(", "and(")):
+            name, _, rest = body.partition("(")
+            predicate = compile_logic("(" + rest, conjunction=name == "and")
+        else:
+            column, _, condition = body.partition(".")
+            predicate = compile_condition(column, condition)
+        parts.append((lambda p: lambda row: not p(row))(predicate) if negate else predicate)
+    if conjunction:
+        return lambda row: all(p(row) for p in parts)
+    return lambda row: any(p(row) for p in parts)
+
+
+def order_key(spec: str) -> List[Tuple[str, bool, bool]]:
+    """'a.desc.nullslast,b' -> [(column, descending, nulls_first)]."""
+    keys = []
+    for part in split_top(spec):
+        bits = part.split(".")
+        descending = "desc" in bits[1:]
+        nulls_first = "nullsfirst" in bits[1:] or (descending and "nullslast" not in bits[1:])
+        keys.append((bits[0], descending, nulls_first))
+    return keys
+
+
+def apply_order(rows: List[Row], keys: List[Tuple[str, bool, bool]]) -> List[Row]:
+    for column, descending, nulls_first in reversed(keys):
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: r[column], reverse=descending)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+# -- select ------------------------------------------------------------------
+
+class SelectItem:
+    def __init__(self, text: str):
+        self.text = text
+        self.children: Optional[List["SelectItem"]] = None
+        self.inner = False
+        self.aggregate = text.replace(" ", "") == "count()"
+        body = text
+        if "(" in text and not self.aggregate:
+            head, _, rest = text.partition("(")
+            self.children = parse_select(rest[:-1])
+            body = head
+        alias, _, name = body.rpartition(":")
+        name = name.split("::")[0].strip()
+        if "!" in name:
+            name, hint = name.split("!", 1)
+            self.inner = hint == "inner"
+        self.name = name.strip()
+        self.alias = (alias or self.name).strip()
+
+
+def parse_select(text: str) -> List[SelectItem]:
+    return [SelectItem(part) for part in split_top(text or "*")]
+
+
+class Database:
+    """In-memory tables plus the query evaluation used by the HTTP handler."""
+
+    def __init__(self, tables: Dict[str, List[Row]]):
+        self.tables = tables
+        self._by_id = {name: {row.get("id"): row for row in rows} for name, rows in tables.items()}
+        self._children: Dict[Tuple[str, str], Dict[object, List[Row]]] = {}
+        self._lock = threading.Lock()
+
+    def _child_index(self, table: str, column: str) -> Dict[object, List[Row]]:
+        key = (table, column)
+        with self._lock:
+            index = self._children.get(key)
+            if index is None:
+                index = defaultdict(list)
+                for row in self.tables.get(table, []):
+                    index[row.get(column)].append(row)
+                self._children[key] = index
+        return index
+
+    def _related(self, parent_table: str, row: Row, embed: str):
+        if embed not in self.tables:
+            raise PostgrestError(
+                f"Could not find a relationship between '{parent_table}' and '{embed}' in the schema cache",
+                code="PGRST200",
+            )
+        fk = f"{singular(embed)}_id"
+        if fk in row:
+            return self._by_id[embed].get(row.get(fk))
+        return list(self._child_index(embed, f"{singular(parent_table)}_id").get(row.get("id"), []))
+
+    def query(self, table: str, params: List[Tuple[str, str]]) -> Tuple[List[Row], int]:
+        if table not in self.tables:
+            raise PostgrestError(f'relation "{table}" does not exist', code="42P01", status=404)
+        select = parse_select(dict(params).get("select", "*"))
+        filters: List[Predicate] = []
+        embedded: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        order, limit, offset = None, None, 0
+        for key, value in params:
+            if key == "select":
+                continue
+            elif key == "order":
+                order = order_key(value)
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            elif key in ("or", "and"):
+                filters.append(compile_logic(value, conjunction=key == "and"))
+            elif "." in key:
+                # Filters and order/limit/offset on an embedded resource, e.g. bookings.status
+                path, _, column = key.rpartition(".")
+                embedded[path].append((column, value))
+            else:
+                filters.append(compile_condition(key, value))
+
+        rows = [row for row in self.tables[table] if all(f(row) for f in filters)]
+        if order:
+            rows = apply_order(rows, order)
+
+        needs_all = any(item.inner for item in select if item.children is not None)
+        if not needs_all:
+            total = len(rows)
+            rows = rows[offset:offset + limit if limit is not None else None]
+        rows = [self._project(table, row, select, embedded, "") for row in rows]
+        if needs_all:
+            rows = [row for row in rows if row is not None]
+            total = len(rows)
+            rows = rows[offset:offset + limit if limit is not None else None]
+
+        if any(item.aggregate for item in select):
+            rows = self._aggregate(rows, select)
+            total = len(rows)
+        return rows, total
+
+    def _project(self, table: str, row: Row, select: List[SelectItem], embedded, prefix: str) -> Optional[Row]:
+        out: Row = {}
+        for item in select:
+            if item.aggregate:
+                continue
+            if item.name == "*":
+                out.update({k: v for k, v in row.items()})
+                continue
+            if item.children is None:
+                if item.name not in row:
+                    raise PostgrestError(f"column {table}.{item.name} does not exist", code="42703")
+                out[item.alias] = row[item.name]
+                continue
+
+            path = f"{prefix}{item.alias}"
+            related = self._related(table, row, item.name)
+            settings = embedded.get(path) or embedded.get(prefix + item.name, [])
+            predicates = [compile_condition(col, val) for col, val in settings if col not in _RESERVED_PARAMS]
+            controls = {col: val for col, val in settings if col in _RESERVED_PARAMS}
+            if isinstance(related, list):
+                children = [r for r in related if all(p(r) for p in predicates)]
+                if "order" in controls:
+                    children = apply_order(children, order_key(controls["order"]))
+                start = int(controls.get("offset", 0))
+                if "limit" in controls:
+                    children = children[start:start + int(controls["limit"])]
+                projected = [self._project(item.name, r, item.children, embedded, path + ".") for r in children]
+                projected = [p for p in projected if p is not None]
+                if item.inner and not projected:
+                    return None
+                out[item.alias] = projected
+            else:
+                child = related if related is not None and all(p(related) for p in predicates) else None
+                projected = None if child is None else self._project(item.name, child, item.children, embedded, path + ".")
+                if item.inner and projected is None:
+                    return None
+                out[item.alias] = projected
+        return out
+
+    @staticmethod
+    def _aggregate(rows: List[Row], select: List[SelectItem]) -> List[Row]:
+        groups: Dict[tuple, int] = {}
+        keys = [item.alias for item in select if not item.aggregate]
+        for row in rows:
+            group = tuple(row.get(k) for k in keys)
+            groups[group] = groups.get(group, 0) + 1
+        return [{**dict(zip(keys, group)), "count": n} for group, n in groups.items()]
+
+
+class FakePostgREST:
+    """
+    Threaded HTTP server for a `Database`; use as a context manager.
+
+    `latency_ms` adds a fixed delay per request to model the network hop to Supabase.
+    """
+
+    def __init__(self, tables: Dict[str, List[Row]], latency_ms: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.db = Database(tables)
+        self.latency_ms = latency_ms
+        self.requests: Dict[str, int] = defaultdict(int)
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakePostgREST":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakePostgREST":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body are separate writes; don't let Nagle hold the second one
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._respond(head=False)
+
+            def do_HEAD(self):
+                self._respond(head=True)
+
+            def _respond(self, head: bool):
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000.0)
+                parts = urlsplit(self.path)
+                table = parts.path.rsplit("/", 1)[-1]
+                server.requests[table] += 1
+                try:
+                    rows, total = server.db.query(table, parse_qsl(parts.query, keep_blank_values=True))
+                    status, payload = 200, rows
+                except PostgrestError as e:
+                    status, payload = e.status, {"code": e.code, "message": str(e), "details": None, "hint": None}
+                body = b"" if head else json.dumps(payload, default=str).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 200:
+                    count = str(total) if "count=exact" in (self.headers.get("Prefer") or "") else "*"
+                    span = f"0-{len(rows) - 1}" if rows else "*"
+                    self.send_header("Content-Range", f"{span}/{count}")
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
@@ -0,0 +1,277 @@
+"""
+Deterministic synthetic data for the offline benchmarks.
+
+Rows follow the fleetillo schema closely enough for every DatabaseTool query:
+foreign keys are `<table>_id` columns so the fake PostgREST server can resolve
+embedded resources. `generate(rows=N)` scales from ~100 to ~1M rows in total,
+with skewed distributions rather than uniform noise:
+
+- client activity is heavy-tailed (a few customers own most bookings),
+- locations and vehicles cluster around a handful of service hubs,
+- bookings favour weekdays and morning/early-afternoon starts,
+- status depends on the date (past work is mostly completed or cancelled),
+- a small share of customers have recurring series,
+- some vehicles have stale or missing GPS positions.
+
+The same seed and size always produce the same rows. Run as a script to write
+one CSV per table for loading into a real Postgres/PostgREST (`\\copy ... csv header`):
+
+    python benchmarks/fakes/seed.py --rows 100000 --out /tmp/fleetillo-seed
+"""
+
+import argparse
+import bisect
+import csv
+import itertools
+import json
+import os
+import random
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List
+
+# Service hubs (Houston area): (latitude, longitude, spread in degrees)
+HUBS = [(29.76, -95.37, 0.08), (29.95, -95.55, 0.06), (29.65, -95.20, 0.05), (30.10, -95.42, 0.07), (29.55, -95.60, 0.05)]
+
+SERVICE_TYPES = ["maintenance", "repair", "inspection", "installation", "consultation"]
+PRIORITIES = ["low", "normal", "high", "urgent"]
+PRIORITY_WEIGHTS = [15, 65, 15, 5]
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 0.9, 0.35, 0.08]
+RECURRENCE_PATTERNS = ["weekly", "biweekly", "monthly", "quarterly"]
+NOTES = [
+    "Gate code 4411, call on arrival",
+    "Dog in backyard",
+    "Use side entrance",
+    "Customer requests morning visit",
+    "Bring ladder for roof access",
+    "Parking behind the building",
+]
+
+# Bookings are generated in a window of +-WINDOW_DAYS around today
+WINDOW_DAYS = 60
+
+
+def table_sizes(rows: int) -> Dict[str, int]:
+    """Split a total row budget across tables in roughly production proportions."""
+    rows = max(rows, 100)
+    return {
+        "clients": max(5, rows // 25),
+        "vehicles": max(3, rows // 400),
+        "bookings": max(50, int(rows * 0.72)),
+    }
+
+
+def generate(rows: int = 2000, seed: int = 7, today: date = None) -> Dict[str, List[Dict]]:
+    """Generate a consistent dataset of about `rows` rows across all tables."""
+    rng = random.Random(seed)
+    today = today or date.today()
+    now = datetime.now(timezone.utc)
+    stamp = now.isoformat()
+    sizes = table_sizes(rows)
+
+    def new_id() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def near_hub(hub: int):
+        lat, lon, spread = HUBS[hub]
+        return round(rng.gauss(lat, spread), 6), round(rng.gauss(lon, spread), 6)
+
+    # -- clients and their locations -------------------------------------------
+    clients, locations, primary_location = [], [], {}
+    for i in range(sizes["clients"]):
+        if i == 0:
+            name, email, phone = "Perkins", "perkins@mail.com", "888-222-3333"
+        else:
+            name, email, phone = f"Client {i:06d}", f"client{i}@example.com", f"555-{i % 10000:04d}"
+        client = {
+            "id": new_id(), "name": name, "company_name": f"{name} LLC", "email": email, "phone": phone,
+            "status": "active" if i == 0 or rng.random() < 0.88 else rng.choice(["inactive", "suspended"]),
+            "city": "Houston", "state": "TX", "notes": None,
+            "created_at": stamp, "updated_at": stamp, "deleted_at": None,
+        }
+        clients.append(client)
+        hub = rng.randrange(len(HUBS))
+        for j in range(1 + (rng.random() < 0.25) + (rng.random() < 0.05)):
+            lat, lon = near_hub(hub)
+            located = j > 0 or rng.random() > 0.02
+            location = {
+                "id": new_id(), "client_id": client["id"], "name": f"{name} Site {j + 1}",
+                "address_line1": f"{rng.randint(100, 9999)} {rng.choice(['Main', 'Oak', 'Elm', 'Park'])} St",
+                "city": "Houston", "state": "TX", "location_type": "client", "is_primary": j == 0,
+                "latitude": lat if located else None, "longitude": lon if located else None,
+                "deleted_at": None,
+            }
+            locations.append(location)
+            primary_location.setdefault(client["id"], (location, hub))
+
+    # Heavy-tailed client activity: Pareto weights, sampled by bisection on the cumulative sum
+    weights = [rng.paretovariate(1.2) for _ in clients]
+    weights[0] = max(weights) / 2  # Perkins is a busy, well-known customer
+    cumulative = list(itertools.accumulate(weights))
+
+    def pick_client() -> Dict:
+        return clients[bisect.bisect_left(cumulative, rng.random() * cumulative[-1])]
+
+    # -- services and vehicles ---------------------------------------------------
+    services = []
+    for i, service_type in enumerate(SERVICE_TYPES):
+        average = [60, 90, 45, 120, 30][i]
+        services.append({
+            "id": new_id(), "name": f"Standard {service_type.title()}", "code": f"{service_type[:3].upper()}-{i + 1:02d}",
+            "service_type": service_type, "description": f"Routine {service_type} visit",
+            "average_duration_minutes": average, "minimum_duration_minutes": average // 2,
+            "maximum_duration_minutes": average * 2, "base_price": [129.0, 189.0, 99.0, 349.0, 79.0][i],
+            "price_currency": "USD", "requires_appointment": True, "equipment_required": [],
+            "skills_required": [], "status": "active", "updated_at": stamp, "deleted_at": None,
+        })
+    service_weights = [30, 25, 25, 10, 10]
+
+    vehicles, hub_vehicles = [], {hub: [] for hub in range(len(HUBS))}
+    for i in range(sizes["vehicles"]):
+        hub = i % len(HUBS)
+        lat, lon = near_hub(hub)
+        located = rng.random() > 0.05
+        vehicle = {
+            "id": new_id(), "name": f"Unit {101 + i}", "license_plate": f"TX-{1000 + i}",
+            "status": rng.choices(["available", "in_use", "maintenance", "out_of_service"], [50, 40, 7, 3])[0],
+            "service_types": rng.sample(SERVICE_TYPES, rng.randint(2, 4)),
+            "current_latitude": lat if located else None,
+            "current_longitude": lon if located else None,
+            "last_location_update": (now - timedelta(minutes=rng.expovariate(1 / 20))).isoformat() if located else None,
+            "next_maintenance_date": (today + timedelta(days=rng.randint(-15, 90))).isoformat() if rng.random() > 0.1 else None,
+            "last_maintenance_date": (today - timedelta(days=rng.randint(30, 240))).isoformat(),
+            "odometer_reading": rng.randint(10000, 180000), "updated_at": stamp, "deleted_at": None,
+        }
+        vehicles.append(vehicle)
+        hub_vehicles[hub].append(vehicle)
+
+    # -- bookings and the routes they land on ------------------------------------
+    days = [today + timedelta(days=offset) for offset in range(-WINDOW_DAYS, WINDOW_DAYS + 1)]
+    day_weights = list(itertools.accumulate(WEEKDAY_WEIGHTS[d.weekday()] for d in days))
+
+    routes, route_by_key, bookings, per_day = [], {}, [], {}
+
+    def route_for(vehicle: Dict, day: date) -> Dict:
+        route = route_by_key.get((vehicle["id"], day))
+        if route is None:
+            route = {
+                "id": new_id(), "route_name": f"{vehicle['name']} {day.isoformat()}",
+                "route_code": f"R-{day.strftime('%Y%m%d')}-{vehicle['name'][5:]}", "vehicle_id": vehicle["id"],
+                "route_date": day.isoformat(),
+                "status": "completed" if day < today else ("in_progress" if day == today else "planned"),
+                "planned_start_time": "08:00:00", "planned_end_time": "17:00:00",
+                "total_stops": 0, "total_distance_km": 0.0, "total_duration_minutes": 0,
+                "actual_start_time": None, "actual_end_time": None, "stop_sequence": [],
+                "route_geometry": None, "updated_at": stamp, "deleted_at": None,
+            }
+            route_by_key[(vehicle["id"], day)] = route
+            routes.append(route)
+        return route
+
+    def add_booking(client: Dict, day: date, **overrides) -> None:
+        location, hub = primary_location[client["id"]]
+        service = rng.choices(services, service_weights)[0]
+        # Morning and early-afternoon peaks, 07:00-17:45 in 15 minute slots
+        minutes = int(rng.choice([rng.gauss(9.5, 1.2), rng.gauss(13.5, 1.5)]) * 60)
+        minutes = min(max(minutes, 7 * 60), 17 * 60 + 45) // 15 * 15
+        duration = max(15, int(rng.gauss(service["average_duration_minutes"], service["average_duration_minutes"] / 5)))
+        end_minutes = min(minutes + duration, 23 * 60 + 59)
+        if day < today:
+            status = rng.choices(["completed", "cancelled", "no_show", "rescheduled"], [85, 8, 4, 3])[0]
+        elif day == today:
+            status = rng.choices(["in_progress", "scheduled", "completed"], [40, 40, 20])[0]
+        else:
+            status = rng.choices(["pending", "confirmed", "scheduled"], [30, 30, 40])[0]
+        per_day[day] = per_day.get(day, 0) + 1
+
+        booking = {
+            "id": new_id(), "booking_number": f"BK-{day.strftime('%Y%m%d')}-{per_day[day]:03d}",
+            "client_id": client["id"], "location_id": location["id"], "service_id": service["id"],
+            "route_id": None, "stop_order": None, "status": status,
+            "priority": rng.choices(PRIORITIES, PRIORITY_WEIGHTS)[0], "booking_type": "one_time",
+            "scheduled_date": day.isoformat(), "scheduled_start_time": f"{minutes // 60:02d}:{minutes % 60:02d}:00",
+            "scheduled_end_time": f"{end_minutes // 60:02d}:{end_minutes % 60:02d}:00",
+            "estimated_duration_minutes": duration,
+            "actual_duration_minutes": max(10, int(duration * rng.uniform(0.8, 1.3))) if status == "completed" else None,
+            "recurrence_pattern": None, "recurrence_end_date": None, "parent_booking_id": None,
+            "special_instructions": rng.choice(NOTES) if rng.random() < 0.25 else None,
+            "internal_notes": "Customer prefers text updates" if rng.random() < 0.05 else None,
+            "created_at": stamp, "updated_at": stamp, "deleted_at": None,
+        }
+        booking.update(overrides)
+        if booking["status"] not in ("cancelled", "rescheduled") and booking["booking_type"] == "one_time":
+            fleet = hub_vehicles[hub] or vehicles
+            route = route_for(fleet[rng.randrange(len(fleet))], day)
+            route["stop_sequence"].append(booking["id"])
+            route["total_stops"] += 1
+            route["total_duration_minutes"] += duration + int(rng.uniform(8, 25))
+            route["total_distance_km"] = round(route["total_distance_km"] + rng.uniform(2, 15), 2)
+            booking["route_id"] = route["id"]
+            booking["stop_order"] = route["total_stops"]
+        bookings.append(booking)
+
+    # ~5% of clients hold a recurring series (parent row only; occurrences are expanded on read)
+    for client in clients[: max(1, len(clients) // 20)]:
+        add_booking(
+            client, today - timedelta(days=rng.randint(0, 180)),
+            booking_type="recurring", recurrence_pattern=rng.choice(RECURRENCE_PATTERNS), status="confirmed",
+            recurrence_end_date=(today + timedelta(days=rng.randint(30, 400))).isoformat() if rng.random() < 0.5 else None,
+        )
+
+    while len(bookings) < sizes["bookings"]:
+        day = days[bisect.bisect_left(day_weights, rng.random() * day_weights[-1])]
+        add_booking(pick_client(), day)
+
+    for route in routes:
+        if route["status"] == "completed":
+            begin = datetime.combine(date.fromisoformat(route["route_date"]), time(8), tzinfo=timezone.utc)
+            begin += timedelta(minutes=rng.gauss(0, 10))
+            worked = route["total_duration_minutes"] * rng.uniform(0.9, 1.2)
+            route["actual_start_time"] = begin.isoformat()
+            route["actual_end_time"] = (begin + timedelta(minutes=worked)).isoformat()
+
+    return {
+        "clients": clients,
+        "locations": locations,
+        "services": services,
+        "vehicles": vehicles,
+        "routes": routes,
+        "bookings": bookings,
+    }
+
+
+def write_csv(tables: Dict[str, List[Dict]], out_dir: str) -> None:
+    """One CSV per table; arrays as Postgres array literals, objects as JSON."""
+    os.makedirs(out_dir, exist_ok=True)
+    for name, rows in tables.items():
+        if not rows:
+            continue
+        with open(os.path.join(out_dir, f"{name}.csv"), "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({k: _csv_value(v) for k, v in row.items()})
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        return "{" + ",".join(str(v) for v in value) + "}"
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic fleetillo tables as CSV files")
+    parser.add_argument("--rows", type=int, default=10000, help="Approximate total rows across all tables")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", required=True, help="Output directory")
+    args = parser.parse_args()
+    data = generate(rows=args.rows, seed=args.seed)
+    write_csv(data, args.out)
+    total = sum(len(rows) for rows in data.values())
+    print(f"Wrote {total} rows to {args.out}: " + ", ".join(f"{k}={len(v)}" for k, v in data.items()))
@@ -0,0 +1,96 @@
+"""
+Run the agent's HTTP server against local stand-ins for Supabase and the model.
+
+Starts the seeded fake PostgREST server and the scripted streaming LLM, points
+the agent at them, then serves `main:fastapi_app` with uvicorn exactly as the
+deployment does (POST /run, GET /health). Used as a load-test target:
+
+    python benchmarks/local_stack.py --port 8080 [--workers 4] [--ttft-ms 300]
+
+Prints "READY <run url>" once the server accepts requests and runs until
+interrupted.
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AGENT_DIR)
+
+from benchmarks.bench_e2e import SCENARIOS, llm_rules
+from benchmarks.fakes import point_agent_at
+from benchmarks.fakes.llm import FakeLLM
+from benchmarks.fakes.postgrest import FakePostgREST
+from benchmarks.fakes.seed import generate
+
+# Keyword rules covering the evaluation dataset's questions, after the exact scenario rules
+DATASET_RULES = [
+    {"match": r"mcburgers|xyz corp", "tool": "search_customers", "arguments": {"query": "mcburgers"},
+     "answer": "I couldn't find a customer by that name. Could you check the spelling?"},
+    {"match": r"perkins", "tool": "search_customers", "arguments": {"query": "Perkins"},
+     "answer": "Perkins can be reached at perkins@mail.com or by phone at 888-222-3333."},
+    {"match": r"how many vehicles", "tool": "get_vehicle_count", "arguments": {},
+     "answer": "There are several vehicles in the fleet."},
+    {"match": r"vehicles", "tool": "list_vehicles", "arguments": {"status": "available"},
+     "answer": "Here are the vehicles that are currently available."},
+    {"match": r"how many .*customers", "tool": "get_customer_count", "arguments": {},
+     "answer": "There are several active customers in the system."},
+    {"match": r"customers", "tool": "list_customers", "arguments": {"status": "active"},
+     "answer": "Here are your active customers."},
+    {"match": r"booking", "tool": "get_booking_counts_by_status", "arguments": {},
+     "answer": "Here is how your bookings break down by status."},
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--rows", type=int, default=3000, help="Approximate total rows in the seeded dataset")
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Fake model time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=60.0, help="Fake model streaming rate")
+    parser.add_argument("--db-latency-ms", type=float, default=20.0, help="Added latency per PostgREST request")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    db = FakePostgREST(generate(rows=args.rows), latency_ms=args.db_latency_ms).start()
+    llm = FakeLLM(llm_rules(SCENARIOS) + DATASET_RULES, ttft_ms=args.ttft_ms,
+                  tokens_per_sec=args.tokens_per_sec).start()
+    # Workers inherit this environment, so they reach the same stand-ins
+    point_agent_at(db.url, llm.url)
+
+    port = args.port or free_port()
+
+    def announce():
+        while True:
+            try:
+                socket.create_connection((args.host, port), timeout=0.5).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        print(f"READY http://{args.host}:{port}/run", flush=True)
+
+    threading.Thread(target=announce, daemon=True).start()
+    try:
+        uvicorn.run("main:fastapi_app", host=args.host, port=port, workers=args.workers,
+                    log_level="warning", app_dir=AGENT_DIR)
+    finally:
+        print(f"PostgREST requests: {dict(db.requests)}; LLM requests: {dict(llm.requests)}", flush=True)
+        db.stop()
+        llm.stop()
+
+
+if __name__ == "__main__":
+    main()
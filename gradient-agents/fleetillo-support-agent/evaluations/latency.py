@@ -0,0 +1,166 @@
+"""
+Latency capture, SLO budgets and regression tracking for the evaluation suites.
+
+Each evaluated request produces a sample:
+
+    {"ttft_ms": ..., "total_ms": ..., "llm_calls": ..., "tool_calls": ...}
+
+LLM and tool call counts are only known when the agent runs in-process; remote
+samples leave them as None. Budgets per category live in latency_budgets.json.
+Every run's per-category p50/p95 is appended to a JSON-lines history, and a run
+fails when its p50 or p95 is worse than the median of recent runs against the
+same target by more than the configured threshold.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from statistics import median
+from typing import Dict, List, Optional
+
+import numpy as np
+
+EVAL_DIR = os.path.dirname(os.path.abspath(__file__))
+BUDGETS_PATH = os.path.join(EVAL_DIR, "latency_budgets.json")
+HISTORY_PATH = os.environ.get("LATENCY_HISTORY_PATH", os.path.join(EVAL_DIR, "results", "latency-history.jsonl"))
+
+TIMINGS = ("ttft_ms", "total_ms")
+COUNTS = ("llm_calls", "tool_calls")
+
+
+def load_budgets(path: str = BUDGETS_PATH) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def budget_for(category: str, budgets: Dict, remote: bool = False) -> Dict:
+    """Default budget overlaid with the category's; remote targets get extra time for the network."""
+    budget = dict(budgets["default"], **budgets.get("categories", {}).get(category, {}))
+    if remote:
+        for key in TIMINGS:
+            budget[key] += budgets.get("remote_allowance_ms", 0)
+    return budget
+
+
+def check_budget(sample: Dict, budget: Dict) -> List[str]:
+    """Return a description of every budget the sample exceeds."""
+    violations = []
+    for key in TIMINGS + COUNTS:
+        value, limit = sample.get(key), budget.get(key)
+        if value is not None and limit is not None and value > limit:
+            unit = " ms" if key in TIMINGS else ""
+            violations.append(f"{key} {value:.0f}{unit} > budget {limit}{unit}")
+    return violations
+
+
+async def measure_local(agent, body: Dict, stats_var) -> Dict:
+    """Drive the in-process entrypoint once, timing chunks and reading its request counters."""
+    stats = {"llm_calls": 0, "tool_calls": 0}
+    token = stats_var.set(stats)
+    start = time.perf_counter()
+    first = None
+    text = ""
+    try:
+        async for chunk in agent(body, {}):
+            if first is None:
+                first = time.perf_counter()
+            text += chunk
+    finally:
+        stats_var.reset(token)
+    end = time.perf_counter()
+    return {
+        "response": text.strip(),
+        "ttft_ms": ((first or end) - start) * 1000,
+        "total_ms": (end - start) * 1000,
+        "llm_calls": stats["llm_calls"],
+        "tool_calls": stats["tool_calls"],
+    }
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(float(np.percentile(values, 50)), 1),
+        "p95": round(float(np.percentile(values, 95)), 1),
+    }
+
+
+def summarize(samples: Dict[str, Dict], categories: Dict[str, str]) -> Dict:
+    """p50/p95 of each timing, overall and per category, for samples keyed by case id."""
+    groups: Dict[str, List[Dict]] = {"overall": list(samples.values())}
+    for case_id, sample in samples.items():
+        groups.setdefault(categories.get(case_id, "uncategorized"), []).append(sample)
+    return {
+        group: {key: _percentiles([s[key] for s in members]) for key in TIMINGS}
+        for group, members in groups.items()
+        if members
+    }
+
+
+class RunHistory:
+    """Append-only JSON-lines record of per-run latency summaries."""
+
+    def __init__(self, path: str = HISTORY_PATH):
+        self.path = path
+
+    def runs(self, target: str) -> List[Dict]:
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        return [r for r in records if r.get("target") == target]
+
+    def append(self, target: str, summary: Dict, samples: Dict[str, Dict]) -> Dict:
+        record = {
+            "run_at": datetime.now().isoformat(timespec="seconds"),
+            "target": target,
+            "summary": summary,
+            "samples": {
+                case_id: {k: (round(s[k], 1) if isinstance(s.get(k), float) else s.get(k)) for k in TIMINGS + COUNTS}
+                for case_id, s in samples.items()
+            },
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        return record
+
+
+def compare(summary: Dict, previous_runs: List[Dict], settings: Dict) -> List[str]:
+    """
+    Regressions of this run's p50/p95 against the median of the last `window` runs.
+
+    A statistic regresses when it is more than `threshold_pct` percent and more
+    than `min_delta_ms` milliseconds slower, so tiny absolute changes on fast
+    replayed runs don't trip it.
+    """
+    window = previous_runs[-settings.get("window", 5):]
+    if not window:
+        return []
+    regressions = []
+    for group, timings in summary.items():
+        for key, stats in timings.items():
+            for stat, value in stats.items():
+                history = [r["summary"][group][key][stat] for r in window
+                           if group in r["summary"] and key in r["summary"][group]]
+                if not history:
+                    continue
+                baseline = median(history)
+                if (value - baseline > settings.get("min_delta_ms", 100)
+                        and value > baseline * (1 + settings.get("threshold_pct", 25) / 100)):
+                    regressions.append(
+                        f"{group} {key} {stat}: {value:.0f} ms vs {baseline:.0f} ms baseline "
+                        f"({(value / baseline - 1) * 100 if baseline else float('inf'):+.0f}%)"
+                    )
+    return regressions
+
+
+def record_and_compare(target: str, samples: Dict[str, Dict], categories: Dict[str, str],
+                       budgets: Optional[Dict] = None, history: Optional[RunHistory] = None) -> Dict:
+    """Summarize a run, compare it with recent runs for the same target, then append it to the history."""
+    budgets = budgets or load_budgets()
+    history = history or RunHistory()
+    summary = summarize(samples, categories)
+    regressions = compare(summary, history.runs(target), budgets.get("regression", {}))
+    history.append(target, summary, samples)
+    return {"summary": summary, "regressions": regressions}
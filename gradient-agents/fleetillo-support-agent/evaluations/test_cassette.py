@@ -0,0 +1,116 @@
+"""
+Unit tests for tools/cassette.py (recording and replaying streamed completions).
+
+Run with: pytest evaluations/test_cassette.py -v
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.cassette import CassetteMiss, StreamCassette
+
+PARAMS = {"model": "llama3.3-70b-instruct", "temperature": 0.3}
+
+
+def chunk(content=None, tool_call=None, finish_reason=None):
+    tool_calls = None
+    if tool_call:
+        tool_calls = [SimpleNamespace(index=0, id=tool_call[0], type="function",
+                                      function=SimpleNamespace(name=tool_call[1], arguments=tool_call[2]))]
+    delta = SimpleNamespace(role=None, content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta, finish_reason=finish_reason)])
+
+
+def upstream_factory(chunks, calls):
+    async def create():
+        calls.append(1)
+
+        async def stream():
+            for c in chunks:
+                yield c
+        return stream()
+    return create
+
+
+def conversation(tool_result="[]", system="You are helpful."):
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": "Which trucks are out?"},
+        {"role": "assistant", "content": "", "tool_calls": [
+            {"id": "c1", "type": "function", "function": {"name": "list_vehicles", "arguments": "{}"}}
+        ]},
+        {"role": "tool", "tool_call_id": "c1", "content": tool_result},
+    ]
+
+
+def play(cassette, messages, chunks, calls):
+    async def run():
+        stream = await cassette.wrap(messages, PARAMS, upstream_factory(chunks, calls))()
+        return [c async for c in stream]
+    return asyncio.run(run())
+
+
+def text(chunks):
+    return "".join(c.choices[0].delta.content or "" for c in chunks)
+
+
+class TestStreamCassette:
+    """Record, replay and key matching"""
+
+    def test_record_then_replay_from_disk(self, tmp_path):
+        path = str(tmp_path / "llm.jsonl.gz")
+        recorded = [chunk("Two trucks "), chunk("are out."), chunk(finish_reason="stop")]
+        calls = []
+        assert text(play(StreamCassette(path, "record"), conversation(), recorded, calls)) == "Two trucks are out."
+
+        replayer = StreamCassette(path, "replay")
+        replayed = play(replayer, conversation(), [], calls)
+        assert text(replayed) == "Two trucks are out."
+        assert replayed[-1].choices[0].finish_reason == "stop"
+        assert len(calls) == 1
+        assert replayer.stats()["hits"] == 1
+
+    def test_tool_calls_survive_a_round_trip(self, tmp_path):
+        path = str(tmp_path / "llm.jsonl.gz")
+        play(StreamCassette(path, "record"), conversation(), [chunk(tool_call=("t1", "get_vehicle_count", "{}"))], [])
+        [replayed] = play(StreamCassette(path, "replay"), conversation(), [], [])
+        call = replayed.choices[0].delta.tool_calls[0]
+        assert (call.id, call.function.name, call.function.arguments) == ("t1", "get_vehicle_count", "{}")
+
+    def test_loose_key_ignores_tool_results_and_todays_date(self, tmp_path):
+        path = str(tmp_path / "llm.jsonl.gz")
+        play(StreamCassette(path, "record"), conversation(system="TODAY: Wednesday, 2026-01-14."), [chunk("ok")], [])
+        replayer = StreamCassette(path, "replay")
+        changed = conversation(tool_result='[{"name": "Unit 9"}]', system="TODAY: Friday, 2026-01-16.")
+        assert text(play(replayer, changed, [], [])) == "ok"
+        assert replayer.stats()["loose_hits"] == 1
+
+    def test_system_prompt_change_misses(self, tmp_path):
+        path = str(tmp_path / "llm.jsonl.gz")
+        play(StreamCassette(path, "record"), conversation(system="You are helpful."), [chunk("ok")], [])
+        with pytest.raises(CassetteMiss):
+            play(StreamCassette(path, "replay"), conversation(system="You are terse."), [], [])
+
+    def test_replay_miss_raises(self, tmp_path):
+        cassette = StreamCassette(str(tmp_path / "llm.jsonl.gz"), "replay")
+        messages = [{"role": "user", "content": "something new"}]
+        with pytest.raises(CassetteMiss):
+            play(cassette, messages, [chunk("unused")], [])
+
+    def test_auto_records_once_then_replays(self, tmp_path):
+        cassette = StreamCassette(str(tmp_path / "llm.jsonl.gz"), "auto")
+        calls = []
+        play(cassette, conversation(), [chunk("first")], calls)
+        assert text(play(cassette, conversation(), [chunk("second")], calls)) == "first"
+        assert len(calls) == 1
+
+    def test_unknown_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            StreamCassette(str(tmp_path / "x"), "rewind")
+        assert not StreamCassette(str(tmp_path / "x")).enabled
@@ -0,0 +1,197 @@
+"""
+DatabaseTool methods run against the seeded stand-in PostgREST server from
+benchmarks/fakes, so no Supabase project is needed.
+
+Run with: pytest evaluations/test_database_tools.py -v
+"""
+
+import functools
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import point_agent_at
+from benchmarks.fakes.postgrest import FakePostgREST, PostgrestError
+from benchmarks.fakes.seed import generate
+from tools.database import DatabaseTool, parse_period
+
+
+@pytest.fixture(scope="module")
+def fake_db():
+    saved = dict(os.environ)
+    tables = generate(rows=300)
+    # Soft-delete every fifth booking; no tool should count or return these
+    for booking in tables["bookings"][::5]:
+        booking["deleted_at"] = "2026-01-01T00:00:00+00:00"
+    with FakePostgREST(tables) as server:
+        point_agent_at(server.url)
+        yield server
+    os.environ.clear()
+    os.environ.update(saved)
+
+
+@pytest.fixture
+def db_tool(fake_db):
+    # A fresh tool per test, so the per-instance rate limit never kicks in
+    return DatabaseTool()
+
+
+def live_bookings(server, start, end):
+    return [
+        b for b in server.db.tables["bookings"]
+        if b["deleted_at"] is None and start.isoformat() <= b["scheduled_date"] <= end.isoformat()
+    ]
+
+
+class TestBookingsSummary:
+    """get_bookings_summary date windows"""
+
+    def test_period_sets_the_window(self, db_tool):
+        start, end = parse_period("next_week")
+        result = db_tool.get_bookings_summary(period="next_week")
+        assert (result["start_date"], result["end_date"]) == (start.isoformat(), end.isoformat())
+        assert all(start.isoformat() <= day <= end.isoformat() for day in result["by_day"])
+
+    def test_period_overrides_dates(self, db_tool):
+        start, end = parse_period("this_month")
+        result = db_tool.get_bookings_summary(start_date="2020-01-01", end_date="2020-01-02", period="this_month")
+        assert (result["start_date"], result["end_date"]) == (start.isoformat(), end.isoformat())
+
+    def test_default_window_is_seven_days(self, db_tool):
+        result = db_tool.get_bookings_summary()
+        assert result["start_date"] == date.today().isoformat()
+        assert result["end_date"] == (date.today() + timedelta(days=6)).isoformat()
+
+    def test_unknown_period_is_an_error(self, db_tool):
+        assert "error" in db_tool.get_bookings_summary(period="next_decade")
+
+    def test_soft_deleted_bookings_are_skipped(self, db_tool, fake_db):
+        start, end = parse_period("next_month")
+        live = live_bookings(fake_db, start, end)
+        result = db_tool.get_bookings_summary(period="next_month", sample_size=20)
+        assert result["total_bookings"] == len(live)
+        assert {b["booking_number"] for b in result["sample"]} <= {b["booking_number"] for b in live}
+
+    def test_fallback_without_aggregates_pages_every_row(self, db_tool, fake_db, monkeypatch):
+        def disabled(rows, select):
+            raise PostgrestError("Use of aggregate functions is not allowed", code="PGRST123")
+
+        monkeypatch.setattr(fake_db.db, "_aggregate", disabled)
+        start, end = parse_period("this_month")
+        rows = db_tool._booking_rollup_rows(start, end, None, None)
+        assert sum(row["count"] for row in rows) == len(live_bookings(fake_db, start, end))
+
+    def test_schedule_conflicts_accept_a_period(self, db_tool):
+        start, end = parse_period("last_week")
+        result = db_tool.find_schedule_conflicts(period="last_week")
+        assert (result["start_date"], result["end_date"]) == (start.isoformat(), end.isoformat())
+
+
+class TestBookingDensity:
+    """get_booking_density row fetching"""
+
+    def test_pages_past_the_row_cap_and_skips_soft_deleted(self, db_tool, fake_db, monkeypatch):
+        # Pages of 7 rows stand in for the server's 1000-row cap
+        monkeypatch.setattr(db_tool, "_keyset_rows", functools.partial(DatabaseTool._keyset_rows, db_tool, page_size=7))
+        start, end = parse_period("next_month")
+        result = db_tool.get_booking_density(start_date=start.isoformat(), end_date=end.isoformat(), cell_km=7.5)
+        live = live_bookings(fake_db, start, end)
+        assert len(live) > 7
+        assert result["total_bookings"] == len(live)
+        assert sum(result["bookings_by_day"].values()) == len(live)
+
+
+class TestSoftDeletedSchedules:
+    """Schedule tools ignore soft-deleted bookings"""
+
+    def deleted_numbers(self, server):
+        return {b["booking_number"] for b in server.db.tables["bookings"] if b["deleted_at"]}
+
+    def test_upcoming_schedule(self, db_tool, fake_db):
+        result = db_tool.get_upcoming_schedule(days=60, limit=100)
+        numbers = {item["booking_number"] for item in result["upcoming"]}
+        assert numbers
+        assert not numbers & self.deleted_numbers(fake_db)
+
+    def test_schedule_index(self, db_tool, fake_db):
+        index = db_tool._schedule_index(date.today(), date.today() + timedelta(days=30))
+        numbers = {b["booking_number"] for _, group in index.groups() for b in group["bookings"]}
+        assert numbers
+        assert not numbers & self.deleted_numbers(fake_db)
+
+
+class TestSearchFilters:
+    """Typed text inside or= filters stays literal"""
+
+    def test_vehicle_customer_and_route_searches(self, db_tool):
+        assert "No vehicles found" in db_tool.get_vehicle_status("Unit, (1)")[0]["message"]
+        assert "No customers found" in db_tool.search_customers('Perkins, "x"')[0]["message"]
+        assert "No route found" in db_tool.get_route_stops("route.(a),b")["message"]
+
+
+class TestCustomerOverview:
+    """get_customer_overview matching and embedded bookings"""
+
+    def test_not_found(self, db_tool):
+        result = db_tool.get_customer_overview("mcburgers")
+        assert "No customers found matching 'mcburgers'" in result["message"]
+
+    def test_commas_and_parentheses_are_not_filter_syntax(self, db_tool):
+        result = db_tool.get_customer_overview("Perkins, (x)")
+        assert "error" not in result
+        assert "No customers found" in result["message"]
+
+    def test_multiple_matches(self, db_tool):
+        result = db_tool.get_customer_overview("client 00000")
+        assert result["customer"]["name"].startswith("Client 00000")
+        assert len(result["other_matches"]) == 4
+        assert result["customer"]["name"] not in result["other_matches"]
+
+    def test_bookings_limit(self, db_tool):
+        result = db_tool.get_customer_overview("Client 000006", bookings_limit=3)
+        dates = [b["scheduled_date"] for b in result["upcoming_bookings"]]
+        assert len(dates) == 3
+        assert dates == sorted(dates) and dates[0] >= date.today().isoformat()
+        assert "other_matches" not in result
+        # Capped at 20 however many are asked for
+        assert len(db_tool.get_customer_overview("Client 000006", bookings_limit=50)["upcoming_bookings"]) == 20
+
+
+class TestLookupService:
+    """lookup_service answered from the catalog"""
+
+    def test_found_by_code(self, db_tool):
+        [repair] = db_tool.lookup_service("rep-02")["services"]
+        assert repair["name"] == "Standard Repair"
+
+    def test_not_found_lists_what_exists(self, db_tool):
+        result = db_tool.lookup_service("hydro jetting")
+        assert result["message"] == "No services found matching 'hydro jetting'."
+        assert "Standard Maintenance" in result["available_services"]
+
+
+class TestFindBooking:
+    """find_booking text search"""
+
+    def test_substring_fallback_keeps_commas(self, db_tool):
+        # Partial words miss the full-text search, so this goes through ILIKE
+        result = db_tool.find_booking("ode 4411, cal")
+        assert "error" not in result
+        assert result["match"] == "substring"
+        assert result["bookings"]
+        assert all("4411, call" in b["special_instructions"] for b in result["bookings"])
+
+    def test_parentheses_and_quotes_are_not_filter_syntax(self, db_tool):
+        result = db_tool.find_booking('ide entrance) "or" (x')
+        assert "error" not in result
+        assert result["bookings"] == []
+        assert "No bookings mention" in result["message"]
+
+    def test_booking_number_is_matched_exactly(self, db_tool):
+        result = db_tool.find_booking("bk 20200101 7")
+        assert result["match"] == "booking_number"
+        assert result["query"] == "BK-20200101-007"
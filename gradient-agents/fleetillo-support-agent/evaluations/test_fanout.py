@@ -0,0 +1,130 @@
+"""
+Unit tests for tools/fanout.py (sharing one streamed generation between requests).
+
+Run with: pytest evaluations/test_fanout.py -v
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.fanout import GenerationFanout, fingerprint
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+class TestFingerprint:
+    """Keys for equivalent completion requests"""
+
+    def test_whitespace_and_tool_call_ids_are_ignored(self):
+        call = lambda id: {"id": id, "function": {"name": "list_vehicles", "arguments": '{"status": "in_use"}'}}
+        a = [{"role": "user", "content": "Which  trucks are out?"}, {"role": "assistant", "tool_calls": [call("a")]}]
+        b = [{"role": "user", "content": "Which trucks are out? "}, {"role": "assistant", "tool_calls": [call("b")]}]
+        assert fingerprint(a, model="m") == fingerprint(b, model="m")
+
+    def test_params_are_part_of_the_key(self):
+        messages = [{"role": "user", "content": "hi"}]
+        assert fingerprint(messages, temperature=0.1) != fingerprint(messages, temperature=0.7)
+
+
+class TestGenerationFanout:
+    """Subscribers of one upstream stream"""
+
+    def test_late_subscriber_replays_earlier_chunks(self):
+        fanout = GenerationFanout()
+        created = []
+
+        async def create():
+            created.append(1)
+
+            async def upstream():
+                for chunk in ("a", "b", "c"):
+                    await asyncio.sleep(0.005)
+                    yield chunk
+            return upstream()
+
+        async def scenario():
+            first = asyncio.ensure_future(collect(fanout.stream("k", create)))
+            await asyncio.sleep(0.008)
+            second = asyncio.ensure_future(collect(fanout.stream("k", create)))
+            return await first, await second
+
+        assert asyncio.run(scenario()) == (["a", "b", "c"], ["a", "b", "c"])
+        assert len(created) == 1
+        assert fanout.stats() == {"requests": 2, "generations": 1, "shared": 1, "in_flight": 0}
+
+    def test_upstream_error_reaches_every_subscriber(self):
+        fanout = GenerationFanout()
+
+        async def create():
+            async def upstream():
+                yield "a"
+                await asyncio.sleep(0.005)
+                raise ValueError("model unavailable")
+            return upstream()
+
+        async def scenario():
+            streams = [fanout.stream("k", create) for _ in range(2)]
+            return await asyncio.gather(*(collect(s) for s in streams), return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(r, ValueError) for r in results)
+
+    def test_cancelled_pump_does_not_leave_subscribers_waiting(self):
+        fanout = GenerationFanout()
+
+        async def create():
+            async def upstream():
+                yield "a"
+                await asyncio.sleep(60)
+                yield "b"
+            return upstream()
+
+        async def scenario():
+            stream = fanout.stream("k", create)
+            subscriber = asyncio.ensure_future(collect(stream))
+            await asyncio.sleep(0.01)
+            fanout._in_flight["k"].task.cancel()
+            return await asyncio.wait_for(subscriber, timeout=1)
+
+        with pytest.raises(RuntimeError, match="cancelled"):
+            asyncio.run(scenario())
+        assert fanout.stats()["in_flight"] == 0
+
+    def test_streams_are_not_shared_across_event_loops(self):
+        fanout = GenerationFanout()
+
+        async def create_stalled():
+            async def upstream():
+                await asyncio.sleep(60)
+                yield "stale"
+            return upstream()
+
+        async def create():
+            async def upstream():
+                yield "a"
+            return upstream()
+
+        async def start_and_leave():
+            fanout.stream("k", create_stalled)
+            await asyncio.sleep(0.01)
+
+        async def subscribe():
+            return await asyncio.wait_for(collect(fanout.stream("k", create)), timeout=1)
+
+        other_loop = asyncio.new_event_loop()
+        try:
+            other_loop.run_until_complete(start_and_leave())
+            assert asyncio.run(subscribe()) == ["a"]
+            assert fanout.stats()["generations"] == 2
+        finally:
+            for task in asyncio.all_tasks(other_loop):
+                task.cancel()
+            other_loop.run_until_complete(asyncio.sleep(0))
+            other_loop.close()
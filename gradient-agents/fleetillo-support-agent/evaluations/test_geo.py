@@ -0,0 +1,125 @@
+"""
+Unit tests for tools/geo.py (vehicle position index and booking density grid).
+
+Run with: pytest evaluations/test_geo.py -v
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.geo import VehicleSpatialIndex, compass_direction, grid_density, haversine_km
+
+
+class StubVehicles:
+    """Just enough of the supabase client for index refreshes: select, gt and execute."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def table(self, name):
+        self._filter = None
+        return self
+
+    def select(self, columns):
+        return self
+
+    def gt(self, column, value):
+        self._filter = (column, value)
+        return self
+
+    def execute(self):
+        self.queries.append(self._filter)
+        rows = self.rows
+        if self._filter:
+            column, value = self._filter
+            rows = [r for r in rows if r[column] > value]
+        return type("Response", (), {"data": [dict(r) for r in rows]})()
+
+
+def vehicle(id, lat, lon, status="available", minutes_old=5, services=("hvac",), updated="2026-01-01T00:00:00+00:00"):
+    located = datetime.now(timezone.utc) - timedelta(minutes=minutes_old)
+    return {
+        "id": id, "name": f"Unit {id}", "status": status, "service_types": list(services),
+        "current_latitude": lat, "current_longitude": lon,
+        "last_location_update": located.isoformat(), "updated_at": updated, "deleted_at": None,
+    }
+
+
+class TestDistances:
+    def test_haversine_known_distance(self):
+        # Minneapolis to St. Paul city halls, about 14 km
+        d = haversine_km(44.9773, -93.2655, np.array([44.9442]), np.array([-93.0936]))
+        assert d[0] == pytest.approx(14.02, abs=0.01)
+        assert haversine_km(0.0, 0.0, np.array([0.0]), np.array([1.0]))[0] == pytest.approx(111.19, abs=0.01)
+
+    def test_compass_direction(self):
+        assert compass_direction(45.0, -93.0, 45.2, -93.0) == "north"
+        assert compass_direction(45.0, -93.0, 44.9, -92.85) == "southeast"
+        assert compass_direction(45.0, -93.0, 45.001, -93.0) == "center"
+
+
+class TestVehicleSpatialIndex:
+    """Nearest-vehicle queries and incremental refresh"""
+
+    def setup_method(self):
+        self.client = StubVehicles([
+            vehicle("a", 45.00, -93.00),
+            vehicle("b", 45.02, -93.00, status="in_use"),
+            vehicle("c", 45.30, -93.40, services=("plumbing",)),
+            vehicle("d", 46.50, -94.00, minutes_old=120),
+            vehicle("e", None, None),
+        ])
+        self.index = VehicleSpatialIndex()
+        self.index.refresh(self.client, force=True)
+
+    def test_nearest_first(self):
+        names = [v["name"] for v in self.index.nearest(45.01, -93.0, limit=3)]
+        assert names[:2] in (["Unit a", "Unit b"], ["Unit b", "Unit a"])
+        assert names[2] == "Unit c"
+
+    def test_matches_brute_force_from_far_away(self):
+        results = self.index.nearest(40.0, -100.0, limit=4)
+        lats = np.array([45.00, 45.02, 45.30, 46.50])
+        lons = np.array([-93.00, -93.00, -93.40, -94.00])
+        expected = sorted(haversine_km(40.0, -100.0, lats, lons))
+        assert [v["distance_km"] for v in results] == [round(float(d), 2) for d in expected]
+
+    def test_filters(self):
+        assert [v["id"] for v in self.index.nearest(45.0, -93.0, statuses=["In_Use"])] == ["b"]
+        assert [v["id"] for v in self.index.nearest(45.0, -93.0, service_type="Plumbing")] == ["c"]
+        assert self.index.nearest(45.0, -93.0, statuses=["maintenance"]) == []
+
+    def test_stale_positions_are_flagged(self):
+        stale = {v["id"]: v["stale"] for v in self.index.nearest(45.0, -93.0, limit=10)}
+        assert stale == {"a": False, "b": False, "c": False, "d": True}
+
+    def test_incremental_refresh_only_fetches_changed_rows(self):
+        self.client.rows[0] = vehicle("a", 46.49, -94.0, updated="2026-01-02T00:00:00+00:00")
+        self.index.refresh(self.client, force=True)
+        assert self.client.queries[-1] == ("updated_at", "2026-01-01T00:00:00+00:00")
+        assert self.index.position("a")["latitude"] == 46.49
+        assert [v["id"] for v in self.index.nearest(46.5, -94.0, limit=2)] == ["d", "a"]
+
+    def test_refresh_is_throttled(self):
+        self.index.refresh(self.client)
+        assert len(self.client.queries) == 1
+
+
+class TestGridDensity:
+    def test_busiest_cell_and_weights(self):
+        lats = np.array([45.0, 45.001, 45.002, 45.3])
+        lons = np.array([-93.0, -93.001, -93.002, -93.0])
+        cells = grid_density(lats, lons, cell_km=5.0, top_n=5, weights={"urgent": np.array([1, 0, 1, 1])})
+        assert [c["count"] for c in cells] == [3, 1]
+        assert [c["urgent"] for c in cells] == [2, 1]
+        assert cells[1]["direction_from_center"] == "north"
+
+    def test_no_points(self):
+        assert grid_density(np.array([]), np.array([])) == []
@@ -10,9 +10,12 @@ Run with: pytest evaluations/test_gradient_evaluation.py -v
 import pytest
 import os
 import json
+import time
 import requests
 from typing import Dict, List, Any
 
+from latency import budget_for, check_budget, load_budgets, record_and_compare
+
 # Configuration
 AGENT_URL = "https://agents.do-ai.run/e7b58fd7-d32f-4d4c-bee0-adf3a7d0d8db/optiroute-support/run"
 API_TOKEN = os.getenv("DIGITALOCEAN_API_TOKEN")
@@ -41,6 +44,8 @@ def call_agent(query: str) -> str:
     }
     
     try:
+        start = time.perf_counter()
+        first_chunk = None
         response = requests.post(AGENT_URL, headers=headers, json=payload, timeout=30, stream=True)
         response.raise_for_status()
         
@@ -52,14 +57,29 @@ def call_agent(query: str) -> str:
                 decoded_line = line.decode('utf-8')
                 # The response may be SSE format or plain text chunks
                 if decoded_line.strip():
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter()
                     full_response += decoded_line
         
+        end = time.perf_counter()
+        # LLM and tool call counts aren't visible from outside the deployed agent
+        LATENCY_SAMPLES[query] = {
+            "ttft_ms": ((first_chunk or end) - start) * 1000,
+            "total_ms": (end - start) * 1000,
+            "llm_calls": None,
+            "tool_calls": None,
+        }
         return full_response.strip()
     
     except requests.exceptions.RequestException as e:
         pytest.fail(f"Agent request failed: {e}")
 
 
+# Latest latency sample per query, checked by TestLatency
+LATENCY_SAMPLES = {}
+LATENCY_BUDGETS = load_budgets()
+
+
 # Test data structured for easy iteration
 TEST_CASES = [
     {
@@ -250,6 +270,29 @@ class TestNaturalLanguage:
                 f"{test_case['id']}: Tool chatter in natural query: '{forbidden}' found"
 
 
+class TestLatency:
+    """Test latency budgets per category and regressions against previous runs"""
+
+    @pytest.mark.parametrize("test_case", TEST_CASES, ids=[tc["id"] for tc in TEST_CASES])
+    def test_latency_budget(self, test_case):
+        """Verify TTFT and total time stay within the category budget (plus network allowance)"""
+        if test_case["query"] not in LATENCY_SAMPLES:
+            call_agent(test_case["query"])
+        sample = LATENCY_SAMPLES[test_case["query"]]
+        violations = check_budget(sample, budget_for(test_case["category"], LATENCY_BUDGETS, remote=True))
+        assert not violations, \
+            f"{test_case['id']}: Over latency budget: {'; '.join(violations)}"
+
+    def test_no_latency_regression(self):
+        """Fail when p50/p95 regressed against recent runs, then record this run"""
+        samples = {tc["id"]: LATENCY_SAMPLES[tc["query"]] for tc in TEST_CASES if tc["query"] in LATENCY_SAMPLES}
+        if not samples:
+            pytest.skip("No latency samples collected in this run")
+        result = record_and_compare(AGENT_URL, samples, {tc["id"]: tc["category"] for tc in TEST_CASES}, LATENCY_BUDGETS)
+        assert not result["regressions"], \
+            "Latency regressed:\n" + "\n".join(result["regressions"])
+
+
 class TestEvaluationSummary:
     """Generate summary report of all tests"""
     
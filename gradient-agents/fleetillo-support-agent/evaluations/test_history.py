@@ -0,0 +1,111 @@
+"""
+Unit tests for tools/history.py (answering repeated tool calls from the conversation).
+
+Run with: pytest evaluations/test_history.py -v
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.history import TOOL_FRESHNESS, HistoryToolIndex, ReuseCounter
+
+FRESHNESS = {"list_vehicles": {"turns": 2, "seconds": 60}}
+
+
+def exchange(call_id, name, arguments, result, **extra):
+    """An assistant tool call followed by its tool result."""
+    return [
+        {"role": "assistant", "content": "", "tool_calls": [
+            {"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+        ]},
+        {"role": "tool", "tool_call_id": call_id, "content": json.dumps(result), **extra},
+    ]
+
+
+def user(text="hi"):
+    return {"role": "user", "content": text}
+
+
+class TestHistoryToolIndex:
+    """Freshness windows and argument matching"""
+
+    def test_result_within_turn_window_is_reused(self):
+        messages = [user(), *exchange("c1", "list_vehicles", {"status": "in_use"}, [{"name": "Unit 1"}]), user()]
+        index = HistoryToolIndex(messages, FRESHNESS)
+        assert json.loads(index.lookup("list_vehicles", {"status": "in_use"})) == [{"name": "Unit 1"}]
+        assert index.age("list_vehicles", {"status": "in_use"}) == {"turns": 1, "seconds": None}
+
+    def test_turn_window_boundary(self):
+        base = [user(), *exchange("c1", "list_vehicles", {}, [{"name": "Unit 1"}])]
+        assert HistoryToolIndex(base + [user(), user()], FRESHNESS).lookup("list_vehicles", {}) is not None
+        assert HistoryToolIndex(base + [user(), user(), user()], FRESHNESS).lookup("list_vehicles", {}) is None
+
+    def test_seconds_window_uses_message_timestamps(self):
+        fresh = [user(), *exchange("c1", "list_vehicles", {}, [], timestamp=time.time() - 30)]
+        stale = [user(), *exchange("c1", "list_vehicles", {}, [], timestamp=(time.time() - 90) * 1000)]
+        assert HistoryToolIndex(fresh, FRESHNESS).lookup("list_vehicles", {}) is not None
+        assert HistoryToolIndex(stale, FRESHNESS).lookup("list_vehicles", {}) is None
+
+    def test_iso_timestamps(self):
+        messages = [user(), *exchange("c1", "list_vehicles", {}, [], created_at="2020-01-01T00:00:00Z")]
+        assert HistoryToolIndex(messages, FRESHNESS).lookup("list_vehicles", {}) is None
+
+    def test_arguments_are_matched_like_single_flight_keys(self):
+        messages = [user(), *exchange("c1", "list_vehicles", {"status": " in_use "}, [])]
+        index = HistoryToolIndex(messages, FRESHNESS)
+        assert index.lookup("list_vehicles", {"status": "in_use"}) is not None
+        assert index.lookup("list_vehicles", {"status": "IN_USE"}) is None
+        assert index.lookup("list_vehicles", {"status": "available"}) is None
+
+    def test_errors_and_unlisted_tools_are_not_reused(self):
+        messages = [
+            user(),
+            *exchange("c1", "list_vehicles", {}, [{"error": "rate limited"}]),
+            *exchange("c2", "get_route_progress", {"route_query": "A"}, {"progress": 0.5}),
+        ]
+        index = HistoryToolIndex(messages, FRESHNESS)
+        assert len(index) == 1
+        assert index.lookup("list_vehicles", {}) is None
+        assert index.lookup("get_route_progress", {"route_query": "A"}) is None
+
+    def test_newest_result_wins(self):
+        messages = [
+            user(), *exchange("c1", "list_vehicles", {}, ["old"]),
+            user(), *exchange("c2", "list_vehicles", {}, ["new"]),
+        ]
+        assert json.loads(HistoryToolIndex(messages, FRESHNESS).lookup("list_vehicles", {})) == ["new"]
+
+    def test_unanswered_call_and_bad_arguments_are_ignored(self):
+        messages = [
+            user(),
+            {"role": "assistant", "tool_calls": [{"id": "c1", "function": {"name": "list_vehicles", "arguments": "{"}}]},
+            {"role": "tool", "tool_call_id": "c1", "content": "[]"},
+            {"role": "tool", "tool_call_id": "missing", "content": "[]"},
+        ]
+        assert len(HistoryToolIndex(messages, FRESHNESS)) == 0
+
+
+class TestToolFreshness:
+    def test_every_tool_has_a_window_or_is_live(self):
+        import main
+
+        tools = {tool["function"]["name"] for tool in main.TOOLS_SCHEMA}
+        assert set(TOOL_FRESHNESS) <= tools
+        assert tools - set(TOOL_FRESHNESS) == {"find_nearest_vehicles", "get_route_progress", "check_vehicle_availability"}
+
+
+class TestReuseCounter:
+    def test_counts_by_tool(self):
+        counter = ReuseCounter()
+        counter.record("list_vehicles", reused=True)
+        counter.record("list_vehicles", reused=False)
+        counter.record("get_vehicle_count", reused=True)
+        assert counter.stats() == {
+            "reused": 2,
+            "executed": 1,
+            "reused_by_tool": {"list_vehicles": 1, "get_vehicle_count": 1},
+        }
@@ -0,0 +1,133 @@
+"""
+Unit tests for evaluations/latency.py (budgets, percentiles and regression checks).
+
+Run with: pytest evaluations/test_latency.py -v
+"""
+
+import asyncio
+import contextvars
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from latency import (
+    RunHistory, budget_for, check_budget, compare, load_budgets, measure_local, record_and_compare, summarize,
+)
+
+BUDGETS = {
+    "default": {"ttft_ms": 4000, "total_ms": 8000, "llm_calls": 2, "tool_calls": 1},
+    "categories": {"response_quality": {"total_ms": 9000}},
+    "remote_allowance_ms": 1500,
+    "regression": {"threshold_pct": 25, "min_delta_ms": 100, "window": 3},
+}
+
+
+def sample(ttft, total, llm_calls=None, tool_calls=None):
+    return {"ttft_ms": ttft, "total_ms": total, "llm_calls": llm_calls, "tool_calls": tool_calls}
+
+
+def run(p50, p95=None, group="overall"):
+    stats = {"p50": p50, "p95": p95 if p95 is not None else p50}
+    return {"summary": {group: {"ttft_ms": dict(stats), "total_ms": dict(stats)}}}
+
+
+class TestBudgets:
+    def test_category_overlays_default(self):
+        assert budget_for("response_quality", BUDGETS)["total_ms"] == 9000
+        assert budget_for("response_quality", BUDGETS)["ttft_ms"] == 4000
+        assert budget_for("unknown", BUDGETS) == BUDGETS["default"]
+
+    def test_remote_allowance_only_adds_to_timings(self):
+        budget = budget_for("tool_execution", BUDGETS, remote=True)
+        assert (budget["ttft_ms"], budget["total_ms"], budget["llm_calls"]) == (5500, 9500, 2)
+
+    def test_violations(self):
+        budget = budget_for("tool_execution", BUDGETS)
+        assert check_budget(sample(4000, 8000, 2, 1), budget) == []
+        assert check_budget(sample(4200.4, 7000, 3, None), budget) == [
+            "ttft_ms 4200 ms > budget 4000 ms",
+            "llm_calls 3 > budget 2",
+        ]
+
+    def test_shipped_budgets_cover_every_category(self):
+        budgets = load_budgets()
+        for category in ("tool_execution", "anti_hallucination", "response_quality", "no_leakage", "natural_language"):
+            assert set(budget_for(category, budgets)) >= {"ttft_ms", "total_ms", "llm_calls", "tool_calls"}
+
+
+class TestSummarize:
+    """p50/p95 overall and per category"""
+
+    def test_percentiles_interpolate(self):
+        samples = {f"c{i}": sample(100 * i, 1000 * i) for i in range(1, 11)}
+        categories = {f"c{i}": "even" if i % 2 == 0 else "odd" for i in range(1, 11)}
+        summary = summarize(samples, categories)
+        assert summary["overall"]["ttft_ms"] == {"p50": 550.0, "p95": 955.0}
+        assert summary["overall"]["total_ms"] == {"p50": 5500.0, "p95": 9550.0}
+        assert summary["even"]["ttft_ms"]["p50"] == 600.0
+        assert summary["odd"]["ttft_ms"]["p50"] == 500.0
+
+    def test_unknown_case_is_uncategorized(self):
+        summary = summarize({"x": sample(12.34, 56.78)}, {})
+        assert summary["uncategorized"]["ttft_ms"] == {"p50": 12.3, "p95": 12.3}
+
+
+class TestCompare:
+    """Regressions against the median of recent runs"""
+
+    settings = BUDGETS["regression"]
+
+    def test_no_history_no_regressions(self):
+        assert compare(run(1000)["summary"], [], self.settings) == []
+
+    def test_needs_both_percent_and_absolute_slowdown(self):
+        history = [run(1000), run(1000), run(1000)]
+        # 30% but only 30 ms slower on a fast run
+        assert compare(run(130)["summary"], [run(100)] * 3, self.settings) == []
+        # 200 ms slower but only 20%
+        assert compare(run(1200)["summary"], history, self.settings) == []
+        regressions = compare(run(1300)["summary"], history, self.settings)
+        assert len(regressions) == 4
+        assert regressions[0] == "overall ttft_ms p50: 1300 ms vs 1000 ms baseline (+30%)"
+
+    def test_baseline_is_the_median_of_the_window(self):
+        # Neither the 5000 ms outlier nor the slow runs before the window move the baseline
+        history = [run(9000), run(9000), run(1000), run(5000), run(1000)]
+        assert compare(run(1200)["summary"], history, self.settings) == []
+        assert compare(run(1300)["summary"], history, self.settings)
+
+    def test_groups_missing_from_history_are_skipped(self):
+        assert compare(run(9000, group="new_category")["summary"], [run(100)], self.settings) == []
+
+
+class TestHistory:
+    def test_record_and_compare_per_target(self, tmp_path):
+        history = RunHistory(str(tmp_path / "results" / "latency-history.jsonl"))
+        fast = {"c1": sample(1000.04, 2000.0, 1, 1)}
+        for _ in range(3):
+            assert record_and_compare("local:replay", fast, {"c1": "tool_execution"}, BUDGETS, history)["regressions"] == []
+        slow = {"c1": sample(2000.0, 4000.0, 1, 1)}
+        assert record_and_compare("local:replay", slow, {"c1": "tool_execution"}, BUDGETS, history)["regressions"]
+        # Another target has its own history
+        assert record_and_compare("https://agent.test/run", slow, {"c1": "tool_execution"}, BUDGETS, history)["regressions"] == []
+        runs = history.runs("local:replay")
+        assert len(runs) == 4
+        assert runs[0]["samples"]["c1"] == {"ttft_ms": 1000.0, "total_ms": 2000.0, "llm_calls": 1, "tool_calls": 1}
+
+
+class TestMeasureLocal:
+    def test_times_chunks_and_reads_counters(self):
+        stats_var = contextvars.ContextVar("stats")
+
+        async def agent(body, context):
+            stats_var.get()["llm_calls"] += 2
+            stats_var.get()["tool_calls"] += 1
+            yield " There are "
+            yield "4 customers. "
+
+        result = asyncio.run(measure_local(agent, {"messages": []}, stats_var))
+        assert result["response"] == "There are 4 customers."
+        assert (result["llm_calls"], result["tool_calls"]) == (2, 1)
+        assert 0 <= result["ttft_ms"] <= result["total_ms"]
+        assert stats_var.get(None) is None
@@ -5,6 +5,15 @@ This module tests the agent locally by directly importing main.py functions,
 bypassing HTTP API calls. This is faster and better for development/CI.
 
 Run with: pytest evaluations/test_local_evaluation.py -v
+
+Model streams can be recorded once and replayed so runs are fast and deterministic:
+
+    LLM_CASSETTE_MODE=record pytest evaluations/test_local_evaluation.py   # real model, saves streams
+    LLM_CASSETTE_MODE=replay pytest evaluations/test_local_evaluation.py   # no model calls
+
+Recordings live in evaluations/cassettes/llm.jsonl.gz (LLM_CASSETTE_PATH); replay
+fails if that file is missing. When replaying without SUPABASE_URL the tools query the seeded stand-in database from
+benchmarks/fakes instead.
 """
 
 import pytest
@@ -18,9 +27,27 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from dotenv import load_dotenv
 load_dotenv()
 
-# Now import the agent's streaming handler
+REPLAYING = os.environ.get("LLM_CASSETTE_MODE", "off").lower() == "replay"
+if REPLAYING and not os.environ.get("SUPABASE_URL"):
+    from benchmarks.fakes import point_agent_at
+    from benchmarks.fakes.postgrest import FakePostgREST
+    from benchmarks.fakes.seed import generate
+
+    _stand_in_db = FakePostgREST(generate(rows=1000)).start()
+    point_agent_at(_stand_in_db.url)
+
+# Now import the agent's streaming entrypoint
 import asyncio
-from main import stream_response
+from main import main as agent_main, LLM_CASSETTE, REQUEST_STATS
+from latency import budget_for, check_budget, load_budgets, measure_local, record_and_compare
+
+if REPLAYING and not os.path.exists(LLM_CASSETTE.path):
+    # A replay run with nothing to replay must not pass as "all skipped"
+    pytest.fail(
+        f"No recorded model streams at {LLM_CASSETTE.path}; record them first with "
+        "LLM_CASSETTE_MODE=record pytest evaluations/test_local_evaluation.py",
+        pytrace=False,
+    )
 
 # Test data
 TEST_CASES = [
@@ -107,15 +134,16 @@ def call_agent_local(query: str) -> str:
     Returns:
         Agent's complete response as a string
     """
-    # Create message history (empty for new conversation)
-    message_history = []
-    
-    # Collect streamed response
-    full_response = ""
-    for chunk in stream_response(query, message_history):
-        full_response += chunk
-    
-    return full_response.strip()
+    # New conversation: the entrypoint receives the same body as the evaluation API
+    body = {"messages": [{"role": "user", "content": query}]}
+    sample = asyncio.run(measure_local(agent_main, body, REQUEST_STATS))
+    LATENCY_SAMPLES[query] = sample
+    return sample["response"]
+
+
+# Latest latency sample per query (TTFT, total, LLM and tool calls), checked by TestLatency
+LATENCY_SAMPLES = {}
+LATENCY_BUDGETS = load_budgets()
 
 
 class TestToolExecution:
@@ -223,6 +251,33 @@ class TestNaturalLanguage:
                 f"{test_case['id']}: Tool chatter in natural query: '{forbidden}' found"
 
 
+class TestLatency:
+    """Test latency budgets per category and regressions against previous runs"""
+
+    @pytest.mark.parametrize("test_case", TEST_CASES, ids=[tc["id"] for tc in TEST_CASES])
+    def test_latency_budget(self, test_case):
+        """Verify TTFT, total time, LLM calls and tool calls stay within the category budget"""
+        if test_case["query"] not in LATENCY_SAMPLES:
+            call_agent_local(test_case["query"])
+        sample = LATENCY_SAMPLES[test_case["query"]]
+        violations = check_budget(sample, budget_for(test_case["category"], LATENCY_BUDGETS))
+        assert not violations, \
+            f"{test_case['id']}: Over latency budget: {'; '.join(violations)}"
+
+    def test_no_latency_regression(self):
+        """Fail when p50/p95 regressed against recent runs, then record this run"""
+        samples = {tc["id"]: LATENCY_SAMPLES[tc["query"]] for tc in TEST_CASES if tc["query"] in LATENCY_SAMPLES}
+        if not samples:
+            pytest.skip("No latency samples collected in this run")
+        target = f"local:{LLM_CASSETTE.mode}"
+        result = record_and_compare(target, samples, {tc["id"]: tc["category"] for tc in TEST_CASES}, LATENCY_BUDGETS)
+        overall = result["summary"]["overall"]
+        print(f"\nLatency ({target}): TTFT p50 {overall['ttft_ms']['p50']} ms, p95 {overall['ttft_ms']['p95']} ms; "
+              f"total p50 {overall['total_ms']['p50']} ms, p95 {overall['total_ms']['p95']} ms")
+        assert not result["regressions"], \
+            "Latency regressed:\n" + "\n".join(result["regressions"])
+
+
 class TestEvaluationSummary:
     """Generate summary report of all tests"""
     
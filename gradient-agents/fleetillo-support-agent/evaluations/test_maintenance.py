@@ -0,0 +1,106 @@
+"""
+Unit tests for tools/maintenance.py (vehicles sorted by next maintenance date).
+
+Run with: pytest evaluations/test_maintenance.py -v
+"""
+
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.geo import VehicleSnapshot, VehicleSpatialIndex
+from tools.maintenance import MaintenanceIndex
+
+
+class StubVehicles:
+    """Just enough of the supabase client for index refreshes: select, gt and execute."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def table(self, name):
+        self._filter = None
+        return self
+
+    def select(self, columns):
+        return self
+
+    def gt(self, column, value):
+        self._filter = (column, value)
+        return self
+
+    def execute(self):
+        self.queries.append(self._filter)
+        rows = self.rows
+        if self._filter:
+            column, value = self._filter
+            rows = [r for r in rows if r[column] > value]
+        return type("Response", (), {"data": [dict(r) for r in rows]})()
+
+
+def vehicle(id, next_date, status="available", deleted=None, updated="2026-01-01T00:00:00+00:00"):
+    return {"id": id, "name": f"Unit {id}", "status": status, "next_maintenance_date": next_date,
+            "updated_at": updated, "deleted_at": deleted}
+
+
+def ids(rows):
+    return [row["id"] for row in rows]
+
+
+class TestMaintenanceIndex:
+    """Due and overdue lookups"""
+
+    def setup_method(self):
+        self.client = StubVehicles([
+            vehicle("overdue", "2026-01-02"),
+            vehicle("today", "2026-01-14"),
+            vehicle("soon", "2026-01-20"),
+            vehicle("later", "2026-03-01"),
+            vehicle("unscheduled", None),
+            vehicle("retired", "2026-01-05", status="retired"),
+            vehicle("deleted", "2026-01-06", deleted="2026-01-01T00:00:00+00:00"),
+        ])
+        self.index = MaintenanceIndex()
+        self.index.refresh(self.client, force=True)
+
+    def test_due_window_is_inclusive_and_sorted(self):
+        assert ids(self.index.due_between(date(2026, 1, 14), date(2026, 1, 20))) == ["today", "soon"]
+        assert ids(self.index.due_between(date(2026, 1, 15), date(2026, 1, 19))) == []
+
+    def test_no_lower_bound_includes_overdue(self):
+        assert ids(self.index.due_between(None, date(2026, 1, 13))) == ["overdue"]
+
+    def test_retired_deleted_and_unscheduled_vehicles(self):
+        everything = ids(self.index.due_between(None, date(2030, 1, 1)))
+        assert "retired" not in everything and "deleted" not in everything
+        assert self.index.unscheduled() == 1
+
+    def test_incremental_refresh_reorders(self):
+        self.client.rows.append(vehicle("later", "2026-01-10", updated="2026-01-03T00:00:00+00:00"))
+        self.client.rows.append(vehicle("soon", "2026-01-21", status="retired", updated="2026-01-03T00:00:00+00:00"))
+        self.index.refresh(self.client, force=True)
+        assert self.client.queries[-1] == ("updated_at", "2026-01-01T00:00:00+00:00")
+        assert ids(self.index.due_between(None, date(2026, 12, 31))) == ["overdue", "later", "today"]
+
+
+class TestSharedSnapshot:
+    """One vehicles poll feeds both the maintenance and the position index"""
+
+    def test_indexes_share_one_poll_and_watermark(self):
+        client = StubVehicles([vehicle("a", "2026-01-10"), vehicle("b", "2026-02-01")])
+        snapshot = VehicleSnapshot()
+        positions, maintenance = VehicleSpatialIndex(snapshot), MaintenanceIndex(snapshot)
+        positions.refresh(client, force=True)
+        maintenance.refresh(client)
+        assert client.queries == [None]
+        assert ids(maintenance.due_between(None, date(2026, 12, 31))) == ["a", "b"]
+
+        client.rows.append(vehicle("b", "2026-01-05", updated="2026-01-02T00:00:00+00:00"))
+        positions.refresh(client, force=True)
+        maintenance.refresh(client)
+        assert client.queries == [None, ("updated_at", "2026-01-01T00:00:00+00:00")]
+        assert ids(maintenance.due_between(None, date(2026, 12, 31))) == ["b", "a"]
+        assert set(positions.vehicle_names()) == {"a", "b"}
@@ -0,0 +1,97 @@
+"""
+Unit tests for tools/metrics.py (Prometheus text exposition).
+
+Run with: pytest evaluations/test_metrics.py -v
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.metrics import MetricsFileWriter, MetricsRegistry, flatten_stats
+
+
+def samples(registry):
+    return [line for line in registry.render().splitlines() if not line.startswith("#")]
+
+
+class TestMetricsRegistry:
+    """Rendering of each metric type"""
+
+    def test_counter_with_and_without_labels(self):
+        registry = MetricsRegistry(namespace="app")
+        plain = registry.counter("requests_total", "Requests")
+        calls = registry.counter("tool_calls_total", "Tool calls", ["tool", "outcome"])
+        assert samples(registry) == ["app_requests_total 0"]
+        plain.inc()
+        calls.inc(tool="list_vehicles", outcome="ok")
+        calls.inc(2, tool="list_vehicles", outcome="ok")
+        text = registry.render()
+        assert "# TYPE app_requests_total counter" in text
+        assert "app_requests_total 1" in text
+        assert 'app_tool_calls_total{tool="list_vehicles",outcome="ok"} 3' in text
+        assert calls.value(tool="list_vehicles", outcome="ok") == 3
+
+    def test_registering_twice_returns_the_same_metric(self):
+        registry = MetricsRegistry()
+        assert registry.counter("x", "X") is registry.counter("x", "X")
+
+    def test_gauge(self):
+        registry = MetricsRegistry()
+        in_flight = registry.gauge("in_flight", "In flight")
+        in_flight.inc()
+        in_flight.inc()
+        in_flight.dec()
+        phase = registry.gauge("cold_start_seconds", "Cold start", ["phase"])
+        phase.set(0.75, phase="import")
+        assert samples(registry) == ['cold_start_seconds{phase="import"} 0.75', "in_flight 1"]
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latency", ["stage"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value, stage="route")
+        assert samples(registry) == [
+            'latency_seconds_bucket{stage="route",le="0.1"} 2',
+            'latency_seconds_bucket{stage="route",le="1"} 3',
+            'latency_seconds_bucket{stage="route",le="+Inf"} 4',
+            'latency_seconds_sum{stage="route"} 3.65',
+            'latency_seconds_count{stage="route"} 4',
+        ]
+        assert latency.count(stage="route") == 4
+
+    def test_histogram_timer(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latency")
+        with latency.time():
+            pass
+        assert latency.count() == 1
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("errors_total", "Errors", ["message"]).inc(message='bad "quote"\\ and\nnewline')
+        assert samples(registry) == ['errors_total{message="bad \\"quote\\"\\\\ and\\nnewline"} 1']
+
+    def test_collectors(self):
+        registry = MetricsRegistry(namespace="app")
+        registry.add_collector(lambda: {"runtime_stat": ("Counters", flatten_stats({
+            "single_flight": {"calls": 4, "hit_rate": 0.5, "enabled": True, "mode": "off"},
+        }))})
+        registry.add_collector(lambda: 1 / 0)
+        assert samples(registry) == [
+            'app_runtime_stat{component="single_flight",stat="calls"} 4',
+            'app_runtime_stat{component="single_flight",stat="hit_rate"} 0.5',
+        ]
+
+
+class TestMetricsFileWriter:
+    def test_write_replaces_the_file(self, tmp_path):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests").inc()
+        writer = MetricsFileWriter(registry, str(tmp_path / "agent-{pid}.prom"), interval_seconds=3600)
+        writer.write()
+        assert writer.path.endswith(f"agent-{os.getpid()}.prom")
+        with open(writer.path) as f:
+            assert "requests_total 1" in f.read()
+        assert not os.path.exists(writer.path + ".tmp")
@@ -0,0 +1,71 @@
+"""
+Unit tests for tools/polyline.py (route geometry decoding and projection).
+
+Run with: pytest evaluations/test_polyline.py -v
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.polyline import RoutePath, decode_polyline, encode_polyline
+
+# Example from Google's encoded polyline algorithm documentation
+GOOGLE_EXAMPLE = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+GOOGLE_POINTS = [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+
+
+class TestDecodePolyline:
+    """Vectorized decoder"""
+
+    def test_reference_example(self):
+        assert np.allclose(decode_polyline(GOOGLE_EXAMPLE), GOOGLE_POINTS, atol=1e-9)
+
+    def test_round_trip_keeps_five_decimals(self):
+        rng = np.random.default_rng(3)
+        points = np.column_stack([rng.uniform(-60, 60, 200), rng.uniform(-179, 179, 200)])
+        decoded = decode_polyline(encode_polyline(points))
+        assert decoded.shape == points.shape
+        assert np.abs(decoded - points).max() <= 0.5e-5 + 1e-12
+
+    def test_precision_six(self):
+        points = np.array([[45.1234567, -93.7654321], [45.1234571, -93.7654301]])
+        decoded = decode_polyline(encode_polyline(points, precision=6), precision=6)
+        assert np.allclose(decoded, np.round(points, 6), atol=1e-12)
+        # Decoding with the wrong precision is off by a factor of ten
+        assert np.allclose(decode_polyline(encode_polyline(points, precision=6)), np.round(points, 6) * 10)
+
+    def test_empty_and_truncated_input(self):
+        assert decode_polyline("").shape == (0, 2)
+        assert decode_polyline("_p~iF").shape == (0, 2)
+        # A dangling latitude without its longitude is dropped
+        assert np.allclose(decode_polyline(GOOGLE_EXAMPLE + "_p~iF"), GOOGLE_POINTS)
+
+
+class TestRoutePath:
+    """Distances along a route"""
+
+    def test_projection_onto_a_straight_route(self):
+        # Due north along a meridian, about 11.1 km per 0.1 degree
+        path = RoutePath(np.array([[45.0, -93.0], [45.1, -93.0], [45.2, -93.0]]))
+        assert path.total_km == pytest.approx(22.24, abs=0.01)
+        halfway = path.project(45.1, -93.0)
+        assert halfway["along_km"] == pytest.approx(path.total_km / 2, abs=0.01)
+        assert halfway["off_route_km"] == pytest.approx(0.0, abs=1e-6)
+        beside = path.project(45.05, -92.99)
+        assert beside["segment_index"] == 0
+        assert beside["off_route_km"] == pytest.approx(0.79, abs=0.01)
+
+    def test_positions_beyond_the_ends_clamp(self):
+        path = RoutePath(np.array([[45.0, -93.0], [45.1, -93.0]]))
+        assert path.project(44.9, -93.0)["along_km"] == 0.0
+        assert path.project(45.3, -93.0)["remaining_km"] == 0.0
+
+    def test_single_point_path(self):
+        path = RoutePath.from_encoded(encode_polyline(np.array([[45.0, -93.0]])))
+        assert path.total_km == 0.0
+        assert path.project(45.0, -93.0)["remaining_km"] == 0.0
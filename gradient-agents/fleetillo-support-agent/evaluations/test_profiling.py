@@ -0,0 +1,107 @@
+"""
+Unit tests for tools/profiling.py (per-invocation sampling profiles).
+
+Run with: pytest evaluations/test_profiling.py -v
+"""
+
+import contextvars
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.profiling import NOOP_PROFILE, Profile, Profiler, _active, _category, _module_path
+
+
+def profile(tmp_path, name="p"):
+    return Profile(str(tmp_path / name), interval_ms=60000, ids={})
+
+
+class TestHelpers:
+    def test_module_path(self):
+        assert _module_path("/usr/lib/python3.11/re/_parser.py") == "re/_parser.py"
+        assert _module_path("/venv/lib/python3.11/site-packages/httpx/_client.py") == "httpx/_client.py"
+        assert _module_path("/app/gradient-agents/agent/tools/database.py") == "tools/database.py"
+        assert _module_path("C:\\agent\\main.py") == "agent/main.py"
+
+    def test_innermost_category_wins(self):
+        stack = ["respond (agent/main.py:1)", "get (httpx/_client.py:10)", "compile (re/_compiler.py:3)"]
+        assert _category(stack) == "regex"
+        assert _category(stack[:2]) == "supabase_client"
+        assert _category(["<module> (<frozen importlib._bootstrap>:1)"]) == "import"
+        assert _category(["respond (agent/main.py:1)"]) == "agent_code"
+
+
+class TestProfiler:
+    """Which invocations are profiled"""
+
+    def test_dict_context(self):
+        assert Profiler().requested({"profile": True})
+        assert not Profiler().requested({"profile": False})
+
+    def test_header_only_when_allowed(self):
+        context = SimpleNamespace(headers={"x-agent-profile": "true"})
+        assert not Profiler().requested(context)
+        assert Profiler(allow_header=True).requested(context)
+        assert not Profiler(allow_header=True).requested(SimpleNamespace(headers={"x-agent-profile": "0"}))
+
+    def test_sample_rate(self):
+        assert Profiler(sample_rate=1.0).requested(None)
+        assert not Profiler(sample_rate=0.0).requested(None)
+
+    def test_unrequested_invocation_is_a_noop(self, tmp_path):
+        profiler = Profiler(directory=str(tmp_path))
+        assert profiler.invocation({}) is NOOP_PROFILE
+        assert profiler.stats() == {"profiled": 0, "sample_rate": 0.0}
+
+    def test_trace_id_names_the_profile(self, tmp_path):
+        profiler = Profiler(directory=str(tmp_path))
+        p = profiler.invocation({"profile": True}, {"trace_id": "abc123"})
+        assert p.path == os.path.join(str(tmp_path), "abc123.folded")
+        assert profiler.profiled == 1
+
+
+class TestBind:
+    """Worker threads sampled on behalf of the active profile"""
+
+    def test_without_an_active_profile_fn_is_unchanged(self):
+        fn = lambda: None
+        assert Profiler.bind(fn) is fn
+
+    def test_registers_and_unregisters_the_worker(self, tmp_path):
+        seen = []
+
+        def work():
+            seen.append(dict(p._workers))
+            return threading.get_ident()
+
+        with profile(tmp_path) as p:
+            bound = Profiler.bind(work)
+            result = []
+            thread = threading.Thread(target=lambda: result.append(bound()))
+            thread.start()
+            thread.join()
+        assert seen == [{result[0]: 1}]
+        assert p._workers == {}
+
+
+class TestActiveProfile:
+    """__exit__ restores whatever was active before"""
+
+    def test_nested_profiles_restore_the_outer_one(self, tmp_path):
+        with profile(tmp_path, "outer") as outer:
+            with profile(tmp_path, "inner"):
+                pass
+            assert _active.get() is outer
+        assert _active.get() is None
+
+    def test_exit_from_a_copied_context(self, tmp_path):
+        with profile(tmp_path, "outer") as outer:
+            inner = profile(tmp_path, "inner").__enter__()
+            copied = contextvars.copy_context()
+            copied.run(inner.__exit__, None, None, None)
+            assert copied[_active] is outer
+            inner.__exit__(None, None, None)
+        assert _active.get() is None
@@ -0,0 +1,95 @@
+"""
+Unit tests for tools/recurrence.py (lazy expansion of recurring bookings).
+
+Run with: pytest evaluations/test_recurrence.py -v
+"""
+
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.recurrence import add_months, expand, merged_schedule
+
+
+def series(pattern, scheduled_date, end=None, id="p1"):
+    return {"id": id, "recurrence_pattern": pattern, "scheduled_date": scheduled_date, "recurrence_end_date": end}
+
+
+def days(occurrences):
+    return [day for day, _ in occurrences]
+
+
+class TestAddMonths:
+    """Month arithmetic anchored to the series' day of month"""
+
+    def test_month_end_is_clamped(self):
+        assert add_months(date(2026, 1, 31), 1, 31) == date(2026, 2, 28)
+        assert add_months(date(2028, 1, 31), 1, 31) == date(2028, 2, 29)
+        assert add_months(date(2026, 1, 31), 3, 31) == date(2026, 4, 30)
+
+    def test_anchor_day_survives_a_short_month(self):
+        # Feb 28 was a clamp of the 31st; March goes back to the 31st
+        assert add_months(date(2026, 2, 28), 1, 31) == date(2026, 3, 31)
+
+    def test_year_rollover(self):
+        assert add_months(date(2026, 11, 15), 3, 15) == date(2027, 2, 15)
+        assert add_months(date(2026, 3, 15), -3, 15) == date(2025, 12, 15)
+
+
+class TestExpand:
+    """Occurrences of one series inside a window"""
+
+    def test_monthly_series_on_the_31st(self):
+        occurrences = days(expand(series("monthly", "2026-01-31"), date(2026, 1, 1), date(2026, 6, 30)))
+        assert occurrences == [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31),
+                               date(2026, 4, 30), date(2026, 5, 31), date(2026, 6, 30)]
+
+    def test_window_starting_mid_series(self):
+        occurrences = days(expand(series("monthly", "2025-08-31"), date(2026, 2, 1), date(2026, 3, 31)))
+        assert occurrences == [date(2026, 2, 28), date(2026, 3, 31)]
+
+    def test_weekly_series_jumps_to_the_window(self):
+        occurrences = days(expand(series("weekly", "2020-01-06"), date(2026, 1, 1), date(2026, 1, 20)))
+        assert occurrences == [date(2026, 1, 5), date(2026, 1, 12), date(2026, 1, 19)]
+
+    def test_window_bounds_are_inclusive(self):
+        occurrences = days(expand(series("daily", "2026-01-01"), date(2026, 1, 3), date(2026, 1, 5)))
+        assert occurrences == [date(2026, 1, 3), date(2026, 1, 4), date(2026, 1, 5)]
+
+    def test_recurrence_end_date_and_future_start(self):
+        assert days(expand(series("biweekly", "2026-01-01", end="2026-01-20"), date(2026, 1, 1), date(2026, 3, 1))) \
+            == [date(2026, 1, 1), date(2026, 1, 15)]
+        assert days(expand(series("weekly", "2026-05-01"), date(2026, 1, 1), date(2026, 3, 1))) == []
+
+    def test_quarterly_and_yearly(self):
+        assert days(expand(series("quarterly", "2025-11-30"), date(2026, 1, 1), date(2026, 12, 31))) == \
+            [date(2026, 2, 28), date(2026, 5, 30), date(2026, 8, 30), date(2026, 11, 30)]
+        assert days(expand(series("yearly", "2024-02-29"), date(2025, 1, 1), date(2028, 12, 31))) == \
+            [date(2025, 2, 28), date(2026, 2, 28), date(2027, 2, 28), date(2028, 2, 29)]
+
+    def test_skipped_occurrences(self):
+        skip = {("p1", date(2026, 1, 12))}
+        occurrences = days(expand(series("weekly", "2026-01-05"), date(2026, 1, 1), date(2026, 1, 20), skip))
+        assert occurrences == [date(2026, 1, 5), date(2026, 1, 19)]
+
+    def test_unknown_pattern_yields_nothing(self):
+        assert days(expand(series(None, "2026-01-05"), date(2026, 1, 1), date(2026, 1, 20))) == []
+
+
+class TestMergedSchedule:
+    """One-time bookings and series in date order"""
+
+    def test_materialized_child_replaces_generated_occurrence(self):
+        one_time = [
+            {"id": "b2", "scheduled_date": "2026-01-14"},
+            {"id": "c1", "scheduled_date": "2026-01-12", "parent_booking_id": "p1"},
+        ]
+        merged = list(merged_schedule(one_time, [series("weekly", "2026-01-05")], date(2026, 1, 1), date(2026, 1, 20)))
+        assert [(day, booking["id"]) for day, booking in merged] == [
+            (date(2026, 1, 5), "p1"),
+            (date(2026, 1, 12), "c1"),
+            (date(2026, 1, 14), "b2"),
+            (date(2026, 1, 19), "p1"),
+        ]
@@ -0,0 +1,115 @@
+"""
+Unit tests for relative dates: parse_date() and parse_period() in tools/database.py
+and the current date the agent gives the model with every request.
+
+Run with: pytest evaluations/test_relative_dates.py -v
+"""
+
+import asyncio
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import tools.database as database
+from tools.database import parse_date, parse_period
+
+# A Wednesday
+TODAY = date(2026, 1, 14)
+
+
+class FixedDate(date):
+    @classmethod
+    def today(cls):
+        return TODAY
+
+
+@pytest.fixture
+def fixed_today(monkeypatch):
+    monkeypatch.setattr(database, "date", FixedDate)
+
+
+class TestParseDate:
+    """Dates the model passes to the scheduling tools"""
+
+    def test_iso_dates_and_relative_words(self, fixed_today):
+        assert parse_date("2026-02-03") == date(2026, 2, 3)
+        assert parse_date(" Today ") == TODAY
+        assert parse_date("tomorrow") == date(2026, 1, 15)
+        assert parse_date("yesterday") == date(2026, 1, 13)
+        assert parse_date(None, default=TODAY) == TODAY
+
+    def test_weekday_is_the_next_occurrence(self, fixed_today):
+        assert parse_date("friday") == date(2026, 1, 16)
+        assert parse_date("Tue") == date(2026, 1, 20)
+        assert parse_date("wednesday") == TODAY
+        assert parse_date("this monday") == date(2026, 1, 19)
+
+    def test_next_weekday_is_in_next_week(self, fixed_today):
+        assert parse_date("next tuesday") == date(2026, 1, 20)
+        assert parse_date("next  Friday") == date(2026, 1, 23)
+        assert parse_date("next wednesday") == date(2026, 1, 21)
+
+    def test_last_weekday_is_before_today(self, fixed_today):
+        assert parse_date("last wednesday") == date(2026, 1, 7)
+        assert parse_date("last monday") == date(2026, 1, 12)
+
+    def test_unknown_words_are_rejected(self, fixed_today):
+        with pytest.raises(ValueError):
+            parse_date("someday")
+        with pytest.raises(ValueError):
+            parse_date("after tuesday")
+
+
+class TestParsePeriod:
+    """Calendar periods for the date-range tools"""
+
+    def test_weeks_run_monday_to_sunday(self, fixed_today):
+        assert parse_period("this_week") == (date(2026, 1, 12), date(2026, 1, 18))
+        assert parse_period("next_week") == (date(2026, 1, 19), date(2026, 1, 25))
+        assert parse_period("Last Week") == (date(2026, 1, 5), date(2026, 1, 11))
+
+    def test_months_cross_year_boundaries(self, fixed_today):
+        assert parse_period("this_month") == (date(2026, 1, 1), date(2026, 1, 31))
+        assert parse_period("next-month") == (date(2026, 2, 1), date(2026, 2, 28))
+        assert parse_period("last_month") == (date(2025, 12, 1), date(2025, 12, 31))
+
+    def test_unknown_period_is_rejected(self, fixed_today):
+        with pytest.raises(ValueError):
+            parse_period("next_year")
+        with pytest.raises(ValueError):
+            parse_period("soon")
+
+
+class TestTodayPrompt:
+    """The model is told the current date on every request"""
+
+    def test_prompt_names_weekday_and_date(self):
+        assert "Wednesday, 2026-01-14" in main.today_prompt(TODAY)
+
+    def test_respond_sends_todays_date(self, monkeypatch):
+        sent = []
+
+        class Stop(Exception):
+            pass
+
+        async def create_completion(client, messages, stage="llm", **params):
+            sent.append(messages)
+            raise Stop()
+
+        monkeypatch.setattr(main, "create_completion", create_completion)
+        monkeypatch.setattr(main, "get_inference_client", lambda: None)
+        monkeypatch.setattr(main, "init_database_tool", lambda: None)
+
+        async def run():
+            async for _ in main.respond({"messages": [{"role": "user", "content": "Is Unit 102 free Tuesday?"}]}, {}):
+                pass
+
+        with pytest.raises(Stop):
+            asyncio.run(run())
+        system = [m["content"] for m in sent[0] if m["role"] == "system"]
+        assert main.today_prompt(date.today()) in system
@@ -0,0 +1,123 @@
+"""
+Unit tests for DatabaseTool.get_route_stops (stop order and ETAs) against a stubbed client.
+
+Run with: pytest evaluations/test_route_stops.py -v
+"""
+
+import os
+import sys
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.database import DatabaseTool
+
+
+class StubQuery:
+    """The query-builder calls get_route_stops makes; `or_` is treated as matching every row."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._limit = None
+
+    def select(self, columns):
+        return self
+
+    def or_(self, filters):
+        return self
+
+    def eq(self, column, value):
+        self.rows = [r for r in self.rows if r.get(column) == value]
+        return self
+
+    def neq(self, column, value):
+        self.rows = [r for r in self.rows if r.get(column) != value]
+        return self
+
+    def in_(self, column, values):
+        self.rows = [r for r in self.rows if r.get(column) in values]
+        return self
+
+    def order(self, column, desc=False):
+        self.rows = sorted(self.rows, key=lambda r: r.get(column), reverse=desc)
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def execute(self):
+        rows = self.rows[:self._limit] if self._limit is not None else self.rows
+        return type("Response", (), {"data": [dict(r) for r in rows]})()
+
+
+class StubClient:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, name):
+        return StubQuery(self.tables.get(name, []))
+
+
+def tool(route, bookings):
+    db = DatabaseTool.__new__(DatabaseTool)
+    db.client = StubClient({"routes": [route], "bookings": bookings, "vehicles": []})
+    db._query_timestamps = []
+    return db
+
+
+def route(stop_sequence=None, legs=(), start="08:00:00"):
+    # A fresh id per test keeps the per-route-revision cache out of the way
+    return {"id": str(uuid.uuid4()), "route_name": "North Loop", "route_code": "R-1", "route_date": "2026-01-14",
+            "status": "planned", "planned_start_time": start, "stop_sequence": stop_sequence,
+            "updated_at": "2026-01-13T00:00:00+00:00",
+            "route_geometry": {"legs": [{"duration": d} for d in legs]}}
+
+
+def booking(id, minutes=None, route_id=None, stop_order=None):
+    return {"id": id, "booking_number": f"BK-{id}", "status": "confirmed", "estimated_duration_minutes": minutes,
+            "route_id": route_id, "stop_order": stop_order, "locations": {"name": id, "city": "Springfield"}}
+
+
+def times(result):
+    return [(s["booking_number"], s["eta"], s["departure"]) for s in result["stops"]]
+
+
+class TestRouteStops:
+    """Stop order and ETA accumulation"""
+
+    def test_stop_sequence_order_with_a_leg_per_stop(self):
+        r = route(stop_sequence=["b3", "b1", "missing", "b2"], legs=["600s", "900s", "300s"])
+        result = tool(r, [booking("b1", 45), booking("b2"), booking("b3", 30)]).get_route_stops("north")
+        # Departure point first: every stop, including the first, is reached by a leg
+        assert times(result) == [
+            ("BK-b3", "08:10", "08:40"),
+            ("BK-b1", "08:55", "09:40"),
+            ("BK-b2", "09:45", "10:15"),
+        ]
+        assert [s["stop"] for s in result["stops"]] == [1, 2, 3]
+        assert result["total_stops"] == 3
+        assert result["total_travel_minutes"] == 30
+
+    def test_first_stop_is_the_origin_with_one_leg_fewer(self):
+        r = route(stop_sequence=["b1", "b2", "b3"], legs=["600s", 900], start="09:30")
+        result = tool(r, [booking("b1", 20), booking("b2", 20), booking("b3", 20)]).get_route_stops("north")
+        assert times(result) == [
+            ("BK-b1", "09:30", "09:50"),
+            ("BK-b2", "10:00", "10:20"),
+            ("BK-b3", "10:35", "10:55"),
+        ]
+        assert result["planned_start_time"] == "09:30"
+
+    def test_stop_order_when_the_route_has_no_sequence(self):
+        r = route()
+        bookings = [booking("b2", route_id=r["id"], stop_order=2), booking("b1", route_id=r["id"], stop_order=1),
+                    booking("other", route_id="another-route", stop_order=0)]
+        result = tool(r, bookings).get_route_stops("north")
+        assert times(result) == [("BK-b1", "08:00", "08:30"), ("BK-b2", "08:30", "09:00")]
+        assert result["total_travel_minutes"] == 0
+
+    def test_route_without_stops(self):
+        result = tool(route(), []).get_route_stops("north")
+        assert result["stops"] == []
+        assert result["message"] == "This route has no stops."
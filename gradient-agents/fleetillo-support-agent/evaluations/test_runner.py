@@ -0,0 +1,129 @@
+"""
+Unit tests for evaluations/runner.py scoring and reporting (no agent or judge calls).
+
+Run with: pytest evaluations/test_runner.py -v
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import runner
+
+
+def row(category, **scores):
+    return {"category": category, "metrics": {m: {"score": s} for m, s in scores.items()}}
+
+
+class TestDeterministicScores:
+    """Local checks on one response"""
+
+    def test_rouge1(self):
+        assert runner.rouge1("There are 4 active customers.", "There are 4 active customers in the system.") == \
+            pytest.approx(2 * 1.0 * (5 / 8) / (1.0 + 5 / 8))
+        assert runner.rouge1("Nothing shared", "entirely different") == 0.0
+
+    def test_scores_present_only_for_configured_checks(self):
+        case = {"category": "tool_execution", "expected_contains": ["4", "customers"],
+                "forbidden_patterns": ["error"], "expected_response": "There are 4 active customers."}
+        scores = runner.deterministic_scores(case, "There are 4 active customers.")
+        assert scores == {
+            "expected_content": {"score": 1.0},
+            "no_forbidden_patterns": {"score": 1.0},
+            "no_tool_syntax": {"score": 1.0},
+            "response_match": {"score": 1.0},
+        }
+
+    def test_not_found_cases_accept_any_phrasing(self):
+        case = {"category": "anti_hallucination", "expected_contains": ["couldn't find", "no customer"],
+                "forbidden_fabrications": ["@"]}
+        scores = runner.deterministic_scores(case, "I couldn't find a customer named mcburgers.")
+        assert scores["expected_content"]["score"] == 1.0
+        assert scores["no_fabrication"]["score"] == 1.0
+        strict = dict(case, category="tool_execution")
+        assert runner.deterministic_scores(strict, "I couldn't find them.")["expected_content"]["score"] == 0.0
+
+    def test_tool_syntax_is_flagged(self):
+        scores = runner.deterministic_scores({"category": "no_leakage"}, 'Let me check. {"type": "function"}')
+        assert scores["no_tool_syntax"]["score"] == 0.0
+
+
+class TestSummarize:
+    """Per-metric means against thresholds"""
+
+    def test_threshold_is_inclusive(self):
+        rows = [row("tool_execution", correctness=0.8, response_match=0.69),
+                row("tool_execution", correctness=0.8, response_match=0.71)]
+        summary = runner.summarize(rows, ["correctness", "response_match"])
+        assert summary["correctness"]["passed"] is True
+        assert summary["response_match"]["mean"] == 0.7
+        assert summary["response_match"]["passed"] is True
+
+    def test_one_miss_fails_a_strict_metric(self):
+        rows = [row("no_leakage", no_tool_syntax=1.0), row("response_quality", no_tool_syntax=0.0)]
+        summary = runner.summarize(rows, ["no_tool_syntax"])["no_tool_syntax"]
+        assert (summary["mean"], summary["threshold"], summary["passed"]) == (0.5, 1.0, False)
+        assert summary["by_category"] == {"no_leakage": 1.0, "response_quality": 0.0}
+
+    def test_unscored_cases_are_left_out(self):
+        rows = [row("tool_execution", safety=1.0), row("tool_execution", safety=None), row("tool_execution")]
+        summary = runner.summarize(rows, ["safety", "correctness"])
+        assert list(summary) == ["safety"]
+        assert summary["safety"]["cases"] == 1
+
+
+class TestJudge:
+    """Verdict parsing and the on-disk cache"""
+
+    def client(self, reply):
+        async def create(**kwargs):
+            async def chunks():
+                for part in (reply[:10], reply[10:]):
+                    yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+            return chunks()
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    def test_score_is_clamped(self):
+        verdict = asyncio.run(runner.judge(self.client('Sure: {"score": 1.4, "reason": "ok"}'),
+                                           "correctness", "q", None, "r"))
+        assert verdict == {"score": 1.0, "reason": "ok"}
+
+    def test_unparseable_reply_raises(self):
+        with pytest.raises(ValueError):
+            asyncio.run(runner.judge(self.client("I'd give it a nine"), "safety", "q", None, "r"))
+
+    def test_cache_round_trip_and_key(self, tmp_path):
+        path = str(tmp_path / "results" / "judge-cache.json")
+        key = runner.JudgeCache.key("correctness", "q", "expected", "response")
+        assert key.startswith("correctness:")
+        assert key != runner.JudgeCache.key("correctness", "q", "expected", "response!")
+        cache = runner.JudgeCache(path)
+        cache.put(key, {"score": 0.9, "reason": "close"})
+        cache.save()
+        reloaded = runner.JudgeCache(path)
+        assert reloaded.get(key) == {"score": 0.9, "reason": "close"}
+        assert reloaded.get("safety:missing") is None
+        assert (reloaded.hits, reloaded.misses) == (1, 1)
+
+    def test_cached_jobs_are_not_judged_again(self, tmp_path):
+        cache = runner.JudgeCache(str(tmp_path / "judge-cache.json"))
+        cache.put(runner.JudgeCache.key("safety", "q", None, "r"), {"score": 1.0, "reason": "fine"})
+        jobs = [{"metric": "safety", "query": "q", "expected": None, "response": "r"} for _ in range(2)]
+        asyncio.run(runner.judge_all(jobs, cache, concurrency=2))
+        assert [job["result"] for job in jobs] == [{"score": 1.0, "reason": "fine", "cached": True}] * 2
+
+
+class TestCases:
+    def test_cases_join_the_dataset(self):
+        cases = runner.load_cases()
+        assert len(cases) == len(runner.TEST_CASES)
+        assert all(case["body"]["messages"] for case in cases)
+        assert any(case["expected_response"] for case in cases)
+
+    def test_body_key_ignores_key_order(self):
+        assert runner.body_key({"a": 1, "b": [2]}) == runner.body_key({"b": [2], "a": 1})
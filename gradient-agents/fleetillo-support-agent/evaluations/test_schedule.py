@@ -0,0 +1,112 @@
+"""
+Unit tests for tools/schedule.py (per-vehicle booking interval index).
+
+Run with: pytest evaluations/test_schedule.py -v
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.schedule import ScheduleIndex, format_minutes, to_minutes
+
+DAY = "2026-01-14"
+
+
+def booking(number, start, end=None, vehicle="v1", day=DAY, duration=None):
+    return {
+        "booking_number": number,
+        "status": "scheduled",
+        "scheduled_date": day,
+        "scheduled_start_time": start,
+        "scheduled_end_time": end,
+        "estimated_duration_minutes": duration,
+        "routes": {"vehicle_id": vehicle, "vehicles": {"name": f"Unit {vehicle}"}},
+    }
+
+
+def numbers(hits):
+    return [hit["booking_number"] for hit in hits]
+
+
+class TestTimeParsing:
+    def test_to_minutes_and_back(self):
+        assert to_minutes("09:30") == 570
+        assert to_minutes("14:05:59") == 845
+        assert to_minutes(None) is None
+        assert format_minutes(570) == "09:30"
+
+
+class TestOverlapping:
+    """Queries are half-open: [start, end)"""
+
+    def setup_method(self):
+        self.index = ScheduleIndex()
+        self.index.add_bookings([
+            booking("A", "09:00", "10:00"),
+            booking("B", "11:00", "12:00"),
+            booking("C", "08:00", "13:00", vehicle="v2"),
+        ])
+
+    def test_touching_intervals_do_not_overlap(self):
+        assert numbers(self.index.overlapping("v1", DAY, to_minutes("10:00"), to_minutes("11:00"))) == []
+        assert numbers(self.index.overlapping("v1", DAY, to_minutes("08:00"), to_minutes("09:00"))) == []
+
+    def test_one_minute_into_a_booking_overlaps(self):
+        assert numbers(self.index.overlapping("v1", DAY, to_minutes("09:59"), to_minutes("10:30"))) == ["A"]
+        assert numbers(self.index.overlapping("v1", DAY, to_minutes("10:30"), to_minutes("11:01"))) == ["B"]
+
+    def test_window_spanning_several_bookings(self):
+        assert numbers(self.index.overlapping("v1", DAY, to_minutes("08:00"), to_minutes("18:00"))) == ["A", "B"]
+        assert numbers(self.index.overlapping("v1", DAY, to_minutes("09:15"), to_minutes("09:45"))) == ["A"]
+
+    def test_long_booking_found_behind_later_starts(self):
+        index = ScheduleIndex()
+        index.add_bookings([booking("long", "08:00", "17:00"), booking("short", "09:00", "09:30")])
+        assert numbers(index.overlapping("v1", DAY, to_minutes("16:00"), to_minutes("16:30"))) == ["long"]
+
+    def test_other_vehicles_and_days_are_separate(self):
+        assert numbers(self.index.overlapping("v2", DAY, to_minutes("10:00"), to_minutes("11:00"))) == ["C"]
+        assert self.index.overlapping("v1", "2026-01-15", 0, 24 * 60) == []
+
+
+class TestConflicts:
+    """Pairs of overlapping bookings for one vehicle and day"""
+
+    def test_back_to_back_bookings_are_not_conflicts(self):
+        index = ScheduleIndex()
+        index.add_bookings([booking("A", "09:00", "10:00"), booking("B", "10:00", "11:00")])
+        assert index.conflicts("v1", DAY) == []
+
+    def test_overlap_minutes(self):
+        index = ScheduleIndex()
+        index.add_bookings([
+            booking("A", "09:00", "11:00"),
+            booking("B", "10:30", "12:00"),
+            booking("C", "10:45", "10:50"),
+        ])
+        pairs = [(p["first"]["booking_number"], p["second"]["booking_number"], p["overlap_minutes"])
+                 for p in index.conflicts("v1", DAY)]
+        assert sorted(pairs) == [("A", "B", 30), ("A", "C", 5), ("B", "C", 5)]
+
+    def test_bookings_added_in_batches_are_merged(self):
+        index = ScheduleIndex()
+        index.add_bookings([booking("A", "09:00", "10:00")])
+        index.add_bookings([booking("B", "09:30", "10:30")])
+        assert len(index.conflicts("v1", DAY)) == 1
+
+
+class TestDurations:
+    def test_missing_end_uses_estimate_then_default(self):
+        index = ScheduleIndex(default_duration_minutes=45)
+        index.add_bookings([
+            booking("A", "09:00", duration=90),
+            booking("B", "13:00", end="12:00"),
+            booking("C", None),
+            {"booking_number": "D", "scheduled_date": DAY, "scheduled_start_time": "09:00", "routes": None},
+        ])
+        assert index.demanded_minutes("v1", DAY) == 135
+        assert numbers(index.overlapping("v1", DAY, to_minutes("10:29"), to_minutes("10:30"))) == ["A"]
+        assert index.untimed == 1
+        assert index.vehicle_names == {"v1": "Unit v1"}
@@ -0,0 +1,117 @@
+"""
+Unit tests for tools/services.py (the in-memory services catalog).
+
+Run with: pytest evaluations/test_services.py -v
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.services import ServiceCatalog
+
+
+class StubServices:
+    """Just enough of the supabase client for catalog refreshes: the version poll and the full load."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.loads = 0
+
+    def table(self, name):
+        self._count = None
+        return self
+
+    def select(self, columns, count=None):
+        self._count = count
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, n):
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def is_(self, column, value):
+        return self
+
+    def execute(self):
+        if self._count:
+            newest = max(self.rows, key=lambda r: r["updated_at"]) if self.rows else None
+            return type("Response", (), {"data": [newest] if newest else [], "count": len(self.rows)})()
+        self.loads += 1
+        return type("Response", (), {"data": [dict(r) for r in self.rows]})()
+
+
+def service(name, code, service_type="maintenance", updated="2026-01-01T00:00:00+00:00"):
+    return {"name": name, "code": code, "service_type": service_type, "average_duration_minutes": 60,
+            "base_price": "120.00", "equipment_required": ["jetter"], "updated_at": updated}
+
+
+def names(services):
+    return [s.name for s in services]
+
+
+class TestServiceCatalog:
+    """Lookups and change detection"""
+
+    def setup_method(self):
+        self.client = StubServices([
+            service("Drain Cleaning", "DRN-01"),
+            service("Grease Trap Pumping", "GTP-02", service_type="pumping"),
+            service("Septic Inspection", "SEP-03", service_type="inspection"),
+        ])
+        self.catalog = ServiceCatalog()
+        self.catalog.refresh(self.client)
+
+    def expire(self):
+        self.catalog._last_poll = time.monotonic() - ServiceCatalog.REFRESH_SECONDS
+
+    def test_exact_name_or_code(self):
+        assert names(self.catalog.lookup("drain cleaning")) == ["Drain Cleaning"]
+        [trap] = self.catalog.lookup(" gtp-02 ")
+        assert trap.name == "Grease Trap Pumping"
+        assert trap.base_price == 120.0
+        assert trap.equipment_required == ("jetter",)
+
+    def test_substring_then_close_spelling(self):
+        assert names(self.catalog.lookup("pump")) == ["Grease Trap Pumping"]
+        assert names(self.catalog.lookup("septic inspectoin")) == ["Septic Inspection"]
+
+    def test_empty_query_lists_the_catalog(self):
+        assert len(self.catalog.lookup("", limit=2)) == 2
+
+    def test_not_found(self):
+        assert self.catalog.lookup("roof repair") == []
+
+    def test_unchanged_table_is_not_reloaded(self):
+        self.expire()
+        self.catalog.refresh(self.client)
+        assert self.client.loads == 1
+
+    def test_polls_at_most_every_refresh_seconds(self):
+        self.client.rows.append(service("Hydro Jetting", "HYD-04"))
+        self.catalog.refresh(self.client)
+        assert self.client.loads == 1
+        assert self.catalog.lookup("hydro jetting") == []
+
+    def test_newer_updated_at_reloads(self):
+        self.client.rows[0] = service("Drain Cleaning", "DRN-01", updated="2026-02-01T00:00:00+00:00")
+        self.client.rows[0]["base_price"] = "150.00"
+        self.expire()
+        self.catalog.refresh(self.client)
+        assert self.client.loads == 2
+        assert self.catalog.lookup("DRN-01")[0].base_price == 150.0
+
+    def test_changed_row_count_reloads(self):
+        # A deleted row leaves the newest updated_at unchanged; only the count moves
+        del self.client.rows[2]
+        self.expire()
+        self.catalog.refresh(self.client)
+        assert self.client.loads == 2
+        assert names(self.catalog.all()) == ["Drain Cleaning", "Grease Trap Pumping"]
@@ -0,0 +1,127 @@
+"""
+Unit tests for tools/singleflight.py (request coalescing for tool queries).
+
+Run with: pytest evaluations/test_singleflight.py -v
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.cache import TTLCache
+from tools.singleflight import SingleFlight, make_key
+
+
+class TestSingleFlight:
+    """Coalescing of concurrent identical calls"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        runs = []
+
+        async def query():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return {"rows": [1, 2]}
+
+        async def scenario():
+            return await asyncio.gather(*(flight.do("k", query) for _ in range(5)))
+
+        results = asyncio.run(scenario())
+        assert results == [{"rows": [1, 2]}] * 5
+        assert len(runs) == 1
+        assert flight.stats()["coalesced"] == 4
+
+    def test_cancelled_leader_does_not_fail_followers(self):
+        flight = SingleFlight()
+        runs = []
+
+        async def scenario():
+            release = asyncio.Event()
+
+            async def query():
+                runs.append(1)
+                await release.wait()
+                return "result"
+
+            leader = asyncio.ensure_future(flight.do("k", query))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do("k", query))
+            await asyncio.sleep(0)
+
+            leader.cancel()
+            await asyncio.sleep(0)
+            release.set()
+            return leader, await follower
+
+        leader, follower_result = asyncio.run(scenario())
+        assert leader.cancelled()
+        assert follower_result == "result"
+        assert len(runs) == 1
+
+    def test_error_reaches_every_caller_and_is_not_cached(self):
+        flight = SingleFlight(cache=TTLCache(ttl_seconds=60))
+        runs = []
+
+        async def failing():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def scenario():
+            return await asyncio.gather(*(flight.do("k", failing) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(r, ValueError) for r in results)
+        with pytest.raises(ValueError):
+            asyncio.run(flight.do("k", failing))
+        assert len(runs) == 2
+
+    def test_successful_result_is_cached(self):
+        flight = SingleFlight(cache=TTLCache(ttl_seconds=60))
+        runs = []
+
+        async def query():
+            runs.append(1)
+            return {"success": True}
+
+        asyncio.run(flight.do("k", query))
+        assert asyncio.run(flight.do("k", query)) == {"success": True}
+        assert len(runs) == 1
+        assert flight.stats()["cache_hits"] == 1
+
+    def test_error_results_are_not_cached(self):
+        flight = SingleFlight(cache=TTLCache(ttl_seconds=60))
+
+        async def query():
+            return {"error": "unavailable"}
+
+        asyncio.run(flight.do("k", query))
+        asyncio.run(flight.do("k", query))
+        assert flight.stats()["executions"] == 2
+
+
+class TestMakeKey:
+    """Normalization of tool arguments into coalescing keys"""
+
+    def test_argument_order_and_whitespace_are_ignored(self):
+        assert make_key("search_customers", {"query": "  Acme   Corp "}) == \
+            make_key("search_customers", {"query": "Acme Corp"})
+        assert make_key("get_bookings_summary", {"start_date": "2026-01-01", "end_date": "2026-01-07"}) == \
+            make_key("get_bookings_summary", {"end_date": "2026-01-07", "start_date": "2026-01-01"})
+
+    def test_empty_values_are_dropped(self):
+        assert make_key("list_vehicles", {"status": ""}) == make_key("list_vehicles", {})
+        assert make_key("list_vehicles", {"status": None}) == make_key("list_vehicles", None)
+
+    def test_case_is_kept_for_case_sensitive_filters(self):
+        assert make_key("list_customers", {"status": "Pending"}) != make_key("list_customers", {"status": "pending"})
+        assert make_key("list_vehicles", {"status": "IN_USE"}) != make_key("list_vehicles", {"status": "in_use"})
+
+    def test_case_is_ignored_where_the_tool_lowercases(self):
+        assert make_key("get_bookings_summary", {"status": "Pending", "start_date": "Today"}) == \
+            make_key("get_bookings_summary", {"status": "pending", "start_date": "today"})
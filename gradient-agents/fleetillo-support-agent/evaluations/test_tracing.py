@@ -0,0 +1,176 @@
+"""
+Unit tests for tools/tracing.py (spans, traceparent, sampling and exporters).
+
+Run with: pytest evaluations/test_tracing.py -v
+"""
+
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from tools.tracing import (
+    NOOP_SPAN, JsonlSink, SpanExporter, Tracer, current_ids, instrument_httpx_client,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class ListExporter:
+    """Collects finished spans in memory instead of batching them to a sink."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+def tracer(sample_rate=1.0):
+    return Tracer(ListExporter(), sample_rate)
+
+
+class TestSpans:
+    """Parenting through the context"""
+
+    def test_children_and_restore(self):
+        t = tracer()
+        with t.start_trace("request") as root:
+            with t.span("child") as child:
+                assert t.current() is child
+                assert current_ids() == {"trace_id": root.trace_id, "span_id": child.span_id}
+            assert t.current() is root
+        assert t.current() is NOOP_SPAN
+        assert child.parent_id == root.span_id and child.trace_id == root.trace_id
+        assert [s.name for s in t.exporter.spans] == ["child", "request"]
+
+    def test_parent_crosses_to_thread(self):
+        t = tracer()
+
+        def work():
+            with t.span("db.query") as span:
+                return span
+
+        async def run():
+            with t.start_trace("request") as root:
+                return root, await asyncio.to_thread(work)
+
+        root, child = asyncio.run(run())
+        assert child.parent_id == root.span_id
+        assert child.trace_id == root.trace_id
+
+    def test_error_is_recorded(self):
+        t = tracer()
+        try:
+            with t.start_trace("request"):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+        [span] = t.exporter.spans
+        assert span.to_dict()["status"] == "error"
+        assert span.error == "ValueError: boom"
+
+
+class TestTraceparent:
+    """Continuing a caller's trace"""
+
+    def test_sampled_parent_is_followed(self):
+        span = tracer(sample_rate=0.0).start_trace("request", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01")
+        assert span.sampled
+        assert (span.trace_id, span.parent_id) == (TRACE_ID, PARENT_ID)
+
+    def test_unsampled_parent_is_honoured(self):
+        assert tracer().start_trace("request", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-00") is NOOP_SPAN
+
+    def test_malformed_header_starts_a_new_trace(self):
+        span = tracer().start_trace("request", traceparent=f"00-{TRACE_ID}-xyz-01")
+        assert span.sampled and span.trace_id != TRACE_ID and span.parent_id is None
+
+    def test_outgoing_requests_become_child_spans(self):
+        t = tracer()
+        client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=[])))
+        instrument_httpx_client(client, t, "postgrest")
+        instrument_httpx_client(client, t, "postgrest")
+        with t.start_trace("request") as root:
+            client.get("http://db.test/rest/v1/vehicles?name=ilike.%25van%25")
+        http, _ = t.exporter.spans
+        assert http.name == "postgrest" and http.parent_id == root.span_id
+        assert http.attributes["http.query"] == "name=ilike.%van%"
+        assert http.attributes["http.status_code"] == 200
+
+
+class TestSampling:
+    def test_rate_zero_samples_nothing(self):
+        t = tracer(sample_rate=0.0)
+        assert not t.enabled
+        with t.start_trace("request") as root:
+            assert root is NOOP_SPAN
+            assert t.span("child") is NOOP_SPAN
+            assert current_ids() == {}
+        assert t.exporter.spans == []
+
+    def test_no_exporter_is_disabled(self):
+        t = Tracer(None, 1.0)
+        assert not t.enabled
+        assert t.start_trace("request") is NOOP_SPAN
+
+
+class TestJsonlExporter:
+    def test_flush_writes_one_line_per_span(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        exporter = SpanExporter(JsonlSink(str(path)), flush_seconds=3600)
+        t = Tracer(exporter)
+        with t.start_trace("request", session_id="s1") as root:
+            with t.span("tool", tool="list_vehicles") as tool:
+                tool.event("cache_hit")
+        exporter.flush()
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["name"] for line in lines] == ["tool", "request"]
+        assert lines[0]["parent_span_id"] == root.span_id
+        assert lines[0]["attributes"] == {"tool": "list_vehicles"}
+        assert lines[0]["events"][0]["name"] == "cache_hit"
+        assert exporter.stats() == {"exported": 2, "dropped": 0, "failed": 0, "queued": 0}
+
+    def test_full_queue_drops_instead_of_blocking(self, tmp_path):
+        exporter = SpanExporter(JsonlSink(str(tmp_path / "traces.jsonl")), flush_seconds=3600, max_queue=1)
+        t = Tracer(exporter)
+        for _ in range(3):
+            with t.start_trace("request"):
+                pass
+        assert exporter.stats()["dropped"] == 2
+
+
+class TestCreateCompletion:
+    def test_trace_ids_are_stripped_from_messages(self, monkeypatch):
+        sent = []
+
+        async def create(messages, stream, **params):
+            sent.append(messages)
+
+            async def chunks():
+                yield SimpleNamespace(choices=[], usage=None)
+            return chunks()
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        monkeypatch.setattr(main, "TRACER", tracer())
+        monkeypatch.setattr(main, "LLM_FANOUT_ENABLED", False)
+        monkeypatch.setattr(main.LLM_CASSETTE, "mode", "off")
+        messages = [
+            {"role": "user", "content": "Which trucks are out?"},
+            {"role": "tool", "tool_call_id": "c1", "content": "[]", "trace_id": TRACE_ID, "span_id": PARENT_ID},
+        ]
+
+        async def run():
+            stream = await main.create_completion(client, messages, model="m")
+            return [c async for c in stream]
+
+        asyncio.run(run())
+        assert sent == [[messages[0], {"role": "tool", "tool_call_id": "c1", "content": "[]"}]]
+        assert "trace_id" in messages[1]
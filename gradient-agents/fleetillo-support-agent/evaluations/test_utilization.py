@@ -0,0 +1,72 @@
+"""
+Unit tests for tools/utilization.py (per-vehicle utilization over a window).
+
+Run with: pytest evaluations/test_utilization.py -v
+"""
+
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.utilization import WORKDAY_MINUTES, vehicle_utilization, working_days
+
+# Monday 2026-01-12 to Sunday 2026-01-18: five working days
+START, END = date(2026, 1, 12), date(2026, 1, 18)
+
+
+def route(vehicle, day, planned, distance=10, started=None, ended=None):
+    return {"vehicle_id": vehicle, "route_date": day, "total_duration_minutes": planned,
+            "total_distance_km": distance, "actual_start_time": started, "actual_end_time": ended}
+
+
+class TestWorkingDays:
+    def test_weekdays_inclusive(self):
+        assert working_days(START, END) == 5
+        assert working_days(date(2026, 1, 17), date(2026, 1, 18)) == 0
+        assert working_days(date(2026, 1, 16), date(2026, 1, 16)) == 1
+
+
+class TestVehicleUtilization:
+    """Column-wise aggregation per vehicle"""
+
+    def test_actual_times_win_over_planned_duration(self):
+        routes = [
+            route("v1", "2026-01-12", 240, started="2026-01-12T08:00:00Z", ended="2026-01-12T16:00:00Z"),
+            route("v1", "2026-01-13", 240),
+            route("v1", "2026-01-13", 120, distance=5.5),
+        ]
+        bookings = [{"vehicle_id": "v1"}] * 4
+        [v1] = vehicle_utilization(routes, bookings, START, END, {"v1": "Unit 1"})
+        assert v1["vehicle"] == "Unit 1"
+        assert v1["worked_hours"] == 14.0
+        assert v1["actual_hours"] == 8.0
+        assert v1["planned_hours"] == 10.0
+        assert v1["utilization_pct"] == round(14 * 60 / (5 * WORKDAY_MINUTES) * 100, 1)
+        assert v1["active_days"] == 2
+        assert v1["routes"] == 3
+        assert v1["completed_bookings"] == 4
+        assert v1["distance_km"] == 25.5
+        # Daily minutes are 480 and 360: the median is their midpoint
+        assert v1["daily_hours_p50"] == 7.0
+
+    def test_idle_vehicles_are_reported(self):
+        rows = vehicle_utilization([route("v1", "2026-01-12", 60)], [], START, END, {"v1": "Unit 1", "v2": "Unit 2"})
+        idle = next(r for r in rows if r["vehicle_id"] == "v2")
+        assert idle["utilization_pct"] == 0.0
+        assert idle["active_days"] == 0
+        assert idle["daily_hours_p50"] is None
+
+    def test_backwards_actual_times_fall_back_to_planned(self):
+        routes = [route("v1", "2026-01-12", 90, started="2026-01-12T16:00:00Z", ended="2026-01-12T08:00:00Z")]
+        [v1] = vehicle_utilization(routes, [], START, END)
+        assert v1["worked_hours"] == 1.5
+        assert v1["actual_hours"] == 0.0
+
+    def test_weekend_only_window_has_no_capacity(self):
+        [v1] = vehicle_utilization([route("v1", "2026-01-17", 60)], [], date(2026, 1, 17), date(2026, 1, 18))
+        assert v1["utilization_pct"] is None
+
+    def test_no_vehicles(self):
+        assert vehicle_utilization([], [], START, END) == []
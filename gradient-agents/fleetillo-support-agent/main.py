@@ -5,9 +5,17 @@ A helpful assistant that guides Fleetillo users through the application.
 Provides answers about bookings, routes, customers, vehicles, and services.
 """
 
+import time
+
+# Start of module import, for the cold-start import time reported in metrics
+_IMPORT_STARTED = time.perf_counter()
+
 import os
-from typing import Dict, List
-from datetime import datetime
+import threading
+import weakref
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Dict, List, Optional
+from datetime import date, datetime
 import dotenv
 
 # Load environment variables
@@ -17,13 +25,103 @@ else:
     dotenv.load_dotenv()
 
 import json
-from gradient import AsyncGradient
+import asyncio
 from gradient_adk import entrypoint
-from tools.database import DatabaseTool
+from tools.cache import TTLCache
+from tools.singleflight import SingleFlight, make_key
+from tools.fanout import GenerationFanout, fingerprint
+from tools.cassette import StreamCassette
+from tools.history import HistoryToolIndex, ReuseCounter
+from tools.tracing import TRACER, current_ids
+from tools.metrics import METRICS, flatten_stats, mount_metrics, writer_from_env
+from tools.profiling import profiler_from_env
+
+# The model client and the data stack (supabase, numpy, ...) are imported on first use,
+# keeping them out of module import, /health and the ADK's startup validation
+if TYPE_CHECKING:
+    from gradient import AsyncGradient
+    from tools.database import DatabaseTool
 
 # Globals should be avoided for validation safety, but if used, ensure they don't crash on import.
 # We will instantiate db_tool inside main to be safe.
 
+# Shared by all concurrent invocations in this worker so identical in-flight tool queries
+# hit Supabase once. Results are only retained when TOOL_RESULT_CACHE_TTL (seconds) is set.
+_tool_cache_ttl = float(os.environ.get("TOOL_RESULT_CACHE_TTL", "0") or 0)
+TOOL_SINGLE_FLIGHT = SingleFlight(
+    cache=TTLCache(ttl_seconds=_tool_cache_ttl) if _tool_cache_ttl > 0 else None
+)
+
+# Opt-in: equivalent concurrent completions (same normalized messages, tool results and
+# model parameters) share one streamed generation instead of each paying for its own.
+LLM_FANOUT_ENABLED = os.environ.get("LLM_FANOUT_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_FANOUT = GenerationFanout()
+
+# Record/replay of streamed completions so evaluations can run without the model.
+# LLM_CASSETTE_MODE is off, record, replay or auto; LLM_CASSETTE_SPEED 0 replays instantly.
+LLM_CASSETTE = StreamCassette(
+    path=os.environ.get(
+        "LLM_CASSETTE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "evaluations", "cassettes", "llm.jsonl.gz"),
+    ),
+    mode=os.environ.get("LLM_CASSETTE_MODE", "off").lower(),
+    speed=float(os.environ.get("LLM_CASSETTE_SPEED", "0") or 0),
+)
+
+# Per-invocation counters for callers that want them (the evaluation suites set a dict here
+# before driving main() and read llm_calls/tool_calls afterwards); untouched otherwise
+REQUEST_STATS: ContextVar[Optional[Dict[str, int]]] = ContextVar("request_stats", default=None)
+
+# Tool calls answered from results already present in the conversation history
+HISTORY_REUSE = ReuseCounter()
+
+# Worker metrics, served at GET /metrics and written to METRICS_FILE when that is set
+REQUESTS = METRICS.counter("requests_total", "Agent invocations by outcome (ok, error, cancelled)", ["outcome"])
+REQUESTS_IN_FLIGHT = METRICS.gauge("requests_in_flight", "Agent invocations currently streaming")
+REQUEST_SECONDS = METRICS.histogram("request_duration_seconds", "Wall time of one agent invocation")
+LLM_CALLS = METRICS.counter("llm_calls_total", "Chat completions started, by stage", ["stage"])
+LLM_CALLS_PER_REQUEST = METRICS.histogram(
+    "llm_calls_per_request", "Chat completions per agent invocation", buckets=(0, 1, 2, 3, 4)
+)
+LLM_TOKENS = METRICS.counter(
+    "llm_tokens_total",
+    "Tokens by stage and direction; source is usage when the stream reports it, else estimate (4 chars/token)",
+    ["stage", "direction", "source"],
+)
+LLM_TTFT_SECONDS = METRICS.histogram("llm_ttft_seconds", "Time to the first streamed chunk, by stage", ["stage"])
+LLM_SECONDS = METRICS.histogram("llm_duration_seconds", "Time until the stream is drained, by stage", ["stage"])
+TOOL_CALLS = METRICS.counter("tool_calls_total", "Tool calls by tool and outcome (executed, reused, error)",
+                             ["tool", "outcome"])
+TOOL_SECONDS = METRICS.histogram("tool_duration_seconds", "Tool call latency including coalescing waits", ["tool"])
+# Every fallback hit is a routing completion whose tool call had to be recovered from text
+FALLBACKS = METRICS.counter(
+    "fallback_total",
+    "Tool calls recovered from model text instead of a native tool call, by fallback path",
+    ["path"],
+)
+METRICS.add_collector(lambda: {
+    "runtime_stat": ("Shared optimization counters from get_runtime_stats()", flatten_stats(get_runtime_stats())),
+})
+METRICS_FILE_WRITER = writer_from_env(METRICS)
+
+# Opt-in sampling profiles of single invocations, requested per call through context or
+# sampled with PROFILE_SAMPLE_RATE; written to PROFILE_DIR named by trace id
+PROFILER = profiler_from_env()
+
+# Worker cold start: module import, the optional background prewarm and the first invocation
+COLD_START: Dict[str, Optional[float]] = {"import_ms": None, "prewarm_ms": None, "first_request_ms": None}
+COLD_START_SECONDS = METRICS.gauge("cold_start_seconds", "Worker cold-start phases (import, prewarm, first_request)",
+                                   ["phase"])
+
+# Import the model client and data stack in the background once the server starts, so the
+# first request doesn't pay for them. AGENT_PREWARM=false keeps them fully lazy.
+AGENT_PREWARM = os.environ.get("AGENT_PREWARM", "true").lower() in ("1", "true", "yes")
+
+# Model clients keyed by event loop: created on first use, then reused for their connection pool.
+# A client built by prewarm() isn't bound to a loop yet and goes to the first loop that asks.
+_INFERENCE_CLIENTS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_PREWARMED_CLIENTS: List["AsyncGradient"] = []
+
 SYSTEM_PROMPT = """
 ROLE: You are Fleetillo Assistant, a helpful support agent for route optimization software used by service businesses.
 
@@ -38,6 +136,19 @@ You have access to a database tool that can query real-time data.
 - Use `search_customers` to find client details.
 - Use `list_active_routes` to see what's happening today.
 - Use `list_vehicles` to list vehicles, optionally filtering by status (e.g. 'active', 'available', 'in_use').
+- Use `get_booking_density` for "where are we busiest?" or "how many urgent jobs on the north side?" questions over a date range.
+- Use `get_route_progress` for "how far along is Route A?" or "distance left for Unit 103?".
+- Use `get_route_stops` for a route's stop list and when each stop will be reached (ETAs).
+- Use `find_schedule_conflicts` for double-booked or overloaded vehicles over a date range or a period such as `next_week`.
+- Use `check_vehicle_availability` for "is Unit 102 free Tuesday 2-4pm?" (pass the day as YYYY-MM-DD, resolved against TODAY, and times as 24h HH:MM).
+- Use `get_upcoming_schedule` for what is booked over the coming weeks/months, including recurring bookings, optionally for one customer.
+- Use `get_bookings_summary` for "how busy is next week?" style questions: per-day and per-status booking counts for a date range; pass `period` ("this_week", "next_week", "next_month", ...) for calendar weeks and months.
+- Use `get_maintenance_due` for vehicles overdue or coming due for maintenance, including overdue vehicles that still have bookings.
+- Use `get_vehicle_utilization` for "which trucks were underused last month?": per-vehicle worked hours and utilization over a date range (defaults to last month).
+- Use `get_customer_overview` for "tell me about <customer>": contact details, locations and upcoming bookings in one call.
+- Use `lookup_service` for questions about a service's duration, price, equipment or skills; call it without a query to list the whole catalog.
+- Use `find_booking` when the user quotes a booking number (e.g. BK-20260115-007) or text from a booking's instructions or notes.
+- Use `find_nearest_vehicles` when asked which vehicle/truck is closest to a site or customer. Mention when a position is stale.
 
 GUIDING PRINCIPLES:
 - Be helpful and concise - users are busy
@@ -128,7 +239,7 @@ Service Types:
 - installation
 - consultation
 
-Each service has:
+Use `lookup_service` for the actual catalog. Each service has:
 - Name and code
 - Duration estimate (average, min, max)
 - Base price
@@ -344,9 +455,555 @@ TOOLS_SCHEMA = [
                 "required": []
             }
         }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "find_nearest_vehicles",
+            "description": "Find the vehicles closest to a site, customer or coordinates (e.g. 'Which truck is closest to the Perkins site?'). Returns distance in km and flags stale positions.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "location_query": {
+                        "type": "string",
+                        "description": "Site, address or customer name to measure from (e.g. 'Perkins')"
+                    },
+                    "latitude": {
+                        "type": "number",
+                        "description": "Latitude to measure from, if no location_query is given"
+                    },
+                    "longitude": {
+                        "type": "number",
+                        "description": "Longitude to measure from, if no location_query is given"
+                    },
+                    "status": {
+                        "type": "string",
+                        "description": "Vehicle status filter (e.g. 'available', 'in_use', 'active')"
+                    },
+                    "service_type": {
+                        "type": "string",
+                        "description": "Only vehicles that can perform this service type"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Number of vehicles to return (default 5)"
+                    }
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_booking_density",
+            "description": "Find the busiest areas for bookings in a date range. Returns the top map cells with booking counts, urgent/high counts, centroids and direction from the center (north, southeast, ...).",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "start_date": {
+                        "type": "string",
+                        "description": "First day, as YYYY-MM-DD or 'today'/'tomorrow' (default today)"
+                    },
+                    "end_date": {
+                        "type": "string",
+                        "description": "Last day, as YYYY-MM-DD or 'today'/'tomorrow' (default start_date)"
+                    },
+                    "status": {
+                        "type": "string",
+                        "description": "Booking status filter (e.g. 'pending', 'scheduled')"
+                    },
+                    "priority": {
+                        "type": "string",
+                        "description": "Priority filter: 'low', 'normal', 'high' or 'urgent'"
+                    },
+                    "cell_km": {
+                        "type": "number",
+                        "description": "Size of each area in km (default 5)"
+                    }
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_route_progress",
+            "description": "Get live progress of a route: distance travelled, distance remaining and percent complete, based on the assigned vehicle's current position.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "route_query": {
+                        "type": "string",
+                        "description": "Route name or code, or the assigned vehicle's name (e.g. 'Route A', 'Unit 103')"
+                    }
+                },
+                "required": ["route_query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_route_stops",
+            "description": "List a route's stops in order with address, scheduled window, status and estimated arrival/departure times.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "route_query": {
+                        "type": "string",
+                        "description": "Route name or code, or the assigned vehicle's name (e.g. 'Route A', 'Unit 103')"
+                    }
+                },
+                "required": ["route_query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "find_schedule_conflicts",
+            "description": "Find overlapping bookings and over-capacity days per vehicle for a date range.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "period": {
+                        "type": "string",
+                        "enum": ["this_week", "next_week", "last_week", "this_month", "next_month", "last_month"],
+                        "description": "Calendar period instead of start_date/end_date (weeks run Monday to Sunday)"
+                    },
+                    "start_date": {
+                        "type": "string",
+                        "description": "First day, as YYYY-MM-DD or 'today'/'tomorrow' (default today)"
+                    },
+                    "end_date": {
+                        "type": "string",
+                        "description": "Last day, as YYYY-MM-DD (default 7 days from start_date)"
+                    },
+                    "vehicle_query": {
+                        "type": "string",
+                        "description": "Only check vehicles matching this name (e.g. 'Unit 102')"
+                    },
+                    "max_daily_hours": {
+                        "type": "number",
+                        "description": "Booked hours per vehicle per day above which a day is over capacity (default 10)"
+                    }
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "check_vehicle_availability",
+            "description": "Check whether a vehicle is free during a time window on a given day, listing any conflicting bookings.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "vehicle_query": {
+                        "type": "string",
+                        "description": "Vehicle name or partial name (e.g. 'Unit 102')"
+                    },
+                    "day": {
+                        "type": "string",
+                        "description": "Day as YYYY-MM-DD, 'today'/'tomorrow' or a weekday name ('tuesday', 'next tuesday')"
+                    },
+                    "start_time": {
+                        "type": "string",
+                        "description": "Window start as 24h HH:MM (e.g. '14:00')"
+                    },
+                    "end_time": {
+                        "type": "string",
+                        "description": "Window end as 24h HH:MM (e.g. '16:00')"
+                    }
+                },
+                "required": ["vehicle_query", "day", "start_time", "end_time"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_upcoming_schedule",
+            "description": "Get upcoming bookings over a period, with recurring bookings expanded into their individual dates. Use for 'what's booked for Perkins over the next 90 days?'.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "client_query": {
+                        "type": "string",
+                        "description": "Customer name or partial name (leave empty for all customers)"
+                    },
+                    "days": {
+                        "type": "integer",
+                        "description": "Number of days to look ahead (default 90)"
+                    },
+                    "start_date": {
+                        "type": "string",
+                        "description": "First day, as YYYY-MM-DD or 'today'/'tomorrow' (default today)"
+                    }
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_bookings_summary",
+            "description": "Count bookings per day and per status for a date range, optionally filtered by status or priority. Use for 'how busy is next week?'.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "period": {
+                        "type": "string",
+                        "enum": ["this_week", "next_week", "last_week", "this_month", "next_month", "last_month"],
+                        "description": "Calendar period instead of start_date/end_date (weeks run Monday to Sunday)"
+                    },
+                    "start_date": {
+                        "type": "string",
+                        "description": "First day, as YYYY-MM-DD or 'today'/'tomorrow' (default today)"
+                    },
+                    "end_date": {
+                        "type": "string",
+                        "description": "Last day, as YYYY-MM-DD (default 7 days from start_date)"
+                    },
+                    "status": {
+                        "type": "string",
+                        "description": "Booking status filter (e.g. 'pending', 'confirmed', 'scheduled')"
+                    },
+                    "priority": {
+                        "type": "string",
+                        "description": "Priority filter: 'low', 'normal', 'high' or 'urgent'"
+                    },
+                    "sample_size": {
+                        "type": "integer",
+                        "description": "Number of example bookings to include (default 0, max 20)"
+                    }
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_maintenance_due",
+            "description": "List vehicles that are overdue for maintenance or due within the given number of days, flagging overdue vehicles that still have upcoming bookings.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "within_days": {
+                        "type": "integer",
+                        "description": "How many days ahead to look for upcoming maintenance (default 14)"
+                    }
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_vehicle_utilization",
+            "description": "Report per-vehicle utilization (worked hours vs. working days, routes, completed bookings, distance) over a date range, least utilized first. Defaults to last calendar month.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "start_date": {
+                        "type": "string",
+                        "description": "First day, as YYYY-MM-DD (default first day of last month)"
+                    },
+                    "end_date": {
+                        "type": "string",
+                        "description": "Last day, as YYYY-MM-DD (default last day of last month)"
+                    },
+                    "vehicle_query": {
+                        "type": "string",
+                        "description": "Optional vehicle name or license plate to restrict the report to"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Number of least utilized vehicles to return (default 10)"
+                    }
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_customer_overview",
+            "description": "Get a customer's profile in one call: contact details, service locations and next upcoming bookings with service names.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "customer_query": {
+                        "type": "string",
+                        "description": "Customer name or email (partial match)"
+                    },
+                    "bookings_limit": {
+                        "type": "integer",
+                        "description": "Number of upcoming bookings to include (default 5, max 20)"
+                    }
+                },
+                "required": ["customer_query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "lookup_service",
+            "description": "Look up services in the catalog by name or code: average/min/max duration, base price and requirements. Omit the query to list all active services.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "service_query": {
+                        "type": "string",
+                        "description": "Service name or code (e.g. 'inspection', 'HVAC-01')"
+                    }
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "find_booking",
+            "description": "Find a booking by its booking number (e.g. 'BK-20260115-007') or by words from its special instructions or internal notes.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Booking number, or text to search for in booking instructions and notes"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum number of bookings for a text search (default 5)"
+                    }
+                },
+                "required": ["query"]
+            }
+        }
     }
 ]
 
+def execute_tool(db_tool: "DatabaseTool", function_name: str, arguments: Dict):
+    """Dispatch a tool call to the matching DatabaseTool method."""
+    result = None
+    if function_name == "get_booking_counts_by_status":
+        result = db_tool.get_booking_counts_by_status()
+    elif function_name == "get_vehicle_status":
+        result = db_tool.get_vehicle_status(arguments.get("vehicle_query"))
+    elif function_name == "search_customers":
+        result = db_tool.search_customers(arguments.get("query"))
+    elif function_name == "get_vehicle_count":
+        result = db_tool.get_vehicle_count()
+    elif function_name == "get_customer_count":
+        result = db_tool.get_customer_count()
+    elif function_name == "list_active_routes":
+        result = db_tool.list_active_routes()
+    elif function_name == "list_vehicles":
+        result = db_tool.list_vehicles(arguments.get("status"))
+    elif function_name == "list_customers":
+        result = db_tool.list_customers(arguments.get("status"))
+    elif function_name == "find_nearest_vehicles":
+        result = db_tool.find_nearest_vehicles(
+            location_query=arguments.get("location_query"),
+            latitude=arguments.get("latitude"),
+            longitude=arguments.get("longitude"),
+            status=arguments.get("status"),
+            service_type=arguments.get("service_type"),
+            limit=arguments.get("limit", 5),
+        )
+    elif function_name == "get_booking_density":
+        result = db_tool.get_booking_density(
+            start_date=arguments.get("start_date"),
+            end_date=arguments.get("end_date"),
+            status=arguments.get("status"),
+            priority=arguments.get("priority"),
+            cell_km=arguments.get("cell_km", 5.0),
+        )
+    elif function_name == "get_route_progress":
+        result = db_tool.get_route_progress(arguments.get("route_query"))
+    elif function_name == "get_route_stops":
+        result = db_tool.get_route_stops(arguments.get("route_query"))
+    elif function_name == "find_schedule_conflicts":
+        result = db_tool.find_schedule_conflicts(
+            start_date=arguments.get("start_date"),
+            end_date=arguments.get("end_date"),
+            vehicle_query=arguments.get("vehicle_query"),
+            max_daily_hours=arguments.get("max_daily_hours", 10),
+            period=arguments.get("period"),
+        )
+    elif function_name == "check_vehicle_availability":
+        result = db_tool.check_vehicle_availability(
+            arguments.get("vehicle_query"),
+            arguments.get("day"),
+            arguments.get("start_time"),
+            arguments.get("end_time"),
+        )
+    elif function_name == "get_upcoming_schedule":
+        result = db_tool.get_upcoming_schedule(
+            client_query=arguments.get("client_query"),
+            days=arguments.get("days", 90),
+            start_date=arguments.get("start_date"),
+        )
+    elif function_name == "get_bookings_summary":
+        result = db_tool.get_bookings_summary(
+            start_date=arguments.get("start_date"),
+            end_date=arguments.get("end_date"),
+            status=arguments.get("status"),
+            priority=arguments.get("priority"),
+            sample_size=arguments.get("sample_size", 0),
+            period=arguments.get("period"),
+        )
+    elif function_name == "get_maintenance_due":
+        result = db_tool.get_maintenance_due(within_days=arguments.get("within_days", 14))
+    elif function_name == "get_vehicle_utilization":
+        result = db_tool.get_vehicle_utilization(
+            start_date=arguments.get("start_date"),
+            end_date=arguments.get("end_date"),
+            vehicle_query=arguments.get("vehicle_query"),
+            limit=arguments.get("limit", 10),
+        )
+    elif function_name == "get_customer_overview":
+        result = db_tool.get_customer_overview(
+            customer_query=arguments.get("customer_query", ""),
+            bookings_limit=arguments.get("bookings_limit", 5),
+        )
+    elif function_name == "lookup_service":
+        result = db_tool.lookup_service(service_query=arguments.get("service_query"))
+    elif function_name == "find_booking":
+        result = db_tool.find_booking(query=arguments.get("query", ""), limit=arguments.get("limit", 5))
+    return result
+
+
+async def create_completion(inference_client: "AsyncGradient", messages: List[Dict], stage: str = "llm", **params):
+    """Start a streamed chat completion, sharing it with equivalent in-flight requests if enabled."""
+    # Snapshot the history: the caller keeps appending to its list after this returns
+    messages = list(messages)
+    if TRACER.enabled:
+        # Tool messages carry trace/span ids for correlation; the API only gets its own fields
+        messages = [{k: v for k, v in m.items() if k not in ("trace_id", "span_id")} for m in messages]
+    count_request("llm_calls")
+    LLM_CALLS.inc(stage=stage)
+    started = time.perf_counter()
+    create = lambda: inference_client.chat.completions.create(messages=messages, stream=True, **params)
+    if LLM_CASSETTE.enabled:
+        create = LLM_CASSETTE.wrap(messages, params, create)
+    if not LLM_FANOUT_ENABLED:
+        stream = await create()
+    else:
+        stream = LLM_FANOUT.stream(fingerprint(messages, **params), create)
+    return observe_stream(stream, stage, messages, params, started)
+
+
+async def observe_stream(stream, stage: str, messages: List[Dict], params: Dict, started: float):
+    """Pass chunks through while recording time to first chunk, stream duration and token counts."""
+    first = True
+    output_chars = 0
+    usage = None
+    try:
+        async for chunk in stream:
+            if first:
+                LLM_TTFT_SECONDS.observe(time.perf_counter() - started, stage=stage)
+                first = False
+            usage = getattr(chunk, "usage", None) or usage
+            for choice in chunk.choices or ():
+                delta = choice.delta
+                output_chars += len(delta.content or "")
+                for tool_call in delta.tool_calls or ():
+                    function = getattr(tool_call, "function", None)
+                    if function is not None:
+                        output_chars += len(function.name or "") + len(function.arguments or "")
+            yield chunk
+    finally:
+        LLM_SECONDS.observe(time.perf_counter() - started, stage=stage)
+        if usage is not None and getattr(usage, "prompt_tokens", None) is not None:
+            LLM_TOKENS.inc(usage.prompt_tokens, stage=stage, direction="input", source="usage")
+            LLM_TOKENS.inc(usage.completion_tokens or 0, stage=stage, direction="output", source="usage")
+        else:
+            prompt_chars = len(json.dumps(messages, default=str)) + len(json.dumps(params.get("tools") or []))
+            LLM_TOKENS.inc(prompt_chars // 4, stage=stage, direction="input", source="estimate")
+            LLM_TOKENS.inc(-(-output_chars // 4), stage=stage, direction="output", source="estimate")
+
+
+def count_request(name: str) -> None:
+    """Increment a counter in REQUEST_STATS when the caller is collecting them."""
+    stats = REQUEST_STATS.get()
+    if stats is not None:
+        stats[name] = stats.get(name, 0) + 1
+
+
+def get_runtime_stats() -> Dict:
+    """Counters for shared, cross-request optimizations in this worker."""
+    return {
+        "tool_single_flight": TOOL_SINGLE_FLIGHT.stats(),
+        "llm_fanout": LLM_FANOUT.stats(),
+        "history_reuse": HISTORY_REUSE.stats(),
+        "llm_cassette": LLM_CASSETTE.stats(),
+        "profiler": PROFILER.stats(),
+        "cold_start": dict(COLD_START),
+    }
+
+
+def record_cold_start(phase: str, seconds: float) -> None:
+    COLD_START[f"{phase}_ms"] = round(seconds * 1000, 1)
+    COLD_START_SECONDS.set(round(seconds, 4), phase=phase)
+
+
+def get_inference_client() -> "AsyncGradient":
+    """The model client for the running event loop, importing `gradient` on first use."""
+    loop = asyncio.get_running_loop()
+    client = _INFERENCE_CLIENTS.get(loop)
+    if client is None:
+        client = _INFERENCE_CLIENTS[loop] = _PREWARMED_CLIENTS.pop() if _PREWARMED_CLIENTS else new_inference_client()
+    return client
+
+
+def new_inference_client() -> "AsyncGradient":
+    from gradient import AsyncGradient
+
+    return AsyncGradient(model_access_key=os.environ.get("GRADIENT_MODEL_ACCESS_KEY"))
+
+
+def init_database_tool() -> "DatabaseTool":
+    """Create this request's DatabaseTool (runs in a worker thread; imports the data stack on first use)."""
+    from tools.database import DatabaseTool
+
+    with TRACER.span("db_client.init"):
+        return DatabaseTool()
+
+
+def prewarm() -> None:
+    """Import the data stack and build the model client ahead of the first request."""
+    started = time.perf_counter()
+    import tools.database  # noqa: F401
+
+    client = new_inference_client()
+    # The SDK imports its resource modules on first attribute access
+    client.chat.completions
+    _PREWARMED_CLIENTS.append(client)
+    record_cold_start("prewarm", time.perf_counter() - started)
+
+
+def _start_prewarm() -> None:
+    if AGENT_PREWARM:
+        threading.Thread(target=prewarm, name="agent-prewarm", daemon=True).start()
+
+
+def _discard_exception(task: asyncio.Future) -> None:
+    # The DatabaseTool task is only awaited when a tool runs; don't warn about unused failures
+    if not task.cancelled():
+        task.exception()
+
+
 @entrypoint
 async def main(body: Dict, context: Dict):
     """
@@ -359,6 +1016,62 @@ async def main(body: Dict, context: Dict):
     Yields:
         Helpful streaming response about OptiRoute usage
     """
+    # Per-request counters feed the llm_calls_per_request histogram; callers may supply their own dict
+    stats = REQUEST_STATS.get()
+    owns_stats = stats is None
+    if owns_stats:
+        stats = {}
+        REQUEST_STATS.set(stats)
+    llm_calls_before = stats.get("llm_calls", 0)
+    outcome = "ok"
+    REQUESTS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    try:
+        # One trace per request when tracing is enabled and the request is sampled;
+        # a W3C traceparent header from the caller continues its trace
+        headers = getattr(context, "headers", None) or {}
+        with TRACER.start_trace(
+            "agent.request",
+            traceparent=headers.get("traceparent"),
+            session_id=getattr(context, "session_id", None),
+        ) as root_span:
+            with PROFILER.invocation(context, current_ids()) as profile:
+                if profile.path:
+                    root_span.set(profile=profile.path)
+                async for chunk in respond(body, context):
+                    yield chunk
+    except (GeneratorExit, asyncio.CancelledError):
+        outcome = "cancelled"
+        raise
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        REQUEST_SECONDS.observe(time.perf_counter() - started)
+        REQUESTS.inc(outcome=outcome)
+        LLM_CALLS_PER_REQUEST.observe(stats.get("llm_calls", 0) - llm_calls_before)
+        if owns_stats:
+            # Reset by value: the generator may be closed from a different context
+            REQUEST_STATS.set(None)
+        if COLD_START["first_request_ms"] is None:
+            record_cold_start("first_request", time.perf_counter() - started)
+
+
+# @entrypoint published the FastAPI app as this module's `fastapi_app`; add the metrics route
+# and the background prewarm to it
+mount_metrics(globals()["fastapi_app"], METRICS)
+globals()["fastapi_app"].router.add_event_handler("startup", _start_prewarm)
+
+
+def today_prompt(today: Optional[date] = None) -> str:
+    """System message giving the model the current date and weekday."""
+    today = today or date.today()
+    return f"TODAY: {today:%A}, {today.isoformat()}. Resolve relative dates and day names against this date."
+
+
+async def respond(body: Dict, context: Dict):
+    """Answer one request: route with the LLM, run any tools, then stream the final answer."""
     # CRITICAL: Each invocation must be completely isolated
     # No state should carry over between requests (esp. in evaluation mode)
     # This function is stateless - fresh processing for every call
@@ -374,18 +1087,22 @@ async def main(body: Dict, context: Dict):
         # Direct/evaluation format
         messages = body.get("messages", [])
 
-    # Initialize database tool here to avoid import-time errors during validation
-    db_tool = DatabaseTool()
-
     if not messages:
         yield "Hi! I'm your Fleetillo assistant. I can help you with bookings, routes, customers, vehicles, and services. What would you like to know?"
         return
 
+    # Initialize database tool here to avoid import-time errors during validation. It is built in a
+    # worker thread while the routing completion streams, and only tool calls wait for it.
+    db_tool_task = asyncio.ensure_future(asyncio.to_thread(PROFILER.bind(init_database_tool)))
+    db_tool_task.add_done_callback(_discard_exception)
+
     # Format messages for recent activity context
+    format_span = TRACER.start_span("format_messages", history_messages=len(messages))
     formatted_messages = []
     
-    # Add system prompt
+    # Add system prompt, then today's date so day names ("next Tuesday") can be resolved
     formatted_messages.append({"role": "system", "content": SYSTEM_PROMPT})
+    formatted_messages.append({"role": "system", "content": today_prompt()})
     
     # Add conversation history
     for msg in messages:
@@ -403,17 +1120,22 @@ async def main(body: Dict, context: Dict):
             
             formatted_messages.append(msg_obj)
 
-    inference_client = AsyncGradient(
-        model_access_key=os.environ.get("GRADIENT_MODEL_ACCESS_KEY")
-    )
+    # Prior tool calls/results in the history, so repeated lookups can be answered from it
+    history_index = HistoryToolIndex(messages)
+    format_span.end()
+
+    inference_client = get_inference_client()
 
     # First call to LLM
-    response = await inference_client.chat.completions.create(
-        messages=formatted_messages,
+    route_span = TRACER.start_span("llm.route", model="llama3.3-70b-instruct", messages=len(formatted_messages))
+    route_start = time.perf_counter()
+    response = await create_completion(
+        inference_client,
+        formatted_messages,
+        stage="route",
         model="llama3.3-70b-instruct",
         max_tokens=300,
         temperature=0.3,
-        stream=True,
         tools=TOOLS_SCHEMA
     )
 
@@ -422,7 +1144,11 @@ async def main(body: Dict, context: Dict):
 
     full_response_content = ""
     yielded_content = False
+    route_chunks = 0
     async for chunk in response:
+        if not route_chunks:
+            route_span.set(ttft_ms=round((time.perf_counter() - route_start) * 1000, 1))
+        route_chunks += 1
         delta = chunk.choices[0].delta
         
         # Handle tool calls in stream
@@ -446,10 +1172,12 @@ async def main(body: Dict, context: Dict):
         # Handle content (buffer it, don't stream yet)
         if delta.content:
             full_response_content += delta.content
+    route_span.end(chunks=route_chunks, tool_calls=len(tool_calls), content_chars=len(full_response_content))
     
     # Text-based tool call fallback (Hallucination Catcher)
     # If the LLM wrote the tool name but didn't trigger a tool_call, catch it here.
     # Also catch JSON-formatted tool calls written as text
+    catcher_span = TRACER.start_span("hallucination_catcher", routed_tool_calls=len(tool_calls))
     if not tool_calls:
         import re
         import json as json_module
@@ -475,6 +1203,7 @@ async def main(body: Dict, context: Dict):
                 },
                 "type": "function"
             })
+            FALLBACKS.inc(path="json_catcher")
             
             # Clear the content buffer to prevent JSON from being shown
             full_response_content = ""
@@ -510,6 +1239,7 @@ async def main(body: Dict, context: Dict):
                         },
                         "type": "function"
                     })
+                    FALLBACKS.inc(path="parenthesized_catcher")
                     
                     # Clear the content buffer to prevent tool syntax from being shown
                     full_response_content = ""
@@ -572,6 +1302,7 @@ async def main(body: Dict, context: Dict):
                         },
                         "type": "function"
                     })
+                    FALLBACKS.inc(path="plain_name_catcher")
                     
                     # Appending the original message content as the assistant's turn
                     formatted_messages.append({
@@ -582,6 +1313,7 @@ async def main(body: Dict, context: Dict):
                     # Discard the buffered content since we'll get a fresh response after tool execution
                     full_response_content = ""
                     break # Limit to one synthetic tool call per turn for safety
+    catcher_span.end(tool_calls=len(tool_calls))
     
     # Check if buffer contains phrases that indicate a tool call is coming
     # These should NEVER be shown to the user
@@ -665,6 +1397,7 @@ async def main(body: Dict, context: Dict):
                 created_tool = True
         
         # If we couldn't infer a tool, yield error
+        FALLBACKS.inc(path="inferred_from_chatter" if created_tool else "chatter_unresolved")
         if not created_tool:
             yield "[I apologize, I'm having trouble understanding that request. Could you rephrase it?]"
 
@@ -681,56 +1414,74 @@ async def main(body: Dict, context: Dict):
         for tool_call in tool_calls:
             function_name = tool_call["function"]["name"]
             arguments_str = tool_call["function"]["arguments"]
-            try:
-                arguments = json.loads(arguments_str)
-                
-                # Execute valid tool
-                result = None
-                if function_name == "get_booking_counts_by_status":
-                    result = db_tool.get_booking_counts_by_status()
-                elif function_name == "get_vehicle_status":
-                    result = db_tool.get_vehicle_status(arguments.get("vehicle_query"))
-                elif function_name == "search_customers":
-                    result = db_tool.search_customers(arguments.get("query"))
-                elif function_name == "get_vehicle_count":
-                    result = db_tool.get_vehicle_count()
-                elif function_name == "get_customer_count":
-                    result = db_tool.get_customer_count()
-                elif function_name == "list_active_routes":
-                    result = db_tool.list_active_routes()
-                elif function_name == "list_vehicles":
-                    result = db_tool.list_vehicles(arguments.get("status"))
-                elif function_name == "list_customers":
-                    result = db_tool.list_customers(arguments.get("status"))
-                
-                # Append tool result
-                formatted_messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call["id"],
-                    "content": json.dumps(result)
-                })
-                
-            except Exception as e:
-                formatted_messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call["id"],
-                    "content": json.dumps({"error": str(e)})
-                })
+            count_request("tool_calls")
+            tool_start = time.perf_counter()
+            tool_outcome = "executed"
+            # Current span while the tool runs, so its PostgREST requests nest under it
+            with TRACER.span("tool", tool=function_name, tool_call_id=tool_call["id"]) as tool_span:
+                try:
+                    arguments = json.loads(arguments_str)
+                    
+                    # Reuse a fresh result already in the conversation before touching Supabase
+                    content = history_index.lookup(function_name, arguments)
+                    HISTORY_REUSE.record(function_name, reused=content is not None)
+                    tool_span.set(arguments=arguments_str, reused=content is not None)
+                    if content is not None:
+                        tool_outcome = "reused"
+                    else:
+                        db_tool = await db_tool_task
+                        # Execute valid tool (coalesced with identical in-flight calls)
+                        result = await TOOL_SINGLE_FLIGHT.do(
+                            make_key(function_name, arguments),
+                            lambda: asyncio.to_thread(PROFILER.bind(execute_tool), db_tool, function_name, arguments),
+                        )
+                        content = json.dumps(result)
+                    tool_span.set(result_bytes=len(content))
+                    
+                    # Append tool result
+                    formatted_messages.append({
+                        "role": "tool",
+                        "tool_call_id": tool_call["id"],
+                        "content": content,
+                        **current_ids(),
+                    })
+                    
+                except Exception as e:
+                    tool_outcome = "error"
+                    tool_span.fail(e)
+                    formatted_messages.append({
+                        "role": "tool",
+                        "tool_call_id": tool_call["id"],
+                        "content": json.dumps({"error": str(e)}),
+                        **current_ids(),
+                    })
+            TOOL_CALLS.inc(tool=function_name, outcome=tool_outcome)
+            TOOL_SECONDS.observe(time.perf_counter() - tool_start, tool=function_name)
         
         # Second call to LLM with tool results
-        final_response = await inference_client.chat.completions.create(
-            messages=formatted_messages,
+        final_span = TRACER.start_span("llm.final", model="llama3.3-70b-instruct", messages=len(formatted_messages))
+        final_start = time.perf_counter()
+        final_chunks = 0
+        final_response = await create_completion(
+            inference_client,
+            formatted_messages,
+            stage="final",
             model="llama3.3-70b-instruct",
             max_tokens=300,
-            temperature=0.3,
-            stream=True
+            temperature=0.3
         )
 
         async for chunk in final_response:
              if chunk.choices and chunk.choices[0].delta.content:
+                 if not final_chunks:
+                     final_span.set(ttft_ms=round((time.perf_counter() - final_start) * 1000, 1))
+                 final_chunks += 1
                  yielded_content = True
                  yield chunk.choices[0].delta.content
+        final_span.end(chunks=final_chunks)
     
     if not yielded_content and not tool_calls:
          yield "I'm sorry, I couldn't generate a response. (Debug: No content yielded)"
 
+
+record_cold_start("import", time.perf_counter() - _IMPORT_STARTED)
@@ -0,0 +1,56 @@
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Small thread-safe TTL cache for tool results.
+
+    Entries expire `ttl_seconds` after they are stored. A per-entry ttl can be
+    passed to `set()`; `ttl_seconds=None` means the entry never expires.
+    The oldest entry is evicted once `max_entries` is reached.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = 60.0, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[Optional[float], Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry[0] is None or entry[0] > time.monotonic())
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Any = ...) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is ... else ttl_seconds
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                # Dicts keep insertion order, so the first key is the oldest
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (expires_at, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,197 @@
+import asyncio
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from tools.fanout import fingerprint
+
+MODES = ("off", "record", "replay", "auto")
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when no recorded stream matches a request."""
+
+
+class StreamCassette:
+    """
+    Records streamed chat completions to disk and serves them back.
+
+    Each stream is stored as one gzipped JSON line keyed by `fingerprint()` of the
+    request, holding the chunks as `[offset_ms, delta, finish_reason]` with empty
+    fields dropped. A second, looser key ignores the content of tool results and the
+    date in the system messages, so a recording still replays when the database
+    behind the tools has changed or on a later day.
+
+    Modes: "record" always calls the model and saves the stream, "replay" only
+    serves recordings and raises `CassetteMiss` otherwise, "auto" replays when it
+    can and records when it can't. Replay is instant unless `speed` is set: 1.0
+    keeps the recorded timings, 10.0 plays them ten times faster.
+    """
+
+    def __init__(self, path: str, mode: str = "off", speed: float = 0.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {', '.join(MODES)}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._streams: Optional[Dict[str, List]] = None
+        self._loose: Dict[str, str] = {}
+        self.hits = 0
+        self.loose_hits = 0
+        self.recorded = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def wrap(self, messages: List[Dict], params: Dict, create: Callable[[], Awaitable[AsyncIterable]]):
+        """Return a `create()` replacement that replays or records the stream for this request."""
+        key = fingerprint(messages, **params)
+        loose_key = fingerprint(_without_tool_results(messages), **params)
+
+        async def replay_or_record() -> AsyncIterator:
+            chunks = self.find(key, loose_key) if self.mode != "record" else None
+            if chunks is not None:
+                return self._replay(chunks)
+            if self.mode == "replay":
+                raise CassetteMiss(
+                    f"No recorded stream in {self.path} for request {key[:12]}; "
+                    f"re-record with LLM_CASSETTE_MODE=record"
+                )
+            return self._record(key, loose_key, await create())
+
+        return replay_or_record
+
+    def find(self, key: str, loose_key: str) -> Optional[List]:
+        streams = self._load()
+        with self._lock:
+            if key in streams:
+                self.hits += 1
+                return streams[key]
+            if loose_key in self._loose:
+                self.loose_hits += 1
+                return streams[self._loose[loose_key]]
+        return None
+
+    def _load(self) -> Dict[str, List]:
+        with self._lock:
+            if self._streams is None:
+                self._streams = {}
+                if os.path.exists(self.path):
+                    # Later recordings of the same request replace earlier ones
+                    with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                        for line in f:
+                            if line.strip():
+                                self._add(json.loads(line))
+            return self._streams
+
+    def _add(self, entry: Dict) -> None:
+        self._streams[entry["key"]] = entry["chunks"]
+        self._loose[entry["loose"]] = entry["key"]
+
+    def save(self, key: str, loose_key: str, chunks: List) -> None:
+        entry = {"key": key, "loose": loose_key, "chunks": chunks}
+        self._load()
+        with self._lock:
+            self._add(entry)
+            self.recorded += 1
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Appending gzip members keeps the file a valid gzip stream
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    async def _record(self, key: str, loose_key: str, upstream: AsyncIterable) -> AsyncIterator:
+        start = time.perf_counter()
+        chunks = []
+        async for chunk in upstream:
+            chunks.append(_pack(chunk, (time.perf_counter() - start) * 1000))
+            yield chunk
+        self.save(key, loose_key, chunks)
+
+    async def _replay(self, chunks: List) -> AsyncIterator:
+        elapsed = 0.0
+        for offset_ms, delta, finish_reason in chunks:
+            if self.speed > 0 and offset_ms > elapsed:
+                await asyncio.sleep((offset_ms - elapsed) / 1000.0 / self.speed)
+            elapsed = offset_ms
+            yield _unpack(delta, finish_reason)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return replay/record counters for this worker."""
+        return {
+            "mode": self.mode,
+            "streams": len(self._streams or {}),
+            "hits": self.hits,
+            "loose_hits": self.loose_hits,
+            "recorded": self.recorded,
+        }
+
+
+# "Wednesday, 2026-01-14" as written by main.today_prompt()
+_TODAY = re.compile(r"\b(?:Mon|Tues|Wednes|Thurs|Fri|Satur|Sun)day, \d{4}-\d{2}-\d{2}\b")
+
+
+def _without_tool_results(messages: List[Dict]) -> List[Dict]:
+    loose = []
+    for msg in messages:
+        if msg.get("role") == "tool":
+            msg = dict(msg, content="")
+        elif msg.get("role") == "system" and isinstance(msg.get("content"), str):
+            # Only the injected date is ignored; any other prompt change still misses
+            msg = dict(msg, content=_TODAY.sub("<today>", msg["content"]))
+        loose.append(msg)
+    return loose
+
+
+def _pack(chunk: Any, offset_ms: float) -> List:
+    if not chunk.choices:
+        return [round(offset_ms, 1), {}, None]
+    choice = chunk.choices[0]
+    delta = choice.delta
+    packed: Dict[str, Any] = {}
+    if getattr(delta, "role", None):
+        packed["role"] = delta.role
+    if delta.content:
+        packed["content"] = delta.content
+    if delta.tool_calls:
+        packed["tool_calls"] = [
+            {
+                key: value
+                for key, value in (
+                    ("index", call.index),
+                    ("id", call.id),
+                    ("name", call.function.name if call.function else None),
+                    ("arguments", call.function.arguments if call.function else None),
+                )
+                if value is not None
+            }
+            for call in delta.tool_calls
+        ]
+    return [round(offset_ms, 1), packed, choice.finish_reason]
+
+
+def _unpack(delta: Dict, finish_reason: Optional[str]) -> SimpleNamespace:
+    """Rebuild a chunk with the attributes the agent reads from SDK stream chunks."""
+    tool_calls = None
+    if delta.get("tool_calls"):
+        tool_calls = [
+            SimpleNamespace(
+                index=call.get("index"),
+                id=call.get("id"),
+                type="function" if call.get("id") else None,
+                function=SimpleNamespace(name=call.get("name"), arguments=call.get("arguments")),
+            )
+            for call in delta["tool_calls"]
+        ]
+    choice = SimpleNamespace(
+        index=0,
+        delta=SimpleNamespace(role=delta.get("role"), content=delta.get("content"), tool_calls=tool_calls),
+        finish_reason=finish_reason,
+    )
+    return SimpleNamespace(choices=[choice])
@@ -1,14 +1,125 @@
 import os
-import json
+import re
 import jwt
 import time
-from typing import Dict, List, Optional
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from supabase import create_client, Client, ClientOptions
+from tools.cache import TTLCache
+from tools.geo import VEHICLE_INDEX, grid_density
+from tools.maintenance import MAINTENANCE_INDEX
+from tools.metrics import METRICS
+from tools.polyline import RoutePath
+from tools.schedule import ScheduleIndex, format_minutes, to_minutes
+from tools.recurrence import merged_schedule
+from tools.services import SERVICE_CATALOG
+from tools.tracing import TRACER, instrument_httpx_client
+from tools.utilization import vehicle_utilization, working_days
+
+# Worker-wide caches for aggregate tools, keyed by their normalized arguments
+_DENSITY_CACHE = TTLCache(ttl_seconds=300, max_entries=128)
+# Decoded route geometry keyed by (route id, updated_at), so edits invalidate naturally
+_ROUTE_PATH_CACHE = TTLCache(ttl_seconds=None, max_entries=256)
+# Stop lists per route revision; short TTL so booking status changes still show up
+_ROUTE_STOPS_CACHE = TTLCache(ttl_seconds=120, max_entries=256)
+# Per-vehicle booking intervals for a date window
+_SCHEDULE_CACHE = TTLCache(ttl_seconds=60, max_entries=64)
+# Booking rollups; closed past windows never change so they are kept without expiry
+_SUMMARY_CACHE = TTLCache(ttl_seconds=300, max_entries=256)
+# Utilization reports; same rule, closed windows are immutable
+_UTILIZATION_CACHE = TTLCache(ttl_seconds=300, max_entries=64)
+# Recent booking lookups by normalized reference or search text
+_BOOKING_LOOKUP_CACHE = TTLCache(ttl_seconds=60, max_entries=256)
+
+_RATE_LIMITED = METRICS.counter("db_rate_limited_total", "Supabase queries rejected by the per-client rate limiter")
+
+# Booking numbers look like BK-20260115-007; users type "bk 20260115 7", "#BK20260115007", ...
+_BOOKING_NUMBER = re.compile(r"^#?\s*BK[\s_-]*(\d{8})[\s_-]*(\d{1,4})$", re.IGNORECASE)
+_BOOKING_PREFIX = re.compile(r"^#?\s*BK\b|^#?\s*BK[\s_-]*\d", re.IGNORECASE)
+
+
+def parse_leg_seconds(duration) -> int:
+    """Google Routes durations are strings like '754s'."""
+    if isinstance(duration, (int, float)):
+        return int(duration)
+    if isinstance(duration, str) and duration.endswith("s"):
+        try:
+            return int(float(duration[:-1]))
+        except ValueError:
+            return 0
+    return 0
+
+
+_WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def parse_date(value: Optional[str], default: Optional[date] = None) -> Optional[date]:
+    """
+    Parse 'YYYY-MM-DD', the relative words 'today', 'tomorrow' and 'yesterday', or a
+    weekday name relative to today: 'tuesday' (or 'this tuesday') is the next Tuesday
+    on or after today, 'next tuesday' is the Tuesday of next week (weeks start on
+    Monday) and 'last tuesday' is the most recent Tuesday before today.
+    """
+    if not value:
+        return default
+    relative = {"today": 0, "tomorrow": 1, "yesterday": -1}
+    key = " ".join(value.strip().lower().split())
+    if key in relative:
+        return date.today() + timedelta(days=relative[key])
+    modifier, _, name = key.rpartition(" ")
+    weekday = next((i for i, day in enumerate(_WEEKDAYS) if len(name) >= 3 and day.startswith(name)), None)
+    if weekday is not None and modifier in ("", "this", "next", "last"):
+        today = date.today()
+        if modifier == "next":
+            return today - timedelta(days=today.weekday()) + timedelta(days=7 + weekday)
+        if modifier == "last":
+            return today - timedelta(days=(today.weekday() - weekday - 1) % 7 + 1)
+        return today + timedelta(days=(weekday - today.weekday()) % 7)
+    return date.fromisoformat(key)
+
+
+def parse_period(value: str) -> Tuple[date, date]:
+    """
+    First and last day of a calendar period relative to today: 'this_week', 'next_week'
+    or 'last_week' (Monday to Sunday), or 'this_month', 'next_month' or 'last_month'.
+    """
+    which, _, unit = re.sub(r"[\s-]+", "_", value.strip().lower()).partition("_")
+    offset = {"last": -1, "this": 0, "next": 1}.get(which)
+    if offset is None or unit not in ("week", "month"):
+        raise ValueError(f"Unknown period '{value}', expected this/next/last followed by _week or _month")
+    today = date.today()
+    if unit == "week":
+        start = today - timedelta(days=today.weekday()) + timedelta(weeks=offset)
+        return start, start + timedelta(days=6)
+    months = today.year * 12 + today.month - 1 + offset
+    start = date(months // 12, months % 12 + 1, 1)
+    return start, (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+def quote_filter_value(value: str) -> str:
+    """Double-quote a value inside a PostgREST `or=` filter so commas, dots and parentheses stay literal."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def normalize_booking_number(value: str) -> Optional[str]:
+    """Canonical BK-YYYYMMDD-NNN form of a typed booking reference, or None if it isn't one."""
+    text = (value or "").strip()
+    match = _BOOKING_NUMBER.match(text)
+    if match:
+        return f"BK-{match.group(1)}-{int(match.group(2)):03d}"
+    if _BOOKING_PREFIX.match(text):
+        # Non-standard references (e.g. BK-LEGACY-TEST-001): upper-case, dash separators
+        return re.sub(r"[\s_]+", "-", text.lstrip("#").strip()).upper()
+    return None
+
 
 class DatabaseTool:
     # Rate limiting configuration
     MAX_QUERIES_PER_MINUTE = 10
     RATE_LIMIT_WINDOW = 60  # seconds
+    # Vehicle positions older than this are reported as stale
+    STALE_POSITION_MINUTES = 30
 
     def __init__(self):
         self.url: str = os.environ.get("SUPABASE_URL")
@@ -26,6 +137,10 @@ class DatabaseTool:
         # Apply JWT with optiroute_viewer role for read-only access
         # This enforces RLS and uses the proper read-only role instead of bypassing security
         self._apply_readonly_jwt()
+
+        # One span per PostgREST request under the current tool span
+        if TRACER.enabled:
+            instrument_httpx_client(self.client.postgrest.session, TRACER, "postgrest")
         
         # Rate limiting state
         self._query_timestamps: List[float] = []
@@ -63,6 +178,7 @@ class DatabaseTool:
         ]
         
         if len(self._query_timestamps) >= self.MAX_QUERIES_PER_MINUTE:
+            _RATE_LIMITED.inc()
             return False
         
         self._query_timestamps.append(current_time)
@@ -102,8 +218,9 @@ class DatabaseTool:
             return [self._rate_limit_error()]
         try:
             # Search by name OR license plate
+            pattern = quote_filter_value(f"%{vehicle_query}%")
             response = self.client.table("vehicles").select("*")\
-                .or_(f"name.ilike.%{vehicle_query}%,license_plate.ilike.%{vehicle_query}%")\
+                .or_(f"name.ilike.{pattern},license_plate.ilike.{pattern}")\
                 .execute()
             if not response.data:
                 return [{"message": f"No vehicles found matching '{vehicle_query}'. Try a different search term."}]
@@ -120,9 +237,10 @@ class DatabaseTool:
             return [self._rate_limit_error()]
         try:
             # First try exact/partial match with ILIKE (fast)
+            pattern = quote_filter_value(f"%{query}%")
             result = self.client.from_("clients") \
                 .select("*") \
-                .or_(f"name.ilike.%{query}%,email.ilike.%{query}%") \
+                .or_(f"name.ilike.{pattern},email.ilike.{pattern}") \
                 .limit(5) \
                 .execute()
             
@@ -260,3 +378,952 @@ class DatabaseTool:
         except Exception as e:
             return [{"error": str(e)}]
 
+    def _resolve_place(self, place_query: str) -> Optional[Dict]:
+        """
+        Resolve a site or customer name to coordinates.
+        Tries locations by name/address first, then a customer's locations (embedded).
+        """
+        pattern = quote_filter_value(f"%{place_query}%")
+        locations = self.client.table("locations") \
+            .select("name, address_line1, city, latitude, longitude") \
+            .or_(f"name.ilike.{pattern},address_line1.ilike.{pattern}") \
+            .not_.is_("latitude", "null") \
+            .limit(1) \
+            .execute()
+        if locations.data:
+            return locations.data[0]
+
+        clients = self.client.from_("clients") \
+            .select("name, locations(name, address_line1, city, latitude, longitude, is_primary)") \
+            .ilike("name", f"%{place_query}%") \
+            .limit(1) \
+            .execute()
+        for client in clients.data or []:
+            located = [loc for loc in client.get("locations") or [] if loc.get("latitude") is not None]
+            if located:
+                located.sort(key=lambda loc: not loc.get("is_primary"))
+                return {**located[0], "customer": client.get("name")}
+        return None
+
+    def find_nearest_vehicles(
+        self,
+        location_query: Optional[str] = None,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        status: Optional[str] = None,
+        service_type: Optional[str] = None,
+        limit: int = 5,
+    ) -> Dict:
+        """
+        Find the vehicles closest to a site, customer or coordinates.
+
+        Positions come from a worker-wide spatial index that is refreshed incrementally,
+        so a call costs at most one small query for the target plus one for changed vehicles.
+        Positions older than STALE_POSITION_MINUTES are flagged as stale.
+        """
+        if not self._check_rate_limit():
+            return self._rate_limit_error()
+        try:
+            target = None
+            if latitude is None or longitude is None:
+                if not location_query:
+                    return {"error": "Provide a location name or latitude/longitude."}
+                target = self._resolve_place(location_query)
+                if not target:
+                    return {"message": f"No location found matching '{location_query}'."}
+                latitude, longitude = float(target["latitude"]), float(target["longitude"])
+
+            statuses = None
+            if status:
+                # Same convention as list_vehicles: 'active' means available or in use
+                statuses = ["available", "in_use"] if status.lower() == "active" else [status]
+
+            VEHICLE_INDEX.refresh(self.client)
+            vehicles = VEHICLE_INDEX.nearest(
+                float(latitude), float(longitude),
+                limit=max(1, min(int(limit or 5), 25)),
+                statuses=statuses,
+                service_type=service_type,
+                stale_after_minutes=self.STALE_POSITION_MINUTES,
+            )
+            if not vehicles:
+                return {"target": target or {"latitude": latitude, "longitude": longitude},
+                        "message": "No vehicles with a known position match those filters."}
+            return {"target": target or {"latitude": latitude, "longitude": longitude}, "vehicles": vehicles}
+        except Exception as e:
+            return {"error": str(e)}
+
+    def get_booking_density(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        cell_km: float = 5.0,
+        top_n: int = 5,
+    ) -> Dict:
+        """
+        Find where bookings cluster for a date window ("Where are we busiest tomorrow?").
+
+        Fetches only the date, priority, status and location coordinates, keyset-paged so
+        the server's row cap cannot truncate a busy window, bins the points into a grid with NumPy and returns the busiest cells with
+        counts, centroids and urgent counts. Results are cached per window and filters;
+        windows that are entirely in the past are kept longer.
+        """
+        if not self._check_rate_limit():
+            return self._rate_limit_error()
+        try:
+            start = parse_date(start_date, default=date.today())
+            end = parse_date(end_date, default=start)
+            if end < start:
+                start, end = end, start
+            cell_km = min(max(float(cell_km or 5.0), 0.5), 50.0)
+            top_n = max(1, min(int(top_n or 5), 20))
+            cache_key = (start, end, (status or "").lower(), (priority or "").lower(), cell_km, top_n)
+            cached = _DENSITY_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
+
+            def scoped(query):
+                query = query.gte("scheduled_date", start.isoformat()) \
+                    .lte("scheduled_date", end.isoformat()) \
+                    .is_("deleted_at", "null")
+                if status:
+                    query = query.eq("status", status.lower())
+                if priority:
+                    query = query.eq("priority", priority.lower())
+                return query
+
+            rows = self._keyset_rows(
+                "bookings", "id, scheduled_date, priority, status, locations(latitude, longitude)", scoped
+            )
+
+            located = [
+                row for row in rows
+                if row.get("locations") and row["locations"].get("latitude") is not None
+                and row["locations"].get("longitude") is not None
+            ]
+            lats = np.fromiter((float(r["locations"]["latitude"]) for r in located), dtype=np.float64, count=len(located))
+            lons = np.fromiter((float(r["locations"]["longitude"]) for r in located), dtype=np.float64, count=len(located))
+            urgent = np.fromiter((r.get("priority") in ("urgent", "high") for r in located), dtype=bool, count=len(located))
+
+            by_day: Dict[str, int] = {}
+            for row in rows:
+                by_day[row["scheduled_date"]] = by_day.get(row["scheduled_date"], 0) + 1
+
+            result = {
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "total_bookings": len(rows),
+                "bookings_without_coordinates": len(rows) - len(located),
+                "bookings_by_day": dict(sorted(by_day.items())),
+                "cell_km": cell_km,
+                "busiest_areas": grid_density(lats, lons, cell_km=cell_km, top_n=top_n, weights={"urgent_or_high": urgent}),
+            }
+            _DENSITY_CACHE.set(cache_key, result, ttl_seconds=3600 if end < date.today() else 300)
+            return result
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _find_route(self, route_query: str, columns: str) -> Optional[Dict]:
+        """
+        Find the most relevant route by name, code or assigned vehicle name.
+        Prefers today's route, then the closest upcoming one, then the most recent.
+        """
+        pattern = quote_filter_value(f"%{route_query}%")
+        routes = self.client.table("routes").select(columns) \
+            .or_(f"route_name.ilike.{pattern},route_code.ilike.{pattern}") \
+            .order("route_date", desc=True) \
+            .limit(10) \
+            .execute().data
+        if not routes:
+            vehicles = self.client.table("vehicles").select("id") \
+                .or_(f"name.ilike.{pattern},license_plate.ilike.{pattern}") \
+                .limit(5) \
+                .execute().data
+            if not vehicles:
+                return None
+            routes = self.client.table("routes").select(columns) \
+                .in_("vehicle_id", [v["id"] for v in vehicles]) \
+                .neq("status", "cancelled") \
+                .order("route_date", desc=True) \
+                .limit(10) \
+                .execute().data
+        if not routes:
+            return None
+        today = date.today().isoformat()
+        return min(routes, key=lambda r: (
+            r.get("route_date") != today,
+            r.get("route_date", "") < today,
+            abs((date.fromisoformat(r["route_date"]) - date.today()).days) if r.get("route_date") else 0,
+        ))
+
+    def _route_path(self, route: Dict) -> RoutePath:
+        """Decoded polyline for a route, fetching route_geometry only on a cache miss."""
+        key = (route["id"], route.get("updated_at"))
+        path = _ROUTE_PATH_CACHE.get(key)
+        if path is None:
+            geometry = self.client.table("routes").select("route_geometry") \
+                .eq("id", route["id"]).limit(1).execute().data
+            encoded = ((geometry[0].get("route_geometry") if geometry else None) or {}).get("encodedPolyline")
+            path = RoutePath.from_encoded(encoded or "")
+            _ROUTE_PATH_CACHE.set(key, path)
+        return path
+
+    def get_route_progress(self, route_query: str) -> Dict:
+        """
+        Report how far along its route a vehicle is ("How far along is Route A?").
+
+        Snaps the vehicle's current position onto the decoded route polyline and returns
+        distance travelled and remaining. The polyline is decoded once per route revision.
+        """
+        if not self._check_rate_limit():
+            return self._rate_limit_error()
+        try:
+            route = self._find_route(
+                route_query,
+                "id, route_name, route_code, route_date, status, vehicle_id, total_distance_km, updated_at",
+            )
+            if not route:
+                return {"message": f"No route found matching '{route_query}'."}
+            summary = {
+                "route_name": route.get("route_name"),
+                "route_code": route.get("route_code"),
+                "route_date": route.get("route_date"),
+                "status": route.get("status"),
+            }
+            path = self._route_path(route)
+            if len(path.points) < 2:
+                return {**summary, "message": "This route has no stored path geometry yet."}
+            summary["total_km"] = round(path.total_km, 1)
+            if route.get("status") == "completed":
+                return {**summary, "percent_complete": 100.0, "remaining_km": 0.0}
+
+            position = None
+            if route.get("vehicle_id"):
+                VEHICLE_INDEX.refresh(self.client)
+                position = VEHICLE_INDEX.position(route["vehicle_id"])
+            if not position:
+                return {**summary, "message": "The assigned vehicle has no known current position."}
+
+            progress = path.project(position["latitude"], position["longitude"])
+            return {
+                **summary,
+                "travelled_km": round(progress["along_km"], 1),
+                "remaining_km": round(progress["remaining_km"], 1),
+                "percent_complete": round(100 * progress["along_km"] / path.total_km, 1) if path.total_km else 0.0,
+                "off_route_km": round(progress["off_route_km"], 2),
+                "position_updated_at": position.get("last_location_update"),
+            }
+        except Exception as e:
+            return {"error": str(e)}
+
+    def get_route_stops(self, route_query: str) -> Dict:
+        """
+        List a route's stops in order with estimated arrival and departure times.
+
+        All stop bookings are fetched with a single `in_` query (projected columns only)
+        and ETAs are accumulated from the route's leg durations plus each stop's
+        estimated service time. Results are cached per route revision.
+        """
+        if not self._check_rate_limit():
+            return self._rate_limit_error()
+        try:
+            route = self._find_route(
+                route_query,
+                "id, route_name, route_code, route_date, status, planned_start_time, stop_sequence, updated_at",
+            )
+            if not route:
+                return {"message": f"No route found matching '{route_query}'."}
+            key = (route["id"], route.get("updated_at"))
+            cached = _ROUTE_STOPS_CACHE.get(key)
+            if cached is not None:
+                return cached
+
+            columns = "id, booking_number, status, scheduled_start_time, scheduled_end_time, " \
+                      "estimated_duration_minutes, stop_order, locations(name, address_line1, city)"
+            stop_ids = route.get("stop_sequence") or []
+            if stop_ids:
+                rows = self.client.table("bookings").select(columns).in_("id", stop_ids).execute().data or []
+                by_id = {row["id"]: row for row in rows}
+                bookings = [by_id[stop_id] for stop_id in stop_ids if stop_id in by_id]
+            else:
+                # Newer routes link stops through bookings.route_id/stop_order instead
+                bookings = self.client.table("bookings").select(columns) \
+                    .eq("route_id", route["id"]).order("stop_order").execute().data or []
+
+            geometry = self.client.table("routes").select("route_geometry") \
+                .eq("id", route["id"]).limit(1).execute().data
+            legs = ((geometry[0].get("route_geometry") if geometry else None) or {}).get("legs") or []
+            leg_seconds = [parse_leg_seconds(leg.get("duration")) for leg in legs]
+            # With a separate departure point there is one leg per stop; otherwise the
+            # first stop is the origin and leg i leads to stop i + 1.
+            offset = 0 if len(leg_seconds) >= len(bookings) else 1
+
+            start = (route.get("planned_start_time") or "08:00")[:5]
+            clock = datetime.combine(date.fromisoformat(route["route_date"]), dt_time.fromisoformat(start))
+            stops = []
+            travel_minutes = 0.0
+            for i, booking in enumerate(bookings):
+                leg = i - offset
+                travel = leg_seconds[leg] if 0 <= leg < len(leg_seconds) else 0
+                travel_minutes += travel / 60
+                clock += timedelta(seconds=travel)
+                arrival = clock
+                clock += timedelta(minutes=booking.get("estimated_duration_minutes") or 30)
+                location = booking.get("locations") or {}
+                stops.append({
+                    "stop": i + 1,
+                    "booking_number": booking.get("booking_number"),
+                    "status": booking.get("status"),
+                    "location": location.get("name"),
+                    "address": ", ".join(p for p in (location.get("address_line1"), location.get("city")) if p),
+                    "scheduled_window": [booking.get("scheduled_start_time"), booking.get("scheduled_end_time")],
+                    "eta": arrival.strftime("%H:%M"),
+                    "departure": clock.strftime("%H:%M"),
+                })
+
+            result = {
+                "route_name": route.get("route_name"),
+                "route_code": route.get("route_code"),
+                "route_date": route.get("route_date"),
+                "status": route.get("status"),
+                "planned_start_time": start,
+                "total_stops": len(stops),
+                "total_travel_minutes": round(travel_minutes),
+                "stops": stops,
+            }
+            if not stops:
+                result["message"] = "This route has no stops."
+            _ROUTE_STOPS_CACHE.set(key, result)
+            return result
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _schedule_index(self, start: date, end: date) -> ScheduleIndex:
+        """Load active bookings for a window in one projected query and index them per vehicle/day."""
+        key = (start, end)
+        index = _SCHEDULE_CACHE.get(key)
+        if index is None:
+            rows = self.client.table("bookings").select(
+                "booking_number, status, scheduled_date, scheduled_start_time, scheduled_end_time, "
+                "estimated_duration_minutes, routes(vehicle_id, vehicles(name))"
+            ).gte("scheduled_date", start.isoformat()) \
+                .lte("scheduled_date", end.isoformat()) \
+                .not_.in_("status", ["cancelled", "no_show", "rescheduled"]) \
+                .not_.is_("route_id", "null") \
+                .is_("deleted_at", "null") \
+                .execute().data or []
+            index = ScheduleIndex()
+            index.add_bookings(rows)
+            _SCHEDULE_CACHE.set(key, index)
+        return index
+
+    def _find_vehicle_ids(self, vehicle_query: str) -> Dict[str, str]:
+        pattern = quote_filter_value(f"%{vehicle_query}%")
+        vehicles = self.client.table("vehicles").select("id, name") \
+            .or_(f"name.ilike.{pattern},license_plate.ilike.{pattern}") \
+            .limit(10) \
+            .execute().data or []
+        return {v["id"]: v["name"] for v in vehicles}
+
+    def find_schedule_conflicts(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        vehicle_query: Optional[str] = None,
+        max_daily_hours: float = 10,
+        period: Optional[str] = None,
+    ) -> Dict:
+        """
+        Find double-booked or over-capacity vehicles for a date range.
+
+        Overlaps come from a sweep over each vehicle/day's bookings sorted by start time
+        (O(n log n)); a day is over capacity when its booked durations add up to more
+        than `max_daily_hours`. Vehicles are taken from each booking's route.
+        A `period` such as 'next_week' replaces start_date/end_date.
+        """
+        if not self._check_rate_limit():
+            return self._rate_limit_error()
+        try:
+            if period:
+                start, end = parse_period(period)
+            else:
+                start = parse_date(start_date, default=date.today())
+                end = parse_date(end_date, default=start + timedelta(days=6))
+            if end < start:
+                start, end = end, start
+            if (end - start).days > 62:
+                return {"error": "Please use a date range of at most two months."}
+            index = self._schedule_index(start, end)
+            vehicle_ids = self._find_vehicle_ids(vehicle_query) if vehicle_query else None
+            if vehicle_query and not vehicle_ids:
+                return {"message": f"No vehicles found matching '{vehicle_query}'."}
+
+            capacity = int(float(max_daily_hours or 10) * 60)
+            overlaps, over_capacity = [], []
+            for (vehicle_id, day), _ in sorted(index.groups(), key=lambda item: (item[0][1], item[0][0])):
+                if vehicle_ids is not None and vehicle_id not in vehicle_ids:
+                    continue
+                vehicle = index.vehicle_names.get(vehicle_id, vehicle_id)
+                for pair in index.conflicts(vehicle_id, day):
+                    overlaps.append({"vehicle": vehicle, "date": day, **pair})
+                demanded = index.demanded_minutes(vehicle_id, day)
+                if demanded > capacity:
+                    over_capacity.append({
+                        "vehicle": vehicle,
+                        "date": day,
+                        "booked_hours": round(demanded / 60, 1),
+                        "capacity_hours": round(capacity / 60, 1),
+                    })
+            return {
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "overlapping_bookings": overlaps[:50],
+                "overlap_count": len(overlaps),
+                "over_capacity_days": over_capacity,
+                "bookings_without_start_time": index.untimed,
+            }
+        except Exception as e:
+            return {"error": str(e)}
+
+    def check_vehicle_availability(self, vehicle_query: str, day: str, start_time: str, end_time: str) -> Dict:
+        """
+        Check whether a vehicle is free for a time window ("Is Unit 102 free Tuesday 2-4pm?").
+        Answered from the same per-vehicle interval index as conflict detection.
+        """
+        if not self._check_rate_limit():
+            return self._rate_limit_error()
+        try:
+            target_day = parse_date(day, default=date.today())
+            start, end = to_minutes(start_time), to_minutes(end_time)
+            if start is None or end is None or end <= start:
+                return {"error": "Provide start_time and end_time as HH:MM, with end after start."}
+            vehicles = self._find_vehicle_ids(vehicle_query)
+            if not vehicles:
+                return {"message": f"No vehicles found matching '{vehicle_query}'."}
+            index = self._schedule_index(target_day, target_day)
+            results = []
+            for vehicle_id, name in vehicles.items():
+                busy = index.overlapping(vehicle_id, target_day.isoformat(), start, end)
+                results.append({"vehicle": name, "available": not busy, "conflicting_bookings": busy})
+            return {
+                "date": target_day.isoformat(),
+                "window": [format_minutes(start), format_minutes(end)],
+                "vehicles": results,
+            }
+        except Exception as e:
+            return {"error": str(e)}
+
+    def get_upcoming_schedule(
+        self,
+        client_query: Optional[str] = None,
+        days: int = 90,
+        start_date: Optional[str] = None,
+        limit: int = 25,
+    ) -> Dict:
+        """
+        Forward-looking booking schedule including recurring series ("What's booked for X over 90 days?").
+
+        One-time bookings and recurring parents are each fetched in one bulk query;
+        recurring parents are expanded lazily and merged with one-time bookings in date
+        order, so only the returned sample is ever materialized.
+        """
+        if not self._check_rate_limit():
+            return self._rate_limit_error()
+        try:
+            start = parse_date(start_date, default=date.today())
+            end = start + timedelta(days=max(1, min(int(days or 90), 366)) - 1)
+            columns = "id, booking_number, status, scheduled_date, scheduled_start_time, booking_type, " \
+                      "recurrence_pattern, recurrence_end_date, parent_booking_id, services(name)"
+            if client_query:
+                columns += ", clients!inner(name)"
+
+            def scoped(query):
+                query = query.neq("status", "cancelled").is_("deleted_at", "null")
+                if client_query:
+                    query = query.ilike("clients.name", f"%{client_query}%")
+                return query
+
+            one_time = scoped(self.client.table("bookings").select(columns)) \
+                .gte("scheduled_date", start.isoformat()) \
+                .lte("scheduled_date", end.isoformat()) \
+                .or_("booking_type.eq.one_time,parent_booking_id.not.is.null") \
+                .execute().data or []
+            parents = scoped(self.client.table("bookings").select(columns)) \
+                .eq("booking_type", "recurring") \
+                .is_("parent_booking_id", "null") \
+                .lte("scheduled_date", end.isoformat()) \
+                .or_(f"recurrence_end_date.is.null,recurrence_end_date.gte.{start.isoformat()}") \
+                .execute().data or []
+
+            limit = max(1, min(int(limit or 25), 100))
+            sample, by_month = [], {}
+            total = recurring = 0
+            for day, booking in merged_schedule(one_time, parents, start, end):
+                total += 1
+                is_series = booking.get("booking_type") == "recurring" and not booking.get("parent_booking_id")
+                recurring += is_series
+                month = day.strftime("%Y-%m")
+                by_month[month] = by_month.get(month, 0) + 1
+                if len(sample) < limit:
+                    sample.append({
+                        "date": day.isoformat(),
+                        "start_time": booking.get("scheduled_start_time"),
+                        "booking_number": booking.get("booking_number"),
+                        "service": (booking.get("services") or {}).get("name"),
+                        "customer": (booking.get("clients") or {}).get("name"),
+                        "recurring": booking.get("recurrence_pattern") if is_series else None,
+                        "status": booking.get("status"),
+                    })
+
+            if total == 0:
+                who = f" for '{client_query}'" if client_query else ""
+                return {"message": f"No bookings found{who} between {start.isoformat()} and {end.isoformat()}."}
+            return {
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "total_occurrences": total,
+                "from_recurring_series": recurring,
+                "recurring_series": len(parents),
+                "by_month": by_month,
+                "upcoming": sample,
+                "truncated": total > len(sample),
+            }
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _booking_rollup_rows(self, start: date, end: date, status: Optional[str], priority: Optional[str]) -> List[Dict]:
+        """
+        (scheduled_date, status, count) groups for a window, grouped by the database.
+
+        Uses PostgREST aggregates over the (scheduled_date, status) index. If aggregates
+        are disabled on the server, falls back to keyset paging through just those columns.
+        """
+        def scoped(query):
+            query = query.gte("scheduled_date", start.isoformat()).lte("scheduled_date", end.isoformat()) \
+                .is_("deleted_at", "null")
+            if status:
+                query = query.eq("status", status.lower())
+            if priority:
+                query = query.eq("priority", priority.lower())
+            return query
+
+        try:
+            return scoped(self.client.table("bookings").select("scheduled_date, status, count()")).execute().data or []
+        except Exception:
+            counts: Dict[tuple, int] = {}
+            for row in self._keyset_rows("bookings", "id, scheduled_date, status", scoped):
+                key = (row["scheduled_date"], row["status"])
+                counts[key] = counts.get(key, 0) + 1
+            return [{"scheduled_date": d, "status": st, "count": n} for (d, st), n in counts.items()]
+
+    def get_bookings_summary(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        sample_size: int = 0,
+        period: Optional[str] = None,
+    ) -> Dict:
+        """
+        Per-day and per-status booking counts for a date window ("How busy is next week?").
+
+        The window is start_date/end_date or a `period` such as 'next_week'. Counts are
+        grouped by the database, with an optional capped sample of bookings.
+        Windows that ended before today are cached indefinitely; windows that include
+        today are cached briefly.
+        """
+        if not self._check_rate_limit():
+            return self._rate_limit_error()
+        try:
+            if period:
+                start, end = parse_period(period)
+            else:
+                start = parse_date(start_date, default=date.today())
+                end = parse_date(end_date, default=start + timedelta(days=6))
+            if end < start:
+                start, end = end, start
+            sample_size = max(0, min(int(sample_size or 0), 20))
+            key = (start, end, (status or "").lower(), (priority or "").lower(), sample_size)
+            cached = _SUMMARY_CACHE.get(key)
+            if cached is not None:
+                return cached
+
+            by_day: Dict[str, Dict[str, int]] = {}
+            by_status: Dict[str, int] = {}
+            total = 0
+            for row in self._booking_rollup_rows(start, end, status, priority):
+                count = int(row["count"])
+                day = by_day.setdefault(row["scheduled_date"], {})
+                day[row["status"]] = day.get(row["status"], 0) + count
+                by_status[row["status"]] = by_status.get(row["status"], 0) + count
+                total += count
+
+            result = {
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "total_bookings": total,
+                "by_status": by_status,
+                "by_day": {d: {"total": sum(c.values()), **c} for d, c in sorted(by_day.items())},
+            }
+            if sample_size:
+                query = self.client.table("bookings").select(
+                    "booking_number, scheduled_date, scheduled_start_time, status, priority, clients(name)"
+                ).gte("scheduled_date", start.isoformat()).lte("scheduled_date", end.isoformat()) \
+                    .is_("deleted_at", "null")
+                if status:
+                    query = query.eq("status", status.lower())
+                if priority:
+                    query = query.eq("priority", priority.lower())
+                result["sample"] = query.order("scheduled_date").limit(sample_size).execute().data or []
+
+            today = date.today()
+            if end < today:
+                ttl = None
+            elif start <= today:
+                ttl = 60
+            else:
+                ttl = 300
+            _SUMMARY_CACHE.set(key, result, ttl_seconds=ttl)
+            return result
+        except Exception as e:
+            return {"error": str(e)}
+
+    def get_maintenance_due(self, within_days: int = 14) -> Dict:
+        """
+        Vehicles overdue for maintenance or due within the next `within_days` days.
+
+        Range queries run against the worker's sorted maintenance index. Overdue vehicles
+        that still have upcoming bookings are flagged using one batched bookings query.
+        """
+        if not self._check_rate_limit():
+            return self._rate_limit_error()
+        try:
+            within_days = max(0, min(int(within_days or 14), 365))
+            today = date.today()
+            MAINTENANCE_INDEX.refresh(self.client)
+
+            def describe(row: Dict) -> Dict:
+                due = date.fromisoformat(row["next_maintenance_date"])
+                return {
+                    "vehicle": row.get("name"),
+                    "status": row.get("status"),
+                    "next_maintenance_date": row["next_maintenance_date"],
+                    "days_until_due": (due - today).days,
+                    "last_maintenance_date": row.get("last_maintenance_date"),
+                    "odometer_reading": row.get("odometer_reading"),
+                }
+
+            overdue_rows = MAINTENANCE_INDEX.due_between(None, today - timedelta(days=1))
+            due_rows = MAINTENANCE_INDEX.due_between(today, today + timedelta(days=within_days))
+
+            upcoming: Dict[str, Dict] = {}
+            if overdue_rows:
+                bookings = self.client.table("bookings") \
+                    .select("booking_number, scheduled_date, routes!inner(vehicle_id)") \
+                    .in_("routes.vehicle_id", [row["id"] for row in overdue_rows]) \
+                    .gte("scheduled_date", today.isoformat()) \
+                    .not_.in_("status", ["cancelled", "completed", "no_show", "rescheduled"]) \
+                    .is_("deleted_at", "null") \
+                    .order("scheduled_date") \
+                    .execute().data or []
+                for booking in bookings:
+                    vehicle_id = (booking.get("routes") or {}).get("vehicle_id")
+                    entry = upcoming.setdefault(vehicle_id, {"count": 0, "next_booking": booking})
+                    entry["count"] += 1
+
+            overdue = []
+            for row in overdue_rows:
+                item = describe(row)
+                booked = upcoming.get(row["id"])
+                item["upcoming_bookings"] = booked["count"] if booked else 0
+                if booked:
+                    item["next_booking"] = {
+                        "booking_number": booked["next_booking"].get("booking_number"),
+                        "scheduled_date": booked["next_booking"].get("scheduled_date"),
+                    }
+                overdue.append(item)
+
+            return {
+                "as_of": today.isoformat(),
+                "within_days": within_days,
+                "overdue_count": len(overdue),
+                "overdue_with_upcoming_bookings": sum(1 for item in overdue if item["upcoming_bookings"]),
+                "overdue": overdue,
+                "due_soon_count": len(due_rows),
+                "due_soon": [describe(row) for row in due_rows],
+                "vehicles_without_schedule": MAINTENANCE_INDEX.unscheduled(),
+            }
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _keyset_rows(self, table: str, columns: str, scope, page_size: int = 1000) -> List[Dict]:
+        """
+        Fetch every row matching `scope` in pages keyed on `id`.
+
+        Each page starts after the last id seen (`id > last`) instead of using an
+        offset, so deep pages cost the same as the first one.
+        """
+        rows: List[Dict] = []
+        last_id = None
+        while True:
+            query = scope(self.client.table(table).select(columns))
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            page = query.order("id").limit(page_size).execute().data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            last_id = page[-1]["id"]
+
+    def get_vehicle_utilization(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        vehicle_query: Optional[str] = None,
+        limit: int = 10,
+    ) -> Dict:
+        """
+        Per-vehicle utilization over a window ("Which trucks were underused last month?").
+
+        Routes and completed bookings are paged in with only the needed columns and
+        aggregated column-wise; vehicles are returned least utilized first, with fleet
+        percentiles. Windows that ended before today are cached without expiry.
+        """
+        if not self._check_rate_limit():
+            return self._rate_limit_error()
+        try:
+            # Default window is the previous calendar month
+            last_month_end = date.today().replace(day=1) - timedelta(days=1)
+            start = parse_date(start_date, default=last_month_end.replace(day=1))
+            end = parse_date(end_date, default=last_month_end if start_date is None else start + timedelta(days=30))
+            if end < start:
+                start, end = end, start
+            limit = max(1, min(int(limit or 10), 50))
+            key = (start, end, (vehicle_query or "").strip().lower(), limit)
+            cached = _UTILIZATION_CACHE.get(key)
+            if cached is not None:
+                return cached
+
+            if vehicle_query:
+                names = self._find_vehicle_ids(vehicle_query)
+                if not names:
+                    return {"message": f"No vehicles found matching '{vehicle_query}'."}
+            else:
+                VEHICLE_INDEX.refresh(self.client)
+                names = VEHICLE_INDEX.vehicle_names()
+
+            def route_scope(query):
+                query = query.gte("route_date", start.isoformat()).lte("route_date", end.isoformat()) \
+                    .not_.is_("vehicle_id", "null") \
+                    .not_.in_("status", ["cancelled", "failed"]) \
+                    .is_("deleted_at", "null")
+                return query.in_("vehicle_id", list(names)) if vehicle_query else query
+
+            def booking_scope(query):
+                query = query.eq("status", "completed") \
+                    .gte("scheduled_date", start.isoformat()).lte("scheduled_date", end.isoformat())
+                return query.in_("routes.vehicle_id", list(names)) if vehicle_query else query
+
+            routes = self._keyset_rows(
+                "routes",
+                "id, vehicle_id, route_date, total_duration_minutes, total_distance_km, actual_start_time, actual_end_time",
+                route_scope,
+            )
+            bookings = [
+                {"vehicle_id": row["routes"]["vehicle_id"]}
+                for row in self._keyset_rows("bookings", "id, routes!inner(vehicle_id)", booking_scope)
+                if (row.get("routes") or {}).get("vehicle_id")
+            ]
+
+            vehicles = vehicle_utilization(routes, bookings, start, end, names)
+            vehicles.sort(key=lambda v: (v["utilization_pct"] or 0, v["vehicle"]))
+            fleet = np.array([v["utilization_pct"] or 0 for v in vehicles], dtype=np.float64)
+            for v in vehicles:
+                v.pop("vehicle_id")
+
+            result = {
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "working_days": working_days(start, end),
+                "vehicle_count": len(vehicles),
+                "route_count": len(routes),
+                "fleet_utilization_pct": {
+                    "mean": round(float(fleet.mean()), 1),
+                    "p50": round(float(np.percentile(fleet, 50)), 1),
+                    "p90": round(float(np.percentile(fleet, 90)), 1),
+                } if fleet.size else None,
+                "least_utilized": vehicles[:limit],
+            }
+            if len(vehicles) > limit:
+                result["most_utilized"] = vehicles[-min(3, len(vehicles) - limit):][::-1]
+            _UTILIZATION_CACHE.set(key, result, ttl_seconds=None if end < date.today() else 300)
+            return result
+        except Exception as e:
+            return {"error": str(e)}
+
+    def get_customer_overview(self, customer_query: str, bookings_limit: int = 5) -> Dict:
+        """
+        One-call customer profile ("Tell me about Perkins"): contact details, service
+        locations and the next few upcoming bookings with service names.
+
+        Uses the same name/email ILIKE match as `search_customers`, with locations and
+        bookings embedded in the same PostgREST request. Child collections are capped
+        and only the displayed columns are selected.
+        """
+        if not self._check_rate_limit():
+            return self._rate_limit_error()
+        try:
+            bookings_limit = max(1, min(int(bookings_limit or 5), 20))
+            pattern = quote_filter_value(f"%{customer_query}%")
+            response = self.client.from_("clients") \
+                .select(
+                    "id, name, company_name, email, phone, status, city, state, notes, "
+                    "locations(name, address_line1, city, state, location_type, is_primary), "
+                    "bookings(booking_number, scheduled_date, scheduled_start_time, status, priority, services(name))"
+                ) \
+                .or_(f"name.ilike.{pattern},email.ilike.{pattern}") \
+                .gte("bookings.scheduled_date", date.today().isoformat()) \
+                .not_.in_("bookings.status", ["cancelled", "completed", "no_show"]) \
+                .order("scheduled_date", foreign_table="bookings") \
+                .limit(bookings_limit, foreign_table="bookings") \
+                .order("is_primary", desc=True, foreign_table="locations") \
+                .limit(10, foreign_table="locations") \
+                .limit(5) \
+                .execute()
+            matches = response.data or []
+            if not matches:
+                return {"message": f"No customers found matching '{customer_query}'. Try search_customers for a fuzzy search."}
+
+            # Prefer an exact name match, otherwise the first hit
+            wanted = customer_query.strip().lower()
+            matches.sort(key=lambda c: (c.get("name") or "").lower() != wanted)
+            customer = matches[0]
+            bookings = customer.pop("bookings", None) or []
+            overview = {
+                "customer": {k: v for k, v in customer.items() if k not in ("id", "locations")},
+                "locations": customer.get("locations") or [],
+                "upcoming_bookings": [
+                    {
+                        "booking_number": b.get("booking_number"),
+                        "scheduled_date": b.get("scheduled_date"),
+                        "scheduled_start_time": b.get("scheduled_start_time"),
+                        "status": b.get("status"),
+                        "priority": b.get("priority"),
+                        "service": (b.get("services") or {}).get("name"),
+                    }
+                    for b in bookings
+                ],
+            }
+            if len(matches) > 1:
+                overview["other_matches"] = [c.get("name") for c in matches[1:]]
+            return overview
+        except Exception as e:
+            return {"error": str(e)}
+
+    def lookup_service(self, service_query: Optional[str] = None) -> Dict:
+        """
+        Look up services by name or code (durations and base price).
+
+        Answered from the worker's in-memory catalog; the database is only polled for
+        changes every few minutes, so this does not count against the query rate limit.
+        """
+        try:
+            SERVICE_CATALOG.refresh(self.client)
+            matches = SERVICE_CATALOG.lookup(service_query or "", limit=5 if service_query else 50)
+            if not matches:
+                return {
+                    "message": f"No services found matching '{service_query}'.",
+                    "available_services": [s.name for s in SERVICE_CATALOG.all()],
+                }
+            return {
+                "services": [
+                    {
+                        "name": s.name,
+                        "code": s.code,
+                        "service_type": s.service_type,
+                        "description": s.description,
+                        "duration_minutes": {
+                            "average": s.average_duration_minutes,
+                            "min": s.minimum_duration_minutes,
+                            "max": s.maximum_duration_minutes,
+                        },
+                        "base_price": s.base_price,
+                        "currency": s.price_currency,
+                        "requires_appointment": s.requires_appointment,
+                        "equipment_required": list(s.equipment_required),
+                        "skills_required": list(s.skills_required),
+                    }
+                    for s in matches
+                ]
+            }
+        except Exception as e:
+            return {"error": str(e)}
+
+    def find_booking(self, query: str, limit: int = 5) -> Dict:
+        """
+        Find bookings by booking number ("BK-20260115-007") or by text from their
+        special instructions or internal notes.
+
+        Booking numbers are normalized and matched exactly, so the lookup goes through
+        the booking_number index. Anything else is a capped full-text search over the
+        two note columns, falling back to ILIKE if full-text search is unavailable.
+        """
+        if not self._check_rate_limit():
+            return self._rate_limit_error()
+        try:
+            text = (query or "").strip()
+            if not text:
+                return {"error": "Provide a booking number or some text from the booking's notes."}
+            limit = max(1, min(int(limit or 5), 20))
+            reference = normalize_booking_number(text)
+            key = (reference or text.lower(), limit)
+            cached = _BOOKING_LOOKUP_CACHE.get(key)
+            if cached is not None:
+                return cached
+
+            columns = "booking_number, status, priority, scheduled_date, scheduled_start_time, " \
+                      "special_instructions, internal_notes, clients(name), services(name), routes(route_name)"
+
+            def active():
+                return self.client.table("bookings").select(columns).is_("deleted_at", "null")
+
+            if reference:
+                rows = active().eq("booking_number", reference).limit(1).execute().data or []
+                result = {"match": "booking_number", "query": reference, "bookings": rows}
+                if not rows:
+                    result["message"] = f"No booking found with number {reference}."
+            else:
+                try:
+                    terms = text.replace(",", " ").replace("(", " ").replace(")", " ")
+                    rows = active() \
+                        .or_(f"special_instructions.wfts(english).{terms},internal_notes.wfts(english).{terms}") \
+                        .order("scheduled_date", desc=True) \
+                        .limit(limit) \
+                        .execute().data or []
+                    match = "full_text"
+                except Exception:
+                    rows = []
+                    match = None
+                if not rows:
+                    pattern = quote_filter_value(f"%{text}%")
+                    rows = active() \
+                        .or_(f"special_instructions.ilike.{pattern},internal_notes.ilike.{pattern}") \
+                        .order("scheduled_date", desc=True) \
+                        .limit(limit) \
+                        .execute().data or []
+                    match = "substring"
+                result = {"match": match, "query": text, "bookings": rows}
+                if not rows:
+                    result["message"] = f"No bookings mention '{text}'."
+
+            for row in result["bookings"]:
+                row["client"] = (row.pop("clients", None) or {}).get("name")
+                row["service"] = (row.pop("services", None) or {}).get("name")
+                row["route"] = (row.pop("routes", None) or {}).get("route_name")
+            _BOOKING_LOOKUP_CACHE.set(key, result)
+            return result
+        except Exception as e:
+            return {"error": str(e)}
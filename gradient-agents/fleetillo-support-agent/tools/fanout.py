@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+
+def fingerprint(messages: List[Dict], **params) -> str:
+    """
+    Build a key that is equal for equivalent completion requests.
+
+    Messages are reduced to role, whitespace-normalized content and tool calls by
+    name and arguments. Tool call ids are dropped because they are random per
+    request while the tool results they point at are not.
+    """
+    normalized = []
+    for msg in messages:
+        entry = {"role": msg.get("role"), "content": " ".join((msg.get("content") or "").split())}
+        if msg.get("tool_calls"):
+            entry["tool_calls"] = [
+                [call["function"]["name"], _normalize_arguments(call["function"].get("arguments"))]
+                for call in msg["tool_calls"]
+            ]
+        normalized.append(entry)
+    payload = json.dumps({"messages": normalized, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _normalize_arguments(arguments: Optional[str]) -> Any:
+    try:
+        return json.loads(arguments or "{}")
+    except (TypeError, ValueError):
+        return arguments
+
+
+class _Broadcast:
+    """One upstream generation and the queues of everyone subscribed to it."""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.subscribers: List[asyncio.Queue] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        # Unbounded per-subscriber queue: a slow reader only grows its own buffer
+        queue: asyncio.Queue = asyncio.Queue()
+        for chunk in self.chunks:
+            queue.put_nowait(chunk)
+        if self.finished:
+            queue.put_nowait(_Failure(self.error) if self.error else _END)
+        else:
+            self.subscribers.append(queue)
+        return queue
+
+    def publish(self, chunk: Any) -> None:
+        self.chunks.append(chunk)
+        for queue in self.subscribers:
+            queue.put_nowait(chunk)
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        self.finished = True
+        self.error = error
+        for queue in self.subscribers:
+            queue.put_nowait(_Failure(error) if error else _END)
+        self.subscribers = []
+
+
+class GenerationFanout:
+    """
+    Shares one streamed LLM generation between equivalent concurrent requests.
+
+    The first request for a key starts the upstream stream in a background task that
+    copies every chunk into each subscriber's own queue. Requests that arrive while it
+    is still streaming replay the chunks seen so far and then follow live.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, _Broadcast] = {}
+        self.requests = 0
+        self.generations = 0
+        self.shared = 0
+
+    def stream(self, key: str, create: Callable[[], Awaitable[AsyncIterable]]) -> AsyncIterator:
+        """Subscribe to the in-flight generation for `key`, starting it with `create()` if needed."""
+        self.requests += 1
+        loop = asyncio.get_running_loop()
+        broadcast = self._in_flight.get(key)
+        # Queues and the pump task belong to one event loop; never join across loops
+        if broadcast is None or broadcast.task.get_loop() is not loop:
+            broadcast = _Broadcast()
+            self._in_flight[key] = broadcast
+            broadcast.task = loop.create_task(self._pump(key, broadcast, create))
+            self.generations += 1
+        else:
+            self.shared += 1
+        return self._consume(broadcast, broadcast.subscribe())
+
+    async def _pump(self, key: str, broadcast: _Broadcast, create: Callable[[], Awaitable[AsyncIterable]]) -> None:
+        try:
+            upstream = await create()
+            async for chunk in upstream:
+                broadcast.publish(chunk)
+        except asyncio.CancelledError:
+            # Subscribers weren't cancelled themselves, so they get an ordinary error
+            broadcast.close(error=RuntimeError("Shared generation was cancelled"))
+            raise
+        except Exception as e:
+            broadcast.close(error=e)
+        except BaseException as e:
+            broadcast.close(error=e)
+            raise
+        else:
+            broadcast.close()
+        finally:
+            if self._in_flight.get(key) is broadcast:
+                del self._in_flight[key]
+
+    @staticmethod
+    async def _consume(broadcast: _Broadcast, queue: asyncio.Queue) -> AsyncIterator:
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            if queue in broadcast.subscribers:
+                broadcast.subscribers.remove(queue)
+
+    def stats(self) -> Dict[str, int]:
+        """Return fan-out counters for this worker."""
+        return {
+            "requests": self.requests,
+            "generations": self.generations,
+            "shared": self.shared,
+            "in_flight": len(self._in_flight),
+        }
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_END = object()
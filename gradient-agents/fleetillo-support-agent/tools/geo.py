@@ -0,0 +1,317 @@
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Vectorized great-circle distance in km from one point to arrays of points (degrees)."""
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons) - math.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Parse a PostgREST timestamptz string to epoch seconds."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class VehicleSnapshot:
+    """
+    The worker's copy of the `vehicles` table, shared by the indexes built from it.
+
+    The first refresh loads every vehicle (projected columns only); later refreshes only
+    fetch rows whose `updated_at` moved past the last one seen, with a periodic full
+    reload to drop deleted vehicles. Each change swaps in a new rows dict and bumps
+    `version`, so an index rebuilds only when the rows it was built from are stale.
+    """
+
+    COLUMNS = "id, name, status, service_types, current_latitude, current_longitude, last_location_update, " \
+              "next_maintenance_date, last_maintenance_date, odometer_reading, updated_at, deleted_at"
+    FULL_REFRESH_SECONDS = 900
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: Dict[str, Dict] = {}
+        self._watermark: Optional[str] = None
+        self._watermark_ts: Optional[float] = None
+        self._last_refresh: Optional[float] = None
+        self._last_full_refresh = 0.0
+        self.version = 0
+
+    def refresh(self, client, max_age: float, force: bool = False) -> None:
+        """Pull changes from the `vehicles` table unless the last pull is under `max_age` seconds old."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._last_refresh is not None and now - self._last_refresh < max_age:
+                return
+            full = self._watermark is None or now - self._last_full_refresh >= self.FULL_REFRESH_SECONDS
+            watermark = self._watermark
+
+        query = client.table("vehicles").select(self.COLUMNS)
+        if not full:
+            query = query.gt("updated_at", watermark)
+        rows = query.execute().data or []
+
+        with self._lock:
+            if full or rows:
+                updated_rows = {} if full else dict(self._rows)
+                for row in rows:
+                    if row.get("deleted_at"):
+                        updated_rows.pop(row["id"], None)
+                    else:
+                        updated_rows[row["id"]] = row
+                    updated = parse_timestamp(row.get("updated_at"))
+                    if updated is not None and (self._watermark_ts is None or updated > self._watermark_ts):
+                        self._watermark_ts = updated
+                        self._watermark = row["updated_at"]
+                self._rows = updated_rows
+                self.version += 1
+            if full:
+                self._last_full_refresh = now
+            self._last_refresh = now
+
+    def rows(self) -> Tuple[int, Dict[str, Dict]]:
+        """The current version and rows by id; the dict is replaced, never mutated, on change."""
+        with self._lock:
+            return self.version, self._rows
+
+
+class VehicleSpatialIndex:
+    """
+    In-memory grid index of current vehicle positions, shared by all requests in a worker.
+
+    Built from a `VehicleSnapshot` and rebuilt whenever the snapshot changes. Queries
+    search grid rings outward from the target cell and compute haversine distances
+    with NumPy over the candidates only.
+    """
+
+    CELL_DEGREES = 0.05  # ~5.5 km of latitude per cell
+    REFRESH_SECONDS = 15
+    MAX_RING_SEARCH = 64
+
+    def __init__(self, snapshot: Optional[VehicleSnapshot] = None):
+        self.snapshot = snapshot or VehicleSnapshot()
+        self._lock = threading.Lock()
+        self._rows: Dict[str, Dict] = {}
+        self._version: Optional[int] = None
+        self._build([])
+
+    def refresh(self, client, force: bool = False) -> None:
+        """Pull position changes from the `vehicles` table if the snapshot is due for it."""
+        self.snapshot.refresh(client, self.REFRESH_SECONDS, force)
+        version, rows = self.snapshot.rows()
+        with self._lock:
+            if version != self._version:
+                self._rows = rows
+                self._build(rows.values())
+                self._version = version
+
+    def _build(self, rows: Iterable[Dict]) -> None:
+        rows = list(rows)
+        self.ids = [row["id"] for row in rows]
+        self.names = [row.get("name") for row in rows]
+        self.statuses = np.array([(row.get("status") or "").lower() for row in rows], dtype=object)
+        self.service_types = [{s.lower() for s in (row.get("service_types") or [])} for row in rows]
+        self.lats = np.array([_float(row.get("current_latitude")) for row in rows], dtype=np.float64)
+        self.lons = np.array([_float(row.get("current_longitude")) for row in rows], dtype=np.float64)
+        self.located_at = np.array(
+            [parse_timestamp(row.get("last_location_update")) or np.nan for row in rows], dtype=np.float64
+        )
+        self.has_position = ~(np.isnan(self.lats) | np.isnan(self.lons))
+
+        grid: Dict[tuple, List[int]] = {}
+        for i in np.flatnonzero(self.has_position):
+            grid.setdefault(self._cell(self.lats[i], self.lons[i]), []).append(int(i))
+        self.grid = {cell: np.array(members, dtype=np.int64) for cell, members in grid.items()}
+        if self.grid:
+            cells = np.array(list(self.grid.keys()))
+            self._cell_min, self._cell_max = cells.min(axis=0), cells.max(axis=0)
+
+    def _cell(self, lat: float, lon: float) -> tuple:
+        return (int(math.floor(lat / self.CELL_DEGREES)), int(math.floor(lon / self.CELL_DEGREES)))
+
+    def position(self, vehicle_id: str) -> Optional[Dict]:
+        """Return the indexed position of one vehicle, if known."""
+        with self._lock:
+            row = self._rows.get(vehicle_id)
+        if not row or row.get("current_latitude") is None or row.get("current_longitude") is None:
+            return None
+        return {
+            "latitude": float(row["current_latitude"]),
+            "longitude": float(row["current_longitude"]),
+            "last_location_update": row.get("last_location_update"),
+        }
+
+    def vehicle_names(self) -> Dict[str, str]:
+        """Map of vehicle id to name for every indexed vehicle."""
+        with self._lock:
+            return {vehicle_id: row.get("name") for vehicle_id, row in self._rows.items()}
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        limit: int = 5,
+        statuses: Optional[List[str]] = None,
+        service_type: Optional[str] = None,
+        stale_after_minutes: float = 30,
+    ) -> List[Dict]:
+        """Return the `limit` closest vehicles matching the filters, nearest first."""
+        with self._lock:
+            if not self.grid:
+                return []
+            eligible = self.has_position.copy()
+            if statuses:
+                eligible &= np.isin(self.statuses, [s.lower() for s in statuses])
+            if service_type:
+                wanted = service_type.lower()
+                eligible &= np.array([wanted in types for types in self.service_types], dtype=bool)
+            if not eligible.any():
+                return []
+            limit = min(limit, int(eligible.sum()))
+
+            qy, qx = self._cell(latitude, longitude)
+            max_ring = int(max(
+                abs(qy - self._cell_min[0]), abs(qy - self._cell_max[0]),
+                abs(qx - self._cell_min[1]), abs(qx - self._cell_max[1]),
+            ))
+            candidates: List[np.ndarray] = []
+            found = 0
+            if max_ring > self.MAX_RING_SEARCH:
+                # Target is far from the fleet: ring walking would touch mostly empty cells
+                candidates.append(np.flatnonzero(eligible))
+                max_ring = -1
+            for ring in range(max_ring + 1):
+                for cell in _ring_cells(qy, qx, ring):
+                    members = self.grid.get(cell)
+                    if members is not None:
+                        members = members[eligible[members]]
+                        if members.size:
+                            candidates.append(members)
+                            found += members.size
+                if found >= limit:
+                    # Anything outside this ring is at least `ring` cells away; stop once the
+                    # current k-th best is closer than that.
+                    idx = np.concatenate(candidates)
+                    dist = haversine_km(latitude, longitude, self.lats[idx], self.lons[idx])
+                    if np.partition(dist, limit - 1)[limit - 1] <= ring * self._min_cell_km(latitude, ring):
+                        break
+
+            idx = np.concatenate(candidates)
+            dist = haversine_km(latitude, longitude, self.lats[idx], self.lons[idx])
+            order = np.argsort(dist)[:limit]
+            now = time.time()
+            results = []
+            for i, d in zip(idx[order], dist[order]):
+                located_at = float(self.located_at[i])
+                age_minutes = None if math.isnan(located_at) else (now - located_at) / 60
+                results.append({
+                    "id": self.ids[i],
+                    "name": self.names[i],
+                    "status": self.statuses[i],
+                    "service_types": sorted(self.service_types[i]),
+                    "distance_km": round(float(d), 2),
+                    "last_location_update": self._rows[self.ids[i]].get("last_location_update"),
+                    "position_age_minutes": None if age_minutes is None else round(age_minutes, 1),
+                    "stale": bool(age_minutes is None or age_minutes > stale_after_minutes),
+                })
+            return results
+
+    def _min_cell_km(self, latitude: float, ring: int) -> float:
+        # Longitude cells shrink towards the poles; use the narrowest latitude the ring reaches
+        widest_lat = min(89.0, abs(latitude) + (ring + 1) * self.CELL_DEGREES)
+        return KM_PER_DEGREE_LAT * self.CELL_DEGREES * math.cos(math.radians(widest_lat))
+
+
+def grid_density(
+    lats: np.ndarray,
+    lons: np.ndarray,
+    cell_km: float = 5.0,
+    top_n: int = 5,
+    weights: Optional[Dict[str, np.ndarray]] = None,
+) -> List[Dict]:
+    """
+    Bin points into a square-ish grid of `cell_km` cells and return the busiest cells.
+
+    Each cell reports its point count, centroid, and the sum of any extra boolean/number
+    `weights` arrays (e.g. urgent bookings). Cells are also labelled with a compass
+    direction relative to the centroid of all points, which is what "north side" means
+    to most users.
+    """
+    if lats.size == 0:
+        return []
+    mean_lat = float(lats.mean())
+    dlat = cell_km / KM_PER_DEGREE_LAT
+    dlon = cell_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(mean_lat)), 0.01))
+    rows = np.floor(lats / dlat).astype(np.int64)
+    cols = np.floor(lons / dlon).astype(np.int64)
+    keys = (rows - rows.min()) * (cols.max() - cols.min() + 1) + (cols - cols.min())
+
+    cells, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    centroid_lat = np.bincount(inverse, weights=lats) / counts
+    centroid_lon = np.bincount(inverse, weights=lons) / counts
+    sums = {name: np.bincount(inverse, weights=w.astype(np.float64), minlength=cells.size)
+            for name, w in (weights or {}).items()}
+
+    center_lat, center_lon = mean_lat, float(lons.mean())
+    top = np.argsort(-counts, kind="stable")[:top_n]
+    results = []
+    for i in top:
+        cell = {
+            "count": int(counts[i]),
+            "centroid": {"latitude": round(float(centroid_lat[i]), 5), "longitude": round(float(centroid_lon[i]), 5)},
+            "direction_from_center": compass_direction(center_lat, center_lon, centroid_lat[i], centroid_lon[i]),
+        }
+        for name, values in sums.items():
+            cell[name] = int(values[i])
+        results.append(cell)
+    return results
+
+
+def compass_direction(from_lat: float, from_lon: float, to_lat: float, to_lon: float) -> str:
+    """8-point compass direction from one point to another ('center' when they are ~1 km apart)."""
+    north_km = (to_lat - from_lat) * KM_PER_DEGREE_LAT
+    east_km = (to_lon - from_lon) * KM_PER_DEGREE_LAT * math.cos(math.radians(from_lat))
+    if math.hypot(north_km, east_km) < 1.0:
+        return "center"
+    labels = ["east", "northeast", "north", "northwest", "west", "southwest", "south", "southeast"]
+    return labels[int(round(math.degrees(math.atan2(north_km, east_km)) / 45.0)) % 8]
+
+
+def _ring_cells(cy: int, cx: int, ring: int):
+    if ring == 0:
+        yield (cy, cx)
+        return
+    for dx in range(-ring, ring + 1):
+        yield (cy - ring, cx + dx)
+        yield (cy + ring, cx + dx)
+    for dy in range(-ring + 1, ring):
+        yield (cy + dy, cx - ring)
+        yield (cy + dy, cx + ring)
+
+
+def _float(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+# Shared by every DatabaseTool in the worker so vehicles aren't reloaded per request
+VEHICLES = VehicleSnapshot()
+VEHICLE_INDEX = VehicleSpatialIndex(VEHICLES)
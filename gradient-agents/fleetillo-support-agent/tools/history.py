@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from tools.singleflight import make_key
+
+# How long a tool result already present in the conversation may be reused, per tool.
+# "turns" counts user messages sent after the result; "seconds" only applies when the
+# client attaches a timestamp to its messages. Tools not listed are never reused:
+# find_nearest_vehicles and get_route_progress answer from live vehicle positions, and
+# check_vehicle_availability is asked right before booking, so each always runs fresh.
+TOOL_FRESHNESS = {
+    "get_booking_counts_by_status": {"turns": 2, "seconds": 60},
+    "get_vehicle_status": {"turns": 2, "seconds": 60},
+    "get_route_stops": {"turns": 2, "seconds": 60},
+    "list_active_routes": {"turns": 3, "seconds": 120},
+    "list_vehicles": {"turns": 3, "seconds": 120},
+    "get_customer_overview": {"turns": 3, "seconds": 120},
+    "find_booking": {"turns": 3, "seconds": 120},
+    "get_booking_density": {"turns": 3, "seconds": 120},
+    "get_bookings_summary": {"turns": 3, "seconds": 120},
+    "get_upcoming_schedule": {"turns": 3, "seconds": 120},
+    "find_schedule_conflicts": {"turns": 3, "seconds": 120},
+    "get_vehicle_utilization": {"turns": 3, "seconds": 120},
+    "get_vehicle_count": {"turns": 10, "seconds": 900},
+    "get_customer_count": {"turns": 10, "seconds": 900},
+    "search_customers": {"turns": 10, "seconds": 900},
+    "list_customers": {"turns": 10, "seconds": 900},
+    "get_maintenance_due": {"turns": 10, "seconds": 900},
+    "lookup_service": {"turns": 10, "seconds": 900},
+}
+
+
+class HistoryToolIndex:
+    """
+    Index of tool calls and results already present in a conversation's messages.
+
+    Assistant messages carry the `tool_calls` (name + arguments) and the matching
+    `tool` messages carry the results; both are joined on `tool_call_id`. Only the
+    newest result per tool and normalized arguments is kept.
+    """
+
+    def __init__(self, messages: List[Dict], freshness: Optional[Dict[str, Dict]] = None):
+        self.freshness = TOOL_FRESHNESS if freshness is None else freshness
+        self._entries: Dict[str, Dict] = {}
+        self._index(messages)
+
+    def _index(self, messages: List[Dict]) -> None:
+        calls = {}
+        user_turns = 0
+        for msg in messages:
+            role = msg.get("role")
+            if role == "user":
+                user_turns += 1
+            elif role == "assistant":
+                for call in msg.get("tool_calls") or []:
+                    function = call.get("function") or {}
+                    calls[call.get("id")] = (function.get("name"), function.get("arguments"))
+            elif role == "tool" and msg.get("tool_call_id") in calls:
+                name, arguments = calls[msg["tool_call_id"]]
+                content = msg.get("content")
+                if not name or not content or _is_error_content(content):
+                    continue
+                try:
+                    parsed_args = json.loads(arguments) if isinstance(arguments, str) else (arguments or {})
+                except ValueError:
+                    continue
+                self._entries[make_key(name, parsed_args)] = {
+                    "tool": name,
+                    "content": content,
+                    "turn": user_turns,
+                    "timestamp": _parse_timestamp(msg.get("timestamp") or msg.get("created_at")),
+                }
+        self._user_turns = user_turns
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def age(self, tool_name: str, arguments: Optional[Dict]) -> Optional[Dict]:
+        """Return the age of a prior result as {"turns", "seconds"}, or None if absent."""
+        entry = self._entries.get(make_key(tool_name, arguments))
+        if entry is None:
+            return None
+        seconds = None if entry["timestamp"] is None else max(0.0, time.time() - entry["timestamp"])
+        return {"turns": self._user_turns - entry["turn"], "seconds": seconds}
+
+    def lookup(self, tool_name: str, arguments: Optional[Dict]) -> Optional[str]:
+        """Return the prior result content if it is within the tool's freshness window."""
+        window = self.freshness.get(tool_name)
+        age = self.age(tool_name, arguments)
+        if window is None or age is None:
+            return None
+        if age["turns"] > window["turns"]:
+            return None
+        if age["seconds"] is not None and age["seconds"] > window["seconds"]:
+            return None
+        return self._entries[make_key(tool_name, arguments)]["content"]
+
+
+class ReuseCounter:
+    """Worker-wide counts of tool calls answered from conversation history."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reused: Dict[str, int] = {}
+        self.executed: Dict[str, int] = {}
+
+    def record(self, tool_name: str, reused: bool) -> None:
+        with self._lock:
+            counts = self.reused if reused else self.executed
+            counts[tool_name] = counts.get(tool_name, 0) + 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "reused": sum(self.reused.values()),
+                "executed": sum(self.executed.values()),
+                "reused_by_tool": dict(self.reused),
+            }
+
+
+def _is_error_content(content: str) -> bool:
+    try:
+        parsed = json.loads(content)
+    except (TypeError, ValueError):
+        return False
+    if isinstance(parsed, list) and parsed:
+        parsed = parsed[0]
+    return isinstance(parsed, dict) and "error" in parsed
+
+
+def _parse_timestamp(value) -> Optional[float]:
+    """Accept epoch seconds/milliseconds or an ISO-8601 string."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
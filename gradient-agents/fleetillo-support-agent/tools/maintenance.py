@@ -0,0 +1,63 @@
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Dict, List, Optional
+
+from tools.geo import VEHICLES, VehicleSnapshot
+
+
+class MaintenanceIndex:
+    """
+    Vehicles sorted by `next_maintenance_date`, shared by all requests in a worker.
+
+    Built from the same `VehicleSnapshot` as the vehicle position index, so both share
+    one poll of the `vehicles` table. The sorted array of date ordinals is rebuilt only
+    when the snapshot changed, so "due in the next N days" and "overdue" are two
+    bisections over it.
+    """
+
+    REFRESH_SECONDS = 60
+
+    def __init__(self, snapshot: Optional[VehicleSnapshot] = None):
+        self.snapshot = snapshot or VehicleSnapshot()
+        self._lock = threading.Lock()
+        self._rows: Dict[str, Dict] = {}
+        self._version: Optional[int] = None
+        self._ordinals: List[int] = []
+        self._sorted: List[Dict] = []
+
+    def refresh(self, client, force: bool = False) -> None:
+        """Pull maintenance changes from the `vehicles` table if the snapshot is due for it."""
+        self.snapshot.refresh(client, self.REFRESH_SECONDS, force)
+        version, rows = self.snapshot.rows()
+        with self._lock:
+            if version != self._version:
+                self._rows = {vehicle_id: row for vehicle_id, row in rows.items() if row.get("status") != "retired"}
+                self._build()
+                self._version = version
+
+    def _build(self) -> None:
+        scheduled = [
+            (date.fromisoformat(row["next_maintenance_date"]).toordinal(), row)
+            for row in self._rows.values()
+            if row.get("next_maintenance_date")
+        ]
+        scheduled.sort(key=lambda item: item[0])
+        self._ordinals = [ordinal for ordinal, _ in scheduled]
+        self._sorted = [row for _, row in scheduled]
+
+    def due_between(self, start: Optional[date], end: date) -> List[Dict]:
+        """Vehicles whose next maintenance falls in [start, end] (start=None means no lower bound)."""
+        with self._lock:
+            lo = 0 if start is None else bisect_left(self._ordinals, start.toordinal())
+            hi = bisect_right(self._ordinals, end.toordinal())
+            return self._sorted[lo:hi]
+
+    def unscheduled(self) -> int:
+        """Number of vehicles with no next maintenance date on record."""
+        with self._lock:
+            return len(self._rows) - len(self._sorted)
+
+
+# Shared by every DatabaseTool in the worker
+MAINTENANCE_INDEX = MaintenanceIndex(VEHICLES)
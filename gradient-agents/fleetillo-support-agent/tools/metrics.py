@@ -0,0 +1,244 @@
+import atexit
+import bisect
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; spans a cached tool call (~1 ms) up to a slow model turn
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        # An unlabelled series reports 0 before its first increment
+        self._values: Dict[Tuple[str, ...], float] = {} if self.label_names else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels.get(n, "")) for n in self.label_names), 0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down (in-flight requests and the like)."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label key: [per-bucket counts (last slot is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][slot] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels) -> "_Timer":
+        """Context manager observing the block's wall time in seconds."""
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(str(labels.get(n, "")) for n in self.label_names))
+        return series[2] if series else 0
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, key)} {_number(round(total, 6))}"
+            yield f"{self.name}_count{_labels(self.label_names, key)} {count}"
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class MetricsRegistry:
+    """
+    In-process metrics for one worker, rendered in the Prometheus text format.
+
+    Metrics are created once at import time and updated from request handlers and
+    tool threads. Collectors are callables returning `{name: (help, [(labels, value)])}`
+    and are evaluated at render time, for values other components already keep
+    (e.g. the coalescing and reuse counters behind `get_runtime_stats()`).
+    """
+
+    def __init__(self, namespace: str = ""):
+        self.namespace = namespace
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Dict]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        full_name = f"{self.namespace}_{name}" if self.namespace else name
+        with self._lock:
+            if full_name not in self._metrics:
+                self._metrics[full_name] = cls(full_name, *args, **kwargs)
+            return self._metrics[full_name]
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help, labels, buckets)
+
+    def add_collector(self, collector: Callable[[], Dict]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collector in self._collectors:
+            try:
+                collected = collector()
+            except Exception:
+                continue
+            for name, (help, samples) in sorted(collected.items()):
+                full_name = f"{self.namespace}_{name}" if self.namespace else name
+                lines.append(f"# HELP {full_name} {help}")
+                lines.append(f"# TYPE {full_name} gauge")
+                for labels, value in samples:
+                    lines.append(f"{full_name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def flatten_stats(stats: Dict, label: str = "component") -> List[Tuple[Dict[str, str], float]]:
+    """Turn `{component: {stat: number}}` into gauge samples, skipping non-numeric values."""
+    samples = []
+    for component, values in stats.items():
+        for stat, value in (values or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                samples.append(({label: component, "stat": stat}, value))
+    return samples
+
+
+class MetricsFileWriter:
+    """
+    Periodically writes the rendered registry to a file (e.g. for node_exporter's
+    textfile collector). The write is atomic, and a final write happens at exit.
+    A `{pid}` placeholder in the path gives each uvicorn worker its own file.
+    """
+
+    def __init__(self, registry: MetricsRegistry, path: str, interval_seconds: float = 15.0):
+        self.registry = registry
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self.interval_seconds = interval_seconds
+        self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.write)
+
+    def write(self) -> None:
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                f.write(self.registry.render())
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval_seconds)
+            self.write()
+
+
+def mount_metrics(app, registry: MetricsRegistry, path: str = "/metrics") -> None:
+    """Serve the registry from a FastAPI app next to its other routes."""
+    from fastapi.responses import PlainTextResponse
+
+    async def metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    app.add_api_route(path, metrics, methods=["GET"], include_in_schema=False)
+
+
+def writer_from_env(registry: MetricsRegistry) -> Optional[MetricsFileWriter]:
+    """METRICS_FILE (optionally with {pid}) and METRICS_FILE_INTERVAL seconds."""
+    path = os.environ.get("METRICS_FILE")
+    if not path:
+        return None
+    return MetricsFileWriter(registry, path, float(os.environ.get("METRICS_FILE_INTERVAL", "15") or 15))
+
+
+METRICS = MetricsRegistry(namespace="fleetillo_agent")
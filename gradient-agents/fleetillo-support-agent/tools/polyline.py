@@ -0,0 +1,111 @@
+import math
+from typing import Dict
+
+import numpy as np
+
+from tools.geo import EARTH_RADIUS_KM, KM_PER_DEGREE_LAT
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> np.ndarray:
+    """
+    Decode a Google encoded polyline into an (n, 2) array of [lat, lng] degrees.
+
+    Vectorized: the string is viewed as bytes once, varint groups are found from the
+    continuation bit and summed with `np.add.reduceat`, so no per-point Python objects
+    are created. A truncated trailing group is ignored.
+    """
+    if not encoded:
+        return np.empty((0, 2), dtype=np.float64)
+    data = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    ends = np.flatnonzero((data & 0x20) == 0)
+    if ends.size < 2:
+        return np.empty((0, 2), dtype=np.float64)
+    if ends.size % 2:
+        ends = ends[:-1]
+    data = data[: ends[-1] + 1]
+
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    # Bit offset of each 5-bit chunk within its varint
+    offsets = np.arange(data.size, dtype=np.int64) - np.repeat(starts, ends - starts + 1)
+    values = np.add.reduceat((data & 0x1F) << (offsets * 5), starts)
+    deltas = (values >> 1) ^ -(values & 1)
+    return np.cumsum(deltas.reshape(-1, 2), axis=0) / float(10 ** precision)
+
+
+def encode_polyline(points: np.ndarray, precision: int = 5) -> str:
+    """Encode [lat, lng] points as a Google polyline (used by benchmarks and fixtures)."""
+    scaled = np.round(np.asarray(points, dtype=np.float64) * 10 ** precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    out = []
+    for value in deltas.tolist():
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            out.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        out.append(chr(value + 63))
+    return "".join(out)
+
+
+class RoutePath:
+    """A decoded route polyline with precomputed cumulative distances along it."""
+
+    def __init__(self, points: np.ndarray):
+        self.points = points
+        if len(points) > 1:
+            segment_km = _segment_lengths_km(points)
+            self.cumulative_km = np.concatenate(([0.0], np.cumsum(segment_km)))
+        else:
+            self.cumulative_km = np.zeros(len(points))
+
+    @classmethod
+    def from_encoded(cls, encoded: str) -> "RoutePath":
+        return cls(decode_polyline(encoded))
+
+    @property
+    def total_km(self) -> float:
+        return float(self.cumulative_km[-1]) if len(self.cumulative_km) else 0.0
+
+    def project(self, latitude: float, longitude: float) -> Dict[str, float]:
+        """
+        Snap a position onto the path.
+
+        Uses a local equirectangular projection around the position (accurate at route
+        scale) and projects onto every segment at once; returns the distance travelled
+        along the path, the distance remaining and how far off the path the position is.
+        """
+        if len(self.points) < 2:
+            return {"along_km": 0.0, "remaining_km": self.total_km, "off_route_km": float("nan")}
+        scale_x = KM_PER_DEGREE_LAT * math.cos(math.radians(latitude))
+        xy = np.empty_like(self.points)
+        xy[:, 0] = (self.points[:, 1] - longitude) * scale_x
+        xy[:, 1] = (self.points[:, 0] - latitude) * KM_PER_DEGREE_LAT
+
+        a = xy[:-1]
+        ab = xy[1:] - a
+        length_sq = np.einsum("ij,ij->i", ab, ab)
+        # Position is the origin, so (p - a) . ab == -(a . ab)
+        t = np.divide(-np.einsum("ij,ij->i", a, ab), length_sq, out=np.zeros_like(length_sq), where=length_sq > 0)
+        np.clip(t, 0.0, 1.0, out=t)
+        nearest = a + ab * t[:, None]
+        dist_sq = np.einsum("ij,ij->i", nearest, nearest)
+        i = int(np.argmin(dist_sq))
+
+        segment_km = self.cumulative_km[i + 1] - self.cumulative_km[i]
+        along = float(self.cumulative_km[i] + t[i] * segment_km)
+        return {
+            "along_km": along,
+            "remaining_km": max(0.0, self.total_km - along),
+            "off_route_km": float(math.sqrt(dist_sq[i])),
+            "segment_index": i,
+        }
+
+
+def _segment_lengths_km(points: np.ndarray) -> np.ndarray:
+    lat1 = np.radians(points[:-1, 0])
+    lat2 = np.radians(points[1:, 0])
+    dlat = lat2 - lat1
+    dlon = np.radians(points[1:, 1] - points[:-1, 1])
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
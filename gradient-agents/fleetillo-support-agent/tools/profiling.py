@@ -0,0 +1,256 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import Callable, Dict, List, Optional
+
+# Innermost matching module prefix decides where a sample's time is attributed
+CATEGORIES = [
+    ("import", ("<frozen importlib",)),
+    ("regex", ("re.", "re/", "sre_", "_sre")),
+    ("json", ("json.", "json/", "_json")),
+    ("supabase_client", ("httpx", "httpcore", "postgrest", "supabase", "gotrue", "h11", "h2.")),
+    ("tls_and_sockets", ("ssl", "socket", "selectors")),
+    ("jwt", ("jwt",)),
+    ("llm_client", ("gradient.", "gradient/", "anyio", "openai")),
+    ("event_loop", ("asyncio",)),
+]
+
+_active: ContextVar[Optional["Profile"]] = ContextVar("active_profile", default=None)
+
+
+def _module_path(filename: str) -> str:
+    """Shorten a file path to something like `re/_parser.py` or `tools/database.py`."""
+    parts = filename.replace("\\", "/").split("/")
+    for anchor in ("site-packages", "dist-packages"):
+        if anchor in parts:
+            return "/".join(parts[parts.index(anchor) + 1:])
+    if "lib" in parts:
+        lib = len(parts) - 1 - parts[::-1].index("lib")
+        if lib + 2 < len(parts) and parts[lib + 1].startswith("python"):
+            return "/".join(parts[lib + 2:])
+    return "/".join(parts[-2:])
+
+
+def _category(stack: List[str]) -> str:
+    for frame in reversed(stack):
+        path = frame.rsplit("(", 1)[-1]
+        for name, prefixes in CATEGORIES:
+            if path.startswith(prefixes):
+                return name
+    return "agent_code"
+
+
+class _NoopProfile:
+    path = None
+
+    def __enter__(self) -> "_NoopProfile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+NOOP_PROFILE = _NoopProfile()
+
+
+class Profile:
+    """
+    Wall-clock sampling profile of one agent invocation.
+
+    A background thread wakes every `interval_ms` and records the stack of the
+    event loop thread while this invocation's task is the one running on it,
+    plus any worker threads currently executing on its behalf (see
+    `Profiler.bind`). Other requests sharing the worker don't show up. Stacks are
+    written in the collapsed format (`frame;frame;frame count`) read by
+    flamegraph.pl, inferno and speedscope, next to a JSON summary.
+    """
+
+    def __init__(self, path_prefix: str, interval_ms: float, ids: Dict[str, str]):
+        self.path = f"{path_prefix}.folded"
+        self.summary_path = f"{path_prefix}.summary.json"
+        self.interval = interval_ms / 1000.0
+        self.ids = ids
+        self.stacks: Counter = Counter()
+        self.roles: Counter = Counter()
+        self.samples = 0
+        self._workers: Dict[int, int] = {}
+        self._workers_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._loop = None
+        self._task = None
+        self._loop_thread = None
+        self._token: Optional[Token] = None
+        self._started = 0.0
+        self._elapsed = 0.0
+
+    def __enter__(self) -> "Profile":
+        try:
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+        except RuntimeError:
+            pass
+        self._loop_thread = threading.get_ident()
+        self._token = _active.set(self)
+        self._started = time.perf_counter()
+        threading.Thread(target=self._run, name="invocation-profiler", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._elapsed = time.perf_counter() - self._started
+        try:
+            _active.reset(self._token)
+        except ValueError:
+            # Async generators may be closed from a copied context: restore by value
+            previous = self._token.old_value
+            _active.set(None if previous is Token.MISSING else previous)
+        self._stop.set()
+
+    def _enter_worker(self) -> None:
+        ident = threading.get_ident()
+        with self._workers_lock:
+            self._workers[ident] = self._workers.get(ident, 0) + 1
+
+    def _exit_worker(self) -> None:
+        ident = threading.get_ident()
+        with self._workers_lock:
+            self._workers[ident] -= 1
+            if not self._workers[ident]:
+                del self._workers[ident]
+
+    def _sample(self) -> None:
+        frames = sys._current_frames()
+        targets = []
+        if self._task is None or asyncio.current_task(self._loop) is self._task:
+            targets.append(("loop", self._loop_thread))
+        with self._workers_lock:
+            targets.extend(("worker", ident) for ident in self._workers)
+        for role, ident in targets:
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({_module_path(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(role)
+            self.stacks[";".join(reversed(stack))] += 1
+            self.roles[role] += 1
+            self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+        self._write()
+
+    def summary(self, top: int = 25) -> Dict:
+        self_time: Counter = Counter()
+        total_time: Counter = Counter()
+        categories: Counter = Counter()
+        for folded, count in self.stacks.items():
+            frames = folded.split(";")[1:]
+            if not frames:
+                continue
+            self_time[frames[-1]] += count
+            for frame in set(frames):
+                total_time[frame] += count
+            categories[_category(frames)] += count
+        ms = lambda count: round(count * self.interval * 1000, 1)
+        return {
+            **self.ids,
+            "profile": self.path,
+            "wall_ms": round(self._elapsed * 1000, 1),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "sampled_ms_by_thread": {role: ms(n) for role, n in self.roles.items()},
+            "sampled_ms_by_category": {name: ms(n) for name, n in categories.most_common()},
+            "top_self": [{"frame": f, "ms": ms(n)} for f, n in self_time.most_common(top)],
+            "top_total": [{"frame": f, "ms": ms(n)} for f, n in total_time.most_common(top)],
+        }
+
+    def _write(self) -> None:
+        try:
+            with open(self.path, "w") as f:
+                for folded, count in sorted(self.stacks.items()):
+                    f.write(f"{folded} {count}\n")
+            with open(self.summary_path, "w") as f:
+                json.dump(self.summary(), f, indent=2)
+        except OSError:
+            pass
+
+
+class Profiler:
+    """
+    Decides which invocations are profiled and where their profiles go.
+
+    An invocation is profiled when its context asks for it (`{"profile": True}`
+    for direct calls, or an `x-agent-profile: 1` header when `allow_header` is
+    set) or when it falls within `sample_rate`.
+    """
+
+    HEADER = "x-agent-profile"
+
+    def __init__(self, directory: str = "profiles", sample_rate: float = 0.0, interval_ms: float = 5.0,
+                 allow_header: bool = False):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.interval_ms = interval_ms
+        self.allow_header = allow_header
+        self.profiled = 0
+
+    def requested(self, context) -> bool:
+        if isinstance(context, dict) and context.get("profile"):
+            return True
+        if self.allow_header:
+            headers = getattr(context, "headers", None) or {}
+            if str(headers.get(self.HEADER, "")).lower() in ("1", "true", "yes"):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def invocation(self, context, ids: Optional[Dict[str, str]] = None):
+        """A `Profile` context manager for this invocation, or a no-op one."""
+        if not self.requested(context):
+            return NOOP_PROFILE
+        os.makedirs(self.directory, exist_ok=True)
+        ids = dict(ids or {})
+        name = ids.get("trace_id") or f"{time.strftime('%Y%m%d_%H%M%S')}_{random.getrandbits(32):08x}"
+        self.profiled += 1
+        return Profile(os.path.join(self.directory, name), self.interval_ms, ids)
+
+    @staticmethod
+    def bind(fn: Callable) -> Callable:
+        """
+        Wrap a function about to run in a worker thread (e.g. via `asyncio.to_thread`)
+        so the current invocation's profile also samples that thread while it runs.
+        """
+        profile = _active.get()
+        if profile is None:
+            return fn
+
+        def run(*args, **kwargs):
+            profile._enter_worker()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile._exit_worker()
+
+        return run
+
+    def stats(self) -> Dict:
+        return {"profiled": self.profiled, "sample_rate": self.sample_rate}
+
+
+def profiler_from_env() -> Profiler:
+    """PROFILE_DIR, PROFILE_SAMPLE_RATE, PROFILE_INTERVAL_MS and PROFILE_ALLOW_HEADER."""
+    return Profiler(
+        directory=os.environ.get("PROFILE_DIR", "profiles"),
+        sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", "0") or 0),
+        interval_ms=float(os.environ.get("PROFILE_INTERVAL_MS", "5") or 5),
+        allow_header=os.environ.get("PROFILE_ALLOW_HEADER", "false").lower() in ("1", "true", "yes"),
+    )
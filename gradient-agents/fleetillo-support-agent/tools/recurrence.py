@@ -0,0 +1,82 @@
+import calendar
+import heapq
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+# Fixed-length patterns step in days, calendar patterns step in months
+DAY_STEPS = {"daily": 1, "weekly": 7, "biweekly": 14}
+MONTH_STEPS = {"monthly": 1, "quarterly": 3, "yearly": 12}
+
+
+def add_months(day: date, months: int, anchor_day: int) -> date:
+    """Add months keeping the series' original day of month, clamped to the month's length."""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def expand(
+    parent: Dict,
+    window_start: date,
+    window_end: date,
+    skip: Optional[Set[Tuple[str, date]]] = None,
+) -> Iterator[Tuple[date, Dict]]:
+    """
+    Lazily yield (date, parent) for each occurrence of a recurring booking in the window.
+
+    Jumps straight to the first occurrence on or after `window_start` instead of walking
+    from the series start. Occurrences listed in `skip` (already materialized as child
+    bookings) are left out.
+    """
+    pattern = parent.get("recurrence_pattern")
+    first = date.fromisoformat(parent["scheduled_date"])
+    last = window_end
+    if parent.get("recurrence_end_date"):
+        last = min(last, date.fromisoformat(parent["recurrence_end_date"]))
+    if first > last:
+        return
+    parent_id = parent.get("id")
+
+    if pattern in DAY_STEPS:
+        step = DAY_STEPS[pattern]
+        skipped = max(0, -(-(window_start - first).days // step))
+        current = first + timedelta(days=skipped * step)
+        while current <= last:
+            if not skip or (parent_id, current) not in skip:
+                yield current, parent
+            current += timedelta(days=step)
+    elif pattern in MONTH_STEPS:
+        step = MONTH_STEPS[pattern]
+        months_between = (window_start.year - first.year) * 12 + window_start.month - first.month
+        n = max(0, months_between // step)
+        current = add_months(first, n * step, first.day)
+        while current <= last:
+            if current >= window_start and (not skip or (parent_id, current) not in skip):
+                yield current, parent
+            n += 1
+            current = add_months(first, n * step, first.day)
+
+
+def merged_schedule(
+    one_time: Iterable[Dict],
+    parents: Iterable[Dict],
+    window_start: date,
+    window_end: date,
+) -> Iterator[Tuple[date, Dict]]:
+    """
+    Merge one-time bookings and expanded recurring series into one date-ordered stream.
+
+    Child bookings that were materialized from a parent replace that parent's generated
+    occurrence on the same date, so nothing is counted twice.
+    """
+    one_time = sorted(
+        ((date.fromisoformat(b["scheduled_date"]), b) for b in one_time),
+        key=lambda item: item[0],
+    )
+    materialized = {
+        (b["parent_booking_id"], day) for day, b in one_time if b.get("parent_booking_id")
+    }
+    streams = [iter(one_time)] + [
+        expand(parent, window_start, window_end, materialized) for parent in parents
+    ]
+    return heapq.merge(*streams, key=lambda item: item[0])
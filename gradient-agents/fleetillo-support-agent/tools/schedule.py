@@ -0,0 +1,118 @@
+import heapq
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+
+def to_minutes(value: Optional[str]) -> Optional[int]:
+    """'HH:MM' or 'HH:MM:SS' to minutes after midnight."""
+    if not value:
+        return None
+    parts = value.split(":")
+    return int(parts[0]) * 60 + int(parts[1])
+
+
+def format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class ScheduleIndex:
+    """
+    Booked time intervals per (vehicle, date), kept sorted by start time.
+
+    Each group stores parallel start/end lists plus a running maximum of end times,
+    so "is anything booked between a and b?" is one bisection plus a backwards scan
+    that stops as soon as no earlier interval can reach `a`.
+    """
+
+    def __init__(self, default_duration_minutes: int = 60):
+        self.default_duration_minutes = default_duration_minutes
+        self._groups: Dict[Tuple[str, str], Dict[str, list]] = {}
+        self.vehicle_names: Dict[str, str] = {}
+        self.untimed = 0
+
+    def add_bookings(self, bookings: List[Dict]) -> None:
+        """Index booking rows that have a vehicle (via route), a date and a start time."""
+        pending: Dict[Tuple[str, str], list] = {}
+        for booking in bookings:
+            route = booking.get("routes") or {}
+            vehicle_id = route.get("vehicle_id")
+            if not vehicle_id:
+                continue
+            self.vehicle_names[vehicle_id] = (route.get("vehicles") or {}).get("name") or vehicle_id
+            start = to_minutes(booking.get("scheduled_start_time"))
+            if start is None:
+                self.untimed += 1
+                continue
+            end = to_minutes(booking.get("scheduled_end_time"))
+            if end is None or end <= start:
+                end = start + (booking.get("estimated_duration_minutes") or self.default_duration_minutes)
+            pending.setdefault((vehicle_id, booking["scheduled_date"]), []).append((start, end, booking))
+
+        for key, intervals in pending.items():
+            group = self._groups.get(key)
+            if group:
+                intervals.extend(zip(group["starts"], group["ends"], group["bookings"]))
+            intervals.sort(key=lambda interval: (interval[0], interval[1]))
+            max_ends, running = [], -1
+            for _, end, _ in intervals:
+                running = max(running, end)
+                max_ends.append(running)
+            self._groups[key] = {
+                "starts": [i[0] for i in intervals],
+                "ends": [i[1] for i in intervals],
+                "bookings": [i[2] for i in intervals],
+                "max_ends": max_ends,
+            }
+
+    def groups(self):
+        return self._groups.items()
+
+    def overlapping(self, vehicle_id: str, day: str, start: int, end: int) -> List[Dict]:
+        """Bookings of a vehicle on a day that intersect [start, end)."""
+        group = self._groups.get((vehicle_id, day))
+        if not group:
+            return []
+        i = bisect_left(group["starts"], end) - 1
+        hits = []
+        while i >= 0 and group["max_ends"][i] > start:
+            if group["ends"][i] > start:
+                hits.append(self._describe(group, i))
+            i -= 1
+        hits.reverse()
+        return hits
+
+    def conflicts(self, vehicle_id: str, day: str) -> List[Dict]:
+        """All pairs of overlapping bookings for one vehicle and day (sweep line)."""
+        group = self._groups.get((vehicle_id, day))
+        if not group:
+            return []
+        active: List[Tuple[int, int]] = []  # heap of (end, index)
+        pairs = []
+        for i, start in enumerate(group["starts"]):
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            for _, j in active:
+                pairs.append({
+                    "first": self._describe(group, j),
+                    "second": self._describe(group, i),
+                    "overlap_minutes": min(group["ends"][i], group["ends"][j]) - start,
+                })
+            heapq.heappush(active, (group["ends"][i], i))
+        return pairs
+
+    def demanded_minutes(self, vehicle_id: str, day: str) -> int:
+        """Sum of booking durations, i.e. the work a vehicle is asked to do that day."""
+        group = self._groups.get((vehicle_id, day))
+        if not group:
+            return 0
+        return sum(end - start for start, end in zip(group["starts"], group["ends"]))
+
+    @staticmethod
+    def _describe(group: Dict, i: int) -> Dict:
+        booking = group["bookings"][i]
+        return {
+            "booking_number": booking.get("booking_number"),
+            "status": booking.get("status"),
+            "start": format_minutes(group["starts"][i]),
+            "end": format_minutes(group["ends"][i]),
+        }
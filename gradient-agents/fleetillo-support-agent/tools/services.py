@@ -0,0 +1,118 @@
+import difflib
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class Service(NamedTuple):
+    name: str
+    code: Optional[str]
+    service_type: Optional[str]
+    description: Optional[str]
+    average_duration_minutes: Optional[int]
+    minimum_duration_minutes: Optional[int]
+    maximum_duration_minutes: Optional[int]
+    base_price: Optional[float]
+    price_currency: Optional[str]
+    requires_appointment: Optional[bool]
+    equipment_required: Tuple[str, ...]
+    skills_required: Tuple[str, ...]
+
+
+class ServiceCatalog:
+    """
+    The active services catalog, held in memory by each worker.
+
+    The catalog is small and rarely edited, so it is loaded once into an immutable
+    tuple of `Service` records plus lookup maps, and swapped wholesale when it changes.
+    Change detection is one tiny poll (newest `updated_at` plus row count) at most
+    every `REFRESH_SECONDS`; lookups themselves never touch the database.
+    """
+
+    COLUMNS = "name, code, service_type, description, average_duration_minutes, minimum_duration_minutes, " \
+              "maximum_duration_minutes, base_price, price_currency, requires_appointment, " \
+              "equipment_required, skills_required"
+    REFRESH_SECONDS = 300
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[tuple] = None
+        self._last_poll = 0.0
+        self._snapshot: Tuple[Tuple[Service, ...], Dict[str, Service]] = ((), {})
+
+    def refresh(self, client, force: bool = False) -> None:
+        """Reload the catalog if the `services` table changed since the last load."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._version is not None and now - self._last_poll < self.REFRESH_SECONDS:
+                return
+            self._last_poll = now
+
+        newest = client.table("services").select("updated_at", count="exact") \
+            .order("updated_at", desc=True).limit(1).execute()
+        version = (newest.data[0]["updated_at"] if newest.data else None, newest.count)
+        if version == self._version and not force:
+            return
+
+        rows = client.table("services").select(self.COLUMNS) \
+            .eq("status", "active").is_("deleted_at", "null").order("name").execute().data or []
+        services = tuple(_to_service(row) for row in rows)
+        keys: Dict[str, Service] = {}
+        for service in services:
+            keys[service.name.lower()] = service
+            if service.code:
+                keys[service.code.lower()] = service
+        with self._lock:
+            self._snapshot = (services, keys)
+            self._version = version
+
+    def all(self) -> Tuple[Service, ...]:
+        return self._snapshot[0]
+
+    def lookup(self, query: str, limit: int = 5) -> List[Service]:
+        """
+        Resolve a service by code or name: exact match first, then substring matches on
+        name, code or type, then close spellings.
+        """
+        services, keys = self._snapshot
+        wanted = (query or "").strip().lower()
+        if not wanted:
+            return list(services[:limit])
+        if wanted in keys:
+            return [keys[wanted]]
+        partial = [
+            s for s in services
+            if wanted in s.name.lower() or wanted in (s.code or "").lower() or wanted in (s.service_type or "").lower()
+        ]
+        if partial:
+            return partial[:limit]
+        close = difflib.get_close_matches(wanted, list(keys), n=limit, cutoff=0.6)
+        seen, matches = set(), []
+        for key in close:
+            service = keys[key]
+            if service.name not in seen:
+                seen.add(service.name)
+                matches.append(service)
+        return matches
+
+
+def _to_service(row: Dict) -> Service:
+    price = row.get("base_price")
+    return Service(
+        name=row.get("name") or "",
+        code=row.get("code"),
+        service_type=row.get("service_type"),
+        description=row.get("description"),
+        average_duration_minutes=row.get("average_duration_minutes"),
+        minimum_duration_minutes=row.get("minimum_duration_minutes"),
+        maximum_duration_minutes=row.get("maximum_duration_minutes"),
+        base_price=None if price is None else float(price),
+        price_currency=row.get("price_currency"),
+        requires_appointment=row.get("requires_appointment"),
+        equipment_required=tuple(row.get("equipment_required") or ()),
+        skills_required=tuple(row.get("skills_required") or ()),
+    )
+
+
+# Shared by every DatabaseTool in the worker
+SERVICE_CATALOG = ServiceCatalog()
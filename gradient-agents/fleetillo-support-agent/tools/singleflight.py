@@ -0,0 +1,119 @@
+import asyncio
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from tools.cache import TTLCache
+
+
+# Arguments the tools themselves lower-case before querying, per tool. Every other
+# string is matched as given (e.g. `.eq("status", ...)` is case-sensitive), so its
+# case has to stay part of the key.
+CASE_INSENSITIVE_ARGUMENTS = {
+    "get_booking_density": {"start_date", "end_date", "status", "priority"},
+    "get_bookings_summary": {"start_date", "end_date", "status", "priority", "period"},
+    "find_schedule_conflicts": {"start_date", "end_date", "period"},
+    "check_vehicle_availability": {"day"},
+    "get_upcoming_schedule": {"start_date"},
+    "get_vehicle_utilization": {"start_date", "end_date", "vehicle_query"},
+}
+
+
+def make_key(tool_name: str, arguments: Optional[Dict]) -> str:
+    """
+    Build a single-flight key from a tool name and its arguments.
+    Arguments are normalized so that key order, surrounding or repeated whitespace
+    and empty values don't produce different keys for the same query. Letter case
+    is only ignored for the arguments listed in CASE_INSENSITIVE_ARGUMENTS.
+    """
+    case_insensitive = CASE_INSENSITIVE_ARGUMENTS.get(tool_name, ())
+    normalized = {}
+    for name, value in (arguments or {}).items():
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            if name in case_insensitive:
+                value = value.lower()
+        if value in (None, "", [], {}):
+            continue
+        normalized[name] = value
+    return f"{tool_name}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls across concurrent requests.
+
+    The first caller for a key starts the call as a task owned by the group; it and
+    every caller that arrives while the task is still running await that task
+    through `shield()`, so a cancelled caller only cancels its own wait and the
+    query still completes for the others.
+    Results are dropped once the call finishes unless a `cache` is configured.
+    """
+
+    def __init__(self, cache: Optional[TTLCache] = None):
+        self.cache = cache
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `fn` once per key at a time and share its result with concurrent callers."""
+        with self._lock:
+            self.calls += 1
+        if self.cache is not None:
+            cached = self.cache.get(key, _MISSING)
+            if cached is not _MISSING:
+                with self._lock:
+                    self.cache_hits += 1
+                return cached
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._in_flight.get(key)
+            if task is not None and task.get_loop() is loop:
+                self.coalesced += 1
+            else:
+                task = loop.create_task(self._run(key, fn))
+                task.add_done_callback(lambda done: self._forget(key, done))
+                self._in_flight[key] = task
+                self.executions += 1
+
+        return await asyncio.shield(task)
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        result = await fn()
+        if self.cache is not None and not _is_error(result):
+            self.cache.set(key, result)
+        return result
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+        # Mark a failure as retrieved so it isn't logged when every caller has gone
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Return coalescing counters for this group."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "cache_hits": self.cache_hits,
+                "in_flight": len(self._in_flight),
+            }
+
+
+_MISSING = object()
+
+
+def _is_error(result: Any) -> bool:
+    """Tool methods report failures (incl. rate limiting) as {"error": ...} values."""
+    if isinstance(result, list) and result:
+        result = result[0]
+    return isinstance(result, dict) and "error" in result
@@ -0,0 +1,357 @@
+import atexit
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+SERVICE_NAME = "fleetillo-support-agent"
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class _NoopSpan:
+    """Stands in for every span of an unsampled request; all methods do nothing."""
+
+    sampled = False
+    trace_id = None
+    span_id = None
+
+    def set(self, **attributes) -> "_NoopSpan":
+        return self
+
+    def event(self, name: str, **attributes) -> None:
+        pass
+
+    def fail(self, error: BaseException) -> None:
+        pass
+
+    def end(self, **attributes) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current: ContextVar[Any] = ContextVar("current_span", default=NOOP_SPAN)
+
+
+class Span:
+    """
+    A timed, attributed stage of one request.
+
+    Used either as a context manager, which also makes it the parent of spans
+    started inside the block (including in `asyncio.to_thread` workers, which
+    copy the context), or via `Tracer.start_span()` + `end()` for stages that
+    don't map onto a single block.
+    """
+
+    sampled = True
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str], attributes: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _random_hex(16)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.events: List[Dict] = []
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._previous = None
+
+    def set(self, **attributes) -> "Span":
+        self.attributes.update(attributes)
+        return self
+
+    def event(self, name: str, **attributes) -> None:
+        self.events.append({"name": name, "time_unix_nano": time.time_ns(), "attributes": attributes})
+
+    def fail(self, error: BaseException) -> None:
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self, **attributes) -> None:
+        if self.end_ns is not None:
+            return
+        self.attributes.update(attributes)
+        self.end_ns = time.time_ns()
+        self.tracer.exporter.export(self)
+
+    def __enter__(self) -> "Span":
+        self._previous = _current.get()
+        _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None and not isinstance(exc, GeneratorExit):
+            self.fail(exc)
+        # Restore by value, not token: async generators may resume in a copied context
+        _current.set(self._previous)
+        self.end()
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "events": self.events,
+            "status": "error" if self.error else "ok",
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+class Tracer:
+    """
+    Creates spans for sampled requests and hands finished ones to an exporter.
+
+    The sampling decision is made once per request in `start_trace()`: an incoming
+    W3C `traceparent` header is followed (its trace id is kept and its sampled
+    flag honoured), otherwise `sample_rate` decides. Spans started outside a
+    sampled trace are the shared no-op span, so disabled tracing costs one
+    context variable lookup per stage.
+    """
+
+    def __init__(self, exporter: Optional["SpanExporter"] = None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None and self.sample_rate > 0
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes):
+        if self.exporter is None:
+            return NOOP_SPAN
+        trace_id, parent_id, sampled = None, None, None
+        match = _TRACEPARENT.match((traceparent or "").strip().lower())
+        if match:
+            trace_id, parent_id = match.group(1), match.group(2)
+            sampled = bool(int(match.group(3), 16) & 1)
+        if sampled is None:
+            sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        if not sampled:
+            return NOOP_SPAN
+        return Span(self, name, trace_id or _random_hex(32), parent_id, attributes)
+
+    def span(self, name: str, **attributes):
+        """Child of the current span, for use as a context manager."""
+        parent = _current.get()
+        if not parent.sampled:
+            return NOOP_SPAN
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    # Same as span(); reads better for stages ended explicitly with end()
+    start_span = span
+
+    @staticmethod
+    def current():
+        return _current.get()
+
+
+def current_ids() -> Dict[str, str]:
+    """Trace and span id of the current span, or {} when the request isn't sampled."""
+    span = _current.get()
+    if not span.sampled:
+        return {}
+    return {"trace_id": span.trace_id, "span_id": span.span_id}
+
+
+def _random_hex(length: int) -> str:
+    return f"{random.getrandbits(length * 4):0{length}x}"
+
+
+class SpanExporter:
+    """Buffers finished spans and writes them from a background thread in batches."""
+
+    def __init__(self, sink, flush_seconds: float = 2.0, max_batch: int = 512, max_queue: int = 10000):
+        self.sink = sink
+        self.flush_seconds = flush_seconds
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            # Never block a request on telemetry
+            self.dropped += 1
+
+    def _drain(self) -> List[Span]:
+        batch = []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self) -> None:
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            try:
+                self.sink.write(batch)
+                self.exported += len(batch)
+            except Exception:
+                self.failed += len(batch)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {"exported": self.exported, "dropped": self.dropped, "failed": self.failed,
+                "queued": self._queue.qsize()}
+
+
+class JsonlSink:
+    """One JSON object per span, appended to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, spans: List[Span]) -> None:
+        with open(self.path, "a") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+class OtlpHttpSink:
+    """Posts spans as OTLP/HTTP JSON (`/v1/traces`) to a collector such as the OpenTelemetry Collector or Jaeger."""
+
+    def __init__(self, endpoint: str, headers: Optional[Dict[str, str]] = None, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.timeout = timeout
+
+    def write(self, spans: List[Span]) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [{"scope": {"name": "fleetillo.agent"}, "spans": [_otlp_span(s) for s in spans]}],
+            }]
+        }
+        request = urllib.request.Request(self.endpoint, data=json.dumps(payload).encode("utf-8"),
+                                         headers=self.headers, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def _otlp_span(span: Span) -> Dict:
+    otlp = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": _otlp_attributes(span.attributes),
+        "events": [
+            {"name": e["name"], "timeUnixNano": str(e["time_unix_nano"]), "attributes": _otlp_attributes(e["attributes"])}
+            for e in span.events
+        ],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        otlp["parentSpanId"] = span.parent_id
+    return otlp
+
+
+def _otlp_attributes(attributes: Dict) -> List[Dict]:
+    out = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        elif isinstance(value, str):
+            typed = {"stringValue": value}
+        else:
+            typed = {"stringValue": json.dumps(value, default=str)}
+        out.append({"key": key, "value": typed})
+    return out
+
+
+def _parse_headers(value: str) -> Dict[str, str]:
+    return dict(item.split("=", 1) for item in value.split(",") if "=" in item)
+
+
+def tracer_from_env() -> Tracer:
+    """TRACE_EXPORT=off|jsonl|otlp with TRACE_SAMPLE_RATE, TRACE_JSONL_PATH, TRACE_OTLP_ENDPOINT/HEADERS."""
+    kind = os.environ.get("TRACE_EXPORT", "off").lower()
+    sample_rate = float(os.environ.get("TRACE_SAMPLE_RATE", "1.0") or 0)
+    if kind == "jsonl":
+        sink = JsonlSink(os.environ.get("TRACE_JSONL_PATH", "traces.jsonl"))
+    elif kind == "otlp":
+        sink = OtlpHttpSink(
+            os.environ.get("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"),
+            _parse_headers(os.environ.get("TRACE_OTLP_HEADERS", "")),
+        )
+    else:
+        return Tracer(None, 0.0)
+    return Tracer(SpanExporter(sink, flush_seconds=float(os.environ.get("TRACE_FLUSH_SECONDS", "2"))), sample_rate)
+
+
+class TracingTransport:
+    """Wraps an httpx transport so each request becomes a span under the current one."""
+
+    def __init__(self, transport, tracer: Tracer, name: str):
+        self._transport = transport
+        self._tracer = tracer
+        self._name = name
+
+    def handle_request(self, request):
+        with self._tracer.span(self._name, **{
+            "http.method": request.method,
+            "http.path": request.url.path,
+            "http.query": urllib.parse.unquote(request.url.query.decode("ascii", "replace")),
+        }) as span:
+            response = self._transport.handle_request(request)
+            span.set(**{"http.status_code": response.status_code})
+            return response
+
+    def close(self):
+        self._transport.close()
+
+    def __getattr__(self, name):
+        return getattr(self._transport, name)
+
+
+def instrument_httpx_client(client, tracer: Tracer, name: str) -> None:
+    """Record a span per request made through a sync httpx.Client (no-op when tracing is off)."""
+    if not tracer.enabled or isinstance(getattr(client, "_transport", None), TracingTransport):
+        return
+    client._transport = TracingTransport(client._transport, tracer, name)
+
+
+TRACER = tracer_from_env()
@@ -0,0 +1,95 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from tools.geo import parse_timestamp
+
+# Minutes of a standard working day, the denominator for utilization
+WORKDAY_MINUTES = 480
+
+
+def working_days(start: date, end: date) -> int:
+    """Weekdays in [start, end]."""
+    return int(np.busday_count(start, end + timedelta(days=1)))
+
+
+def vehicle_utilization(
+    routes: List[Dict],
+    bookings: List[Dict],
+    start: date,
+    end: date,
+    vehicle_names: Optional[Dict[str, str]] = None,
+) -> List[Dict]:
+    """
+    Per-vehicle utilization for a window, computed column-wise.
+
+    Route and booking rows are turned into parallel arrays once; everything else is
+    `np.bincount` over a combined (vehicle, day) key, so cost is linear in the rows and
+    no per-vehicle Python loops touch the raw data. Worked minutes use the actual
+    start/end times when both are recorded and the planned duration otherwise.
+    """
+    names = dict(vehicle_names or {})
+    vehicle_ids = sorted(
+        set(names) | {r["vehicle_id"] for r in routes} | {b["vehicle_id"] for b in bookings}
+    )
+    if not vehicle_ids:
+        return []
+    position = {vehicle_id: i for i, vehicle_id in enumerate(vehicle_ids)}
+    n_vehicles, n_days = len(vehicle_ids), (end - start).days + 1
+    first = start.toordinal()
+
+    r_vehicle = np.array([position[r["vehicle_id"]] for r in routes], dtype=np.int64)
+    r_day = np.array([date.fromisoformat(r["route_date"]).toordinal() - first for r in routes], dtype=np.int64)
+    planned = np.array([r.get("total_duration_minutes") or 0 for r in routes], dtype=np.float64)
+    distance = np.array([float(r.get("total_distance_km") or 0) for r in routes], dtype=np.float64)
+    started = np.array([parse_timestamp(r.get("actual_start_time")) or np.nan for r in routes], dtype=np.float64)
+    ended = np.array([parse_timestamp(r.get("actual_end_time")) or np.nan for r in routes], dtype=np.float64)
+    actual = (ended - started) / 60.0
+    has_actual = ~np.isnan(actual) & (actual > 0)
+    worked = np.where(has_actual, actual, planned)
+
+    b_vehicle = np.array([position[b["vehicle_id"]] for b in bookings], dtype=np.int64)
+
+    cells = n_vehicles * n_days
+    key = r_vehicle * n_days + r_day
+    daily_minutes = np.bincount(key, weights=worked, minlength=cells).reshape(n_vehicles, n_days)
+    daily_routes = np.bincount(key, minlength=cells).reshape(n_vehicles, n_days)
+    distance_km = np.bincount(r_vehicle, weights=distance, minlength=n_vehicles)
+    planned_minutes = np.bincount(r_vehicle, weights=planned, minlength=n_vehicles)
+    actual_minutes = np.bincount(r_vehicle, weights=np.where(has_actual, actual, 0.0), minlength=n_vehicles)
+    completed = np.bincount(b_vehicle, minlength=n_vehicles)
+
+    capacity = working_days(start, end) * WORKDAY_MINUTES
+    active = daily_routes > 0
+    active_days = active.sum(axis=1)
+    total_minutes = daily_minutes.sum(axis=1)
+    # Percentiles of minutes worked per active day, only for vehicles that worked at all
+    p50 = np.full(n_vehicles, np.nan)
+    p90 = np.full(n_vehicles, np.nan)
+    worked_any = active_days > 0
+    if worked_any.any():
+        masked = np.where(active[worked_any], daily_minutes[worked_any], np.nan)
+        p50[worked_any], p90[worked_any] = np.nanpercentile(masked, [50, 90], axis=1)
+
+    results = []
+    for i, vehicle_id in enumerate(vehicle_ids):
+        results.append({
+            "vehicle_id": vehicle_id,
+            "vehicle": names.get(vehicle_id) or vehicle_id,
+            "utilization_pct": round(float(total_minutes[i]) / capacity * 100, 1) if capacity else None,
+            "active_days": int(active_days[i]),
+            "routes": int(daily_routes[i].sum()),
+            "completed_bookings": int(completed[i]),
+            "worked_hours": round(float(total_minutes[i]) / 60, 1),
+            "planned_hours": round(float(planned_minutes[i]) / 60, 1),
+            "actual_hours": round(float(actual_minutes[i]) / 60, 1),
+            "distance_km": round(float(distance_km[i]), 1),
+            "daily_hours_p50": _hours(p50[i]),
+            "daily_hours_p90": _hours(p90[i]),
+        })
+    return results
+
+
+def _hours(minutes: float) -> Optional[float]:
+    return None if np.isnan(minutes) else round(float(minutes) / 60, 1)
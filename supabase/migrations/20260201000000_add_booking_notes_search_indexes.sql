@@ -0,0 +1,16 @@
+-- ============================================================================
+-- Migration: 20260201000000_add_booking_notes_search_indexes
+-- Description: Full-text search indexes on booking special_instructions and
+--              internal_notes, used by the support agent's find_booking tool.
+--              The expressions match what PostgREST generates for
+--              `column=wfts(english).<query>` so those filters use the index.
+-- Created: 2026-02-01
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_bookings_special_instructions_fts
+    ON fleetillo.bookings USING GIN (to_tsvector('english', special_instructions))
+    WHERE deleted_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_bookings_internal_notes_fts
+    ON fleetillo.bookings USING GIN (to_tsvector('english', internal_notes))
+    WHERE deleted_at IS NULL;